@@ -31,6 +31,7 @@ REQUIRED = [
 # What packages are optional?
 EXTRAS = {
     # 'fancy feature': ['django'],
+    'numpy': ['numpy'],  # Vectorized numerical transforms for very large directories
 }
 
 # The rest you shouldn't have to touch too much :)
@@ -169,6 +170,7 @@ setup(
     entry_points={
         'console_scripts': [
             'renamer = core.renamer:main',
+            'renamer-client = core.client:main',
         ],
     },
     install_requires=REQUIRED,
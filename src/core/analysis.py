@@ -0,0 +1,122 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Detection of the run of integers which numbers the files of a directory, sharded across processes.
+
+Each shard of filenames is analyzed independently: its runs of integers are extracted, and each run
+which is duplicated within the shard is discarded. Only the runs which are unique within every shard
+are merged, where runs which are duplicated across shards are discarded.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import cpu_count
+from re import compile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.table import to_nums
+
+SHARD_SIZE = 1 << 16  # Fewest filenames of a shard; directories of fewer files are analyzed in this process
+AMBIGUOUS_EXAMPLES = 3  # Filenames whose ambiguous numbering is reported
+
+_run_pattern = compile("[0-9]+")  # Captures all 'runs' of integers in the filename
+
+Shard = Tuple[int, Dict[int, Optional[Sequence[int]]]]  # Fewest runs of any filename, integers of each run by index
+
+
+def find_numbers(names: List[str], run_index: Optional[int] = None, workers: Optional[int] = 1) -> Tuple[int, array]:
+    """
+    :param names: Filenames of the directory
+    :param run_index: Index of the run of integers which numbers the files (None to detect it)
+    :param workers: Number of processes which analyze shards of the filenames (None for one per CPU)
+    :return: Index of the run of integers which numbers the files, and the number of each file
+    """
+    workers = (cpu_count() or 1) if workers is None else workers
+    if workers <= 1 or len(names) <= SHARD_SIZE:
+        shards = [_analyze(names, run_index)]
+    else:
+        size = max(SHARD_SIZE, -(-len(names) // workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_analyze, (names[i:i + size] for i in range(0, len(names), size)), repeat(run_index)))
+    runs = min(shard[0] for shard in shards)
+    unique = [i for i in (range(runs) if run_index is None else (run_index,)) if _is_unique(shards, i)]
+    if len(unique) > 1:
+        findall = _run_pattern.findall
+        examples = ("{} (ambiguous numbering: {})".format(name, ", ".join(str(int(findall(name)[i])) for i in unique))
+                    for name in names[:AMBIGUOUS_EXAMPLES])
+        raise Exception("A numerated pattern could not be differentiated, e.g. {}".format("; ".join(examples)))
+    if run_index is not None and len(unique) <= 0:
+        raise Exception("A numerated pattern could not be differentiated")
+    if len(unique) <= 0:
+        raise Exception("A numerated pattern is not present in the directory")
+    nums = array("q")
+    for shard in shards:
+        column = shard[1][unique[0]]
+        nums.extend(column if isinstance(column, array) else to_nums(column))  # Raises if a number does not fit
+    return unique[0], nums
+
+
+def _analyze(names: List[str], run_index: Optional[int]) -> Shard:
+    """
+    :param names: Filenames of the shard
+    :param run_index: Index of the only run to be extracted (None for every run which all filenames have)
+    :return: Fewest runs of any filename, and the integers of each run which is unique within the shard (else None)
+    """
+    findall = _run_pattern.findall
+    runs_by_file = [findall(name) for name in names]
+    runs = min(map(len, runs_by_file), default=0)
+    if run_index is not None:  # Run is already known, e.g. from a cache or a previous batch of files
+        if runs <= run_index:
+            raise Exception("A numerated pattern is not present in the directory")
+        runs = run_index + 1
+    columns = {}
+    for i in (range(runs) if run_index is None else (run_index,)):
+        column = [int(found[i]) for found in runs_by_file]
+        columns[i] = _pack(column) if len(set(column)) == len(column) else None
+    return runs, columns
+
+
+def _pack(column: List[int]) -> Sequence[int]:
+    """
+    :param column: Integers of a run
+    :return: Integers in an array, which is smaller to send between processes, unless one does not fit
+        (see 'MAX_NUM')
+    """
+    try:
+        return array("q", column)
+    except OverflowError:  # Only a problem if the run numbers the files
+        return column
+
+
+def _is_unique(shards: List[Shard], index: int) -> bool:
+    """
+    :param shards: Analyzed shards of the filenames
+    :param index: Index of a run which all filenames have
+    :return: True if the integers of the run are unique across all shards
+    """
+    columns = [shard[1].get(index) for shard in shards]
+    if any(column is None for column in columns):
+        return False
+    if len(columns) == 1:
+        return True
+    seen = set()
+    for column in columns:
+        seen.update(column)
+    return len(seen) == sum(map(len, columns))
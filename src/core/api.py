@@ -0,0 +1,191 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Library interface, for renaming files from within another Python program rather than through the CLI.
+
+    from core.api import plan
+
+    renames = plan("Photos", fmt="IMG $d", zeroes=0, consecutive=True)
+    for old, new in renames:    # Planned on first use, nothing is renamed
+        ...
+    renames.apply()
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from core.directory import ConcreteDirectory
+from core.external import ExternalPlan
+from core.jobs import build_chain
+from core.output import RenameWriter
+from core.pipeline import compile_pipeline
+from core.profiler import NULL_PROFILER, Profiler
+from core.scheduler import RenameOp
+
+
+class RenamePlan:
+    def __init__(self, path: str, options: Dict[str, Any], memory: Optional[int] = None,
+                 profiler: Profiler = NULL_PROFILER):
+        """
+        Renames of a directory, which are planned when first used rather than when constructed (see 'plan').
+
+        Plans held in memory are planned once and kept. Plans with a memory cap are planned again by
+        each use, such that the renames are streamed from temporary files rather than kept in memory.
+
+        :param path: Path to the directory
+        :param options: Options of the renames (see JOB_OPTIONS)
+        :param memory: Bytes of records which are held in memory at once (None to plan in memory)
+        :param profiler: Profiler which measures the planning and the renames
+        """
+        self.__path = path
+        self.__options = options
+        self.__memory = memory
+        self.__profiler = profiler
+        self.__directory: Optional[ConcreteDirectory] = None
+        self.__applied = False
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def __planned(self) -> ConcreteDirectory:
+        if self.__directory is None:
+            options, profiler = self.__options, self.__profiler
+            directory = ConcreteDirectory(self.__path, options.get("include"), options.get("exclude"), profiler)
+            compile_pipeline(build_chain(directory, **options)).run(profiler)
+            self.__directory = directory
+        return self.__directory
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """
+        Previews the renames as a mapping, rather than the operations which perform them (see 'operations').
+
+        :return: Generator of the original and renamed filename of each file, ordered by file number
+        """
+        if self.__memory is not None:
+            with ExternalPlan(self.__path, self.__options, self.__memory, self.__profiler) as external:
+                yield from external.renames()
+            return
+        files = self.__planned().get_files()
+        names, renamed = files.names, files.render_all()
+        for row in files.order():
+            yield names[row], renamed[row]
+
+    def operations(self) -> Iterator[RenameOp]:
+        """
+        Renames in the order 'apply' performs them, such that no file is overwritten. Files which are renamed
+        into the names of other renamed files are first renamed to temporary filenames. Files whose filename
+        is unchanged are not renamed. The temporary filenames of a plan with a memory cap are chosen again
+        by each use, as the plan is.
+
+        :return: Generator of the renames
+        """
+        if self.__memory is not None:
+            with ExternalPlan(self.__path, self.__options, self.__memory, self.__profiler) as external:
+                yield from external.operations()
+            return
+        for chain in self.__planned().plan_files(self.__profiler):
+            yield from chain
+
+    def dry_run(self, stream=None, fmt: str = "text") -> int:
+        """
+        Plans the renames, including the order which overwrites no file, without renaming any file.
+
+        :param stream: Stream the renames are written to (None to write nothing)
+        :param fmt: Format of the written renames, one of OUTPUT_FORMATS
+        :return: Number of files whose filename would be changed
+        """
+        writer = RenameWriter(stream, fmt) if stream is not None else None
+        count = 0
+        if self.__memory is not None:
+            with ExternalPlan(self.__path, self.__options, self.__memory, self.__profiler) as external:
+                for old, new in external.renames():
+                    count += old != new
+                    if writer is not None:
+                        writer.write(old, new)
+        else:
+            self.__planned().plan_files(self.__profiler)  # Raises if a file would be overwritten
+            for old, new in self:
+                count += old != new
+                if writer is not None:
+                    writer.write(old, new)
+        if writer is not None:
+            writer.flush()
+        return count
+
+    def apply(self, journal: bool = False, threads: int = 1) -> int:
+        """
+        Performs the renames. A plan can only be applied once, as its directory is changed by the renames.
+        A plan whose renames failed may be applied again, in which case it is planned again.
+
+        :param journal: True if the renames should be recorded in a journal (see '--journal')
+        :param threads: Number of threads which perform renames concurrently
+        :return: Number of files whose filename was changed
+        """
+        if self.__applied:
+            raise Exception("Renames were already applied: {}".format(self.__path))
+        if self.__memory is not None:
+            if journal:
+                raise ValueError("Renames planned with a memory cap cannot be journaled")
+            with ExternalPlan(self.__path, self.__options, self.__memory, self.__profiler) as external:
+                external.save_files(self.__profiler, threads)
+                self.__applied = True
+                return external.changes
+        try:
+            count = sum(old != new for old, new in self)
+            self.__planned().save_files(self.__profiler, journal, threads)
+        finally:  # Once renamed, or if some files may have been renamed, the plan no longer holds
+            directory, self.__directory = self.__directory, None
+            if directory is not None:
+                directory.close()
+        self.__applied = True
+        return count
+
+
+def plan(path: str, shift: Optional[int] = None, zeroes: Optional[int] = None, random: Any = False,
+         fmt: Union[str, List[str], None] = None, ext: Optional[str] = None, consecutive: bool = False,
+         include: Union[str, List[str], None] = None, exclude: Union[str, List[str], None] = None,
+         number_by: str = "name", memory: Optional[int] = None, workers: Optional[int] = 1,
+         profiler: Profiler = NULL_PROFILER) -> RenamePlan:
+    """
+    Plans the renames of a directory, with the options of the CLI. The directory is not scanned until the plan is used.
+
+    :param path: Path to the directory
+    :param shift: Offset to shift file numbers by (None or zero for no shift)
+    :param zeroes: Number of leading zeroes (0 for automatic, None for no zeroes)
+    :param random: Seed to shuffle file numbers by (None for a random seed, False for no shuffle)
+    :param fmt: Output format, optionally followed by an input capture regex
+    :param ext: Extension to be set
+    :param consecutive: True if file numbers should be flattened
+    :param include: Glob or 're:' prefixed regex patterns, of which files must match at least one
+    :param exclude: Glob or 're:' prefixed regex patterns, of which files must match none
+    :param number_by: Source of the file numbers, one of NUMBER_SOURCES
+    :param memory: Bytes of records which are held in memory at once (None to plan in memory, see '--memory')
+    :param workers: Number of processes which analyze the filenames of huge directories (None for one per CPU)
+    :param profiler: Profiler which measures the planning and the renames
+    :return: Plan of the renames
+    """
+    options = {"shift": shift, "zeroes": zeroes, "random": random, "fmt": fmt, "ext": ext,
+               "consecutive": consecutive, "include": include, "exclude": exclude, "number_by": number_by,
+               "workers": workers}
+    for k in ("fmt", "include", "exclude"):  # Single patterns need not be lists
+        if isinstance(options[k], str):
+            options[k] = [options[k]]
+    if memory is not None and (random is not False or number_by != "name"):  # Checked before the plan is used
+        raise ValueError("Files cannot be shuffled nor numbered by metadata when planned with a memory cap")
+    return RenamePlan(path, options, memory, profiler)
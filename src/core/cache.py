@@ -0,0 +1,205 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Persistent cache of directory scans and their numerical run (see '--cache').
+
+Each directory and include/exclude filter has its own cache file, which is valid for as long as the
+directory's device, inode and modification time are unchanged; adding, removing or renaming an entry
+updates the modification time. The directory is stat'ed before it is scanned, so a change made during
+the scan invalidates the cached scan. The least recently used cache files are evicted first.
+
+A modification time only changes once per tick of the file system's timestamps (up to 2 s on FAT, exFAT
+and SMB). A scan whose directory was modified within a tick of being stat'ed is therefore never cached,
+as an entry added later in the same tick would leave the signature unchanged.
+
+Scans are also kept in memory, such that a long-lived process (see '--serve') need not read them again.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from hashlib import sha1
+from os.path import expanduser, join, realpath
+from threading import Lock
+from time import sleep, time_ns
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+CACHE_CAPACITY = 64  # Number of directories whose scans are cached
+RACY_WINDOW = 2 * 10 ** 9  # Nanoseconds of the coarsest granularity of modification times (FAT)
+_VERSION = 1
+
+
+class Signature(NamedTuple):
+    device: int
+    inode: int
+    mtime: int  # Modification time (ns) of the directory
+    taken: int  # Time (ns since the epoch) just before the directory was stat'ed
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        """
+        :return: Device, inode and modification time, which change when an entry is added, removed or renamed
+        """
+        return self.device, self.inode, self.mtime
+
+    @property
+    def racy(self) -> bool:
+        """
+        :return: True if the directory was modified less than a timestamp tick before the signature was taken,
+            such that an entry added since may have left the signature unchanged
+        """
+        return self.taken - self.mtime < RACY_WINDOW
+
+
+class CachedScan(NamedTuple):
+    names: List[str]  # Filenames which were selected for renaming
+    unselected: Set[str]  # Names of entries which were not selected for renaming
+    run_index: Optional[int]  # Index of the run of integers which numbers the files, or None if it is unknown
+
+
+_memory: "OrderedDict[str, Tuple[Tuple[int, int, int], CachedScan]]" = OrderedDict()  # Scans of this process, by cache file
+_memory_lock = Lock()
+
+
+class ScanCache:
+    def __init__(self, root: Optional[str] = None, capacity: int = CACHE_CAPACITY):
+        """
+        :param root: Directory of the cache files (None for '$XDG_CACHE_HOME/renamer' or '~/.cache/renamer')
+        :param capacity: Number of directories whose scans are cached
+        """
+        if root is None:
+            root = join(os.environ.get("XDG_CACHE_HOME") or expanduser(join("~", ".cache")), "renamer")
+        self.__root = root
+        self.__capacity = capacity
+
+    @staticmethod
+    def signature(path: str) -> Signature:
+        """
+        :param path: Path to the directory
+        :return: Signature of the directory's entries, which changes when an entry is added, removed or renamed
+        """
+        taken = time_ns()  # Before the stat, such that the signature is racy rather than not if in doubt
+        st = os.stat(path)
+        return Signature(st.st_dev, st.st_ino, st.st_mtime_ns, taken)
+
+    @staticmethod
+    def settled_signature(path: str) -> Signature:
+        """
+        Waits out the timestamp tick of a directory which was just modified, such that its signature is not racy.
+
+        :param path: Path to the directory
+        :return: Signature of the directory, which is not racy
+        """
+        signature = ScanCache.signature(path)
+        for _ in range(3):
+            if not signature.racy:
+                return signature
+            sleep(min(RACY_WINDOW, signature.mtime + RACY_WINDOW - signature.taken) / 1e9)
+            signature = ScanCache.signature(path)
+        raise Exception("Directory keeps being modified, or was modified in the future: {}".format(path))
+
+    def __file(self, path: str, include: Optional[List[str]], exclude: Optional[List[str]]) -> str:
+        key = json.dumps([realpath(path), include or [], exclude or []])
+        return join(self.__root, sha1(key.encode("utf-8", "surrogateescape")).hexdigest() + ".json")
+
+    def load(self, path: str, signature: Signature, include: Optional[List[str]] = None,
+             exclude: Optional[List[str]] = None) -> Optional[CachedScan]:
+        """
+        :param path: Path to the directory
+        :param signature: Current signature of the directory (see 'ScanCache.signature')
+        :param include: Include patterns the directory is scanned with
+        :param exclude: Exclude patterns the directory is scanned with
+        :return: Cached scan of the directory, or None if it is absent or stale
+        """
+        file = self.__file(path, include, exclude)
+        with _memory_lock:
+            memorized = _memory.get(file)
+            if memorized is not None and memorized[0] == signature.key:
+                _memory.move_to_end(file)
+        if memorized is not None and memorized[0] == signature.key:
+            try:
+                os.utime(file)  # Most recently used
+            except OSError:
+                pass
+            scan = memorized[1]  # Copied, such that the memorized scan is not modified by its user
+            return CachedScan(list(scan.names), set(scan.unselected), scan.run_index)
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("version") != _VERSION or tuple(record.get("signature", ())) != signature.key or \
+                record.get("count") != len(record["names"]) + len(record["unselected"]):
+            return None
+        try:
+            os.utime(file)  # Most recently used
+        except OSError:
+            pass
+        scan = CachedScan(record["names"], set(record["unselected"]), record["run_index"])
+        self.__remember(file, signature, scan)
+        return scan
+
+    def store(self, path: str, signature: Signature, scan: CachedScan, include: Optional[List[str]] = None,
+              exclude: Optional[List[str]] = None) -> None:
+        """
+        Caches the scan of a directory, evicting the least recently used scans beyond the capacity.
+        A cache which cannot be written is ignored, as is a scan whose signature is racy.
+
+        :param path: Path to the directory
+        :param signature: Signature of the directory before it was scanned (see 'ScanCache.signature')
+        :param scan: Result of the scan
+        :param include: Include patterns the directory was scanned with
+        :param exclude: Exclude patterns the directory was scanned with
+        :return: None
+        """
+        if signature.racy:
+            return
+        file = self.__file(path, include, exclude)
+        self.__remember(file, signature, CachedScan(list(scan.names), set(scan.unselected), scan.run_index))
+        record = {"version": _VERSION, "path": realpath(path), "signature": list(signature.key),
+                  "count": len(scan.names) + len(scan.unselected), "names": scan.names,
+                  "unselected": sorted(scan.unselected), "run_index": scan.run_index}
+        try:
+            os.makedirs(self.__root, exist_ok=True)
+            temp = "{}.{}.tmp".format(file, os.getpid())
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(record, f, separators=(",", ":"))
+            os.replace(temp, file)
+            self.__evict()
+        except OSError:
+            pass
+
+    def __remember(self, file: str, signature: Signature, scan: CachedScan) -> None:
+        with _memory_lock:
+            _memory[file] = (signature.key, scan)
+            _memory.move_to_end(file)
+            while len(_memory) > self.__capacity:
+                _memory.popitem(last=False)
+
+    def __evict(self) -> None:
+        with os.scandir(self.__root) as entries:
+            files = [(e.stat().st_mtime_ns, e.path) for e in entries if e.name.endswith(".json")]
+        if len(files) <= self.__capacity:
+            return
+        files.sort()
+        for _, file in files[:len(files) - self.__capacity]:
+            try:
+                os.remove(file)
+            except OSError:
+                pass
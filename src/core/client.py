@@ -0,0 +1,96 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Thin client of the renamer daemon (see '--serve'), which forwards its command line arguments and working
+directory, then streams back the output of the daemon and exits with its status.
+
+Only the standard library is imported, such that the client starts as quickly as the interpreter.
+The request is one line of JSON. The response is a sequence of frames, each a channel byte and a
+big-endian length followed by that many bytes of output; the length of the final exit frame is the status.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+from os.path import join
+from tempfile import gettempdir
+from typing import List, Optional
+
+SOCKET_ENV = "RENAMER_SOCKET"  # Environment variable of the daemon's socket path
+FRAME = struct.Struct("!cI")  # Channel and length of each frame of the response
+STDOUT, STDERR, EXIT = b"o", b"e", b"x"  # Channels of the response
+
+
+def default_socket() -> str:
+    """
+    :return: Path to the daemon's socket: $RENAMER_SOCKET, else 'renamer.sock' in $XDG_RUNTIME_DIR or the temp directory
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    return join(runtime, "renamer.sock") if runtime else join(gettempdir(), "renamer-{}.sock".format(os.getuid()))
+
+
+def request(argv: List[str], out, err, path: Optional[str] = None, cwd: Optional[str] = None) -> int:
+    """
+    Forwards command line arguments to the daemon, writing its output as it is received.
+
+    :param argv: Command line arguments, as they would be passed to 'renamer'
+    :param out: Binary stream of the daemon's standard output
+    :param err: Binary stream of the daemon's standard error
+    :param path: Path to the daemon's socket (None for 'default_socket')
+    :param cwd: Directory against which relative paths are resolved (None for the working directory)
+    :return: Exit status of the request
+    """
+    path = default_socket() if path is None else path
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError as e:
+            raise ConnectionError("No renamer daemon is listening on {} ({}), start one with 'renamer --serve'"
+                                  .format(path, e.strerror or e))
+        sock.sendall(json.dumps({"argv": list(argv), "cwd": os.getcwd() if cwd is None else cwd}).encode() + b"\n")
+        streams = {STDOUT: out, STDERR: err}
+        with sock.makefile("rb") as response:
+            while True:
+                header = response.read(FRAME.size)
+                if len(header) < FRAME.size:
+                    raise ConnectionError("The renamer daemon closed the connection")
+                channel, length = FRAME.unpack(header)
+                if channel == EXIT:
+                    return length
+                stream = streams[channel]
+                stream.write(response.read(length))
+                stream.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        status = request(argv, sys.stdout.buffer, sys.stderr.buffer)
+    except ConnectionError as e:
+        raise SystemExit("renamer-client: {}".format(e))
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
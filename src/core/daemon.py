@@ -0,0 +1,201 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Long-lived renamer daemon (see '--serve'), which serves the requests of 'renamer-client' on a Unix socket.
+
+Modules, compiled patterns and cached directory scans stay loaded between requests, such that a request
+costs only its work. Requests are served concurrently, except that requests whose directories overlap
+(e.g. a directory and a recursive run over its parent) are served one at a time.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import socket
+from contextlib import contextmanager
+from os.path import commonpath, join, realpath
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Condition, Lock
+from typing import Iterable, List
+
+from core.client import EXIT, FRAME, STDERR, STDOUT, default_socket
+from core.jobs import load_manifest
+from core.planfile import read_plan
+from core.renamer import build_parser, run
+
+
+class PathLocks:
+    def __init__(self):
+        """
+        Locks of the directories which are being served, where a directory overlaps its ancestors and descendants.
+        """
+        self.__condition = Condition()
+        self.__held: List[str] = []
+
+    @staticmethod
+    def __overlaps(a: str, b: str) -> bool:
+        return commonpath([a, b]) in (a, b)
+
+    @contextmanager
+    def hold(self, paths: Iterable[str]):
+        """
+        Waits until no overlapping directory is held, then holds the directories until the context exits.
+
+        :param paths: Paths to the directories
+        :return: Context manager of the held directories
+        """
+        paths = [realpath(path) for path in paths]
+        held = self.__held
+        with self.__condition:
+            self.__condition.wait_for(lambda: not any(PathLocks.__overlaps(p, h) for p in paths for h in held))
+            held.extend(paths)
+        try:
+            yield
+        finally:
+            with self.__condition:
+                for path in paths:
+                    held.remove(path)
+                self.__condition.notify_all()
+
+
+class _Channel(io.RawIOBase):
+    def __init__(self, sock: socket.socket, channel: bytes, lock: Lock):
+        self.__sock = sock
+        self.__channel = channel
+        self.__lock = lock  # Shared by the channels of a connection, such that frames are not interleaved
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        with self.__lock:
+            self.__sock.sendall(FRAME.pack(self.__channel, len(b)) + bytes(b))
+        return len(b)
+
+
+def _stream(sock: socket.socket, channel: bytes, lock: Lock) -> io.TextIOWrapper:
+    return io.TextIOWrapper(io.BufferedWriter(_Channel(sock, channel, lock)), encoding="utf-8",
+                            errors="surrogateescape", line_buffering=True)
+
+
+class _Handler(StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            line = self.rfile.readline()
+            if not line:
+                return
+            lock = Lock()
+            out, err = _stream(self.connection, STDOUT, lock), _stream(self.connection, STDERR, lock)
+            try:
+                request = json.loads(line)
+                status = self.server.execute(request["argv"], request["cwd"], out, err)
+            except (ValueError, KeyError, TypeError) as e:
+                print("Malformed request: {}".format(e), file=err)
+                status = 2
+            out.flush()
+            err.flush()
+            self.connection.sendall(FRAME.pack(EXIT, status))
+        except OSError:  # The client disconnected
+            pass
+
+
+class RenamerServer(ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        """
+        Server of renamer requests, each of which is served by its own thread.
+
+        :param path: Path to the Unix socket, which is accessible only by the current user
+        """
+        self.__locks = PathLocks()
+        mask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(mask)
+
+    def execute(self, argv: List[str], cwd: str, out, err) -> int:
+        """
+        Performs the operation requested by command line arguments, as 'renamer' would.
+
+        :param argv: Command line arguments
+        :param cwd: Working directory of the client, against which relative paths are resolved
+        :param out: Stream of the renames and summaries
+        :param err: Stream of the errors and profile
+        :return: Exit status of the request
+        """
+        try:
+            parser = build_parser(out, err)
+            args = parser.parse_args(argv)
+            if args.serve is not None or args.watch is not None:
+                parser.error("--serve and --watch cannot be requested from the daemon")
+            for arg in ("path", "batch", "plan_out", "apply_plan"):
+                if getattr(args, arg) is not None:
+                    setattr(args, arg, join(cwd, getattr(args, arg)))
+            with self.__locks.hold(self.__paths(args)):
+                run(parser, args, out, err)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=err)
+            return 1
+        except Exception as e:
+            print("{}: {}".format(type(e).__name__, e), file=err)
+            return 1
+        return 0
+
+    @staticmethod
+    def __paths(args) -> List[str]:
+        try:
+            if args.batch is not None:
+                return [path for path, _ in load_manifest(args.batch, {})]
+            if args.apply_plan is not None:
+                return [read_plan(args.apply_plan).path]
+        except (OSError, ValueError):
+            return []  # Reported once the request is run
+        return [] if args.path is None else [args.path]
+
+
+def serve(path: str = None) -> None:
+    """
+    Serves requests on a Unix socket until interrupted.
+
+    :param path: Path to the Unix socket (None for 'default_socket')
+    :return: None
+    """
+    path = default_socket() if path is None else path
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except OSError:
+                os.remove(path)  # Left behind by a daemon which was not shut down
+            else:
+                raise SystemExit("A renamer daemon is already listening on {}".format(path))
+    # Worker processes of recursive runs are not forked from the threads which serve requests
+    multiprocessing.set_start_method("forkserver", force=True)
+    with RenamerServer(path) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
@@ -16,14 +16,22 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Dict, List
-from re import findall, compile, fullmatch
-from math import log, ceil
-from random import Random
+from typing import List, Optional
+from re import compile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
+from core import numeric
+from core.analysis import find_numbers
 from core.directory import *
+from core.template import Template
+from core.pipeline import Stage, run_stages
+from util.fsops import DirectoryHandle
+from util.headers import read_timestamp
 from util.util import require_non_none
 
+NUMBER_SOURCES = ("name", "mtime", "exif")  # Sources which files may be numbered by (see '--number-by')
+
 
 class RandomizeDecorator(Directory):
     def __init__(self, decorated: Directory, seed: int = None):
@@ -36,22 +44,22 @@ class RandomizeDecorator(Directory):
         self.__decorated = require_non_none(decorated)
         self.__seed = seed
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(True, self.__shuffle)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        flist = list(self.get_files().values())
-        gen = Random(self.__seed)
-        for i in range(len(flist) - 1):
-            i: int
-            j: int = gen.randrange(i, len(flist))
-            if i != j:
-                i: FileMetadata = flist[i]
-                j: FileMetadata = flist[j]
-                temp = i.num
-                i.num = j.num
-                j.num = temp
+        run_stages(self.stages(), self.get_files())
+
+    def __shuffle(self, files: FileTable) -> None:
+        numeric.shuffle(files.nums, self.__seed)
+        files.invalidate_order()
 
 
 class ExtensionDecorator(Directory):
@@ -65,24 +73,30 @@ class ExtensionDecorator(Directory):
         self.__decorated = require_non_none(decorated)
         self.__ext = require_non_none(ext)
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(False, self.__set_ext)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        files, ext = self.get_files(), self.__ext
-        for k, v in files.items():
-            v.ext = ext
+        run_stages(self.stages(), self.get_files())
 
+    def __set_ext(self, files: FileTable, start: int, stop: int) -> None:
+        files.fill_ext(self.__ext, start, stop)
 
-class FormatDecorator(Directory):
-    __format_specifier = "${}"  # Substitution constant for optional input regex
 
+class FormatDecorator(Directory):
     def __init__(self, decorated: Directory, fmt: list[str]):
         """
         Decorator which modifies the output filename into a specified format
 
         The format string must contain a '$d' specifier, designated for the numerical pattern.
+        It may also contain '$e' (extension), '$n' (original filename without extension) and '$$' (literal '$').
         e.g. [4.doc, 5.doc] -> FormatDecorator("Homework ($d)") -> [Homework (4).doc, Homework (5).doc]
 
         :param decorated: Decorated directory
@@ -91,12 +105,14 @@ class FormatDecorator(Directory):
         self.__decorated = require_non_none(decorated)
         self.__fmt = require_non_none(fmt)
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
-    def operate(self) -> None:
-        self.__decorated.operate()
-        files, fmt = self.get_files(), self.__fmt
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        fmt = self.__fmt
 
         """
         Index 1: Output Format
@@ -111,19 +127,26 @@ class FormatDecorator(Directory):
         """
         if len(fmt) > 1:  # User wants to capture input
             pattern = compile(fmt[1])
-            for k, v in files.items():
-                fmt = fmt[0]
-                matcher = fullmatch(pattern, k)
-                if matcher is None:
-                    raise Exception("--format optional capture regex does not match file: {}".format(k))
-                groups = matcher.groups()
-                for i in range(len(groups)):
-                    target = FormatDecorator.__format_specifier.format(i + 1)
-                    fmt = fmt.replace(target, groups[i])
-                v.fmt = fmt
-        else:  # No regex capture provided, no need for substitution
-            for k, v in files.items():
-                v.fmt = fmt[0]
+            template = Template(fmt[0], pattern.groups)  # Parsed once, rather than once per file
+            return [Stage(False, lambda files, start, stop:
+                          FormatDecorator.__capture(files, start, stop, template, pattern))]
+        # No regex capture provided, no need for substitution
+        template = Template(fmt[0])
+        return [Stage(False, lambda files, start, stop: files.fill_fmt(template, start, stop))]
+
+    def operate(self) -> None:
+        self.__decorated.operate()
+        run_stages(self.stages(), self.get_files())
+
+    @staticmethod
+    def __capture(files: FileTable, start: int, stop: int, template: Template, pattern) -> None:
+        names, match = files.names, pattern.fullmatch
+        for row in range(start, stop):
+            matcher = match(names[row])
+            if matcher is None:
+                raise Exception("--format optional capture regex does not match file: {}".format(names[row]))
+            files.set_captures(row, matcher.groups())
+        files.fill_fmt(template, start, stop)
 
 
 class ZeroesDecorator(Directory):
@@ -139,16 +162,22 @@ class ZeroesDecorator(Directory):
         self.__decorated = require_non_none(decorated)
         self.__digits = require_non_none(digits)
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(True, self.__measure)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        files = self.get_files()
-        large = max(map(lambda x: x.num, files.values()))
-        digits = max(self.__digits, self.__count_digits(large))
-        for k, v in files.items():
-            v.fnum = (digits - self.__count_digits(v.num)) * "0" + str(v.num)
+        run_stages(self.stages(), self.get_files())
+
+    def __measure(self, files: FileTable) -> None:
+        large = files.largest()
+        files.width = max(self.__digits, self.__count_digits(large))  # Numbers are padded as they are formatted
 
     @staticmethod
     def __count_digits(num: int):
@@ -156,7 +185,7 @@ class ZeroesDecorator(Directory):
         :param num: Number to count digits of
         :return: Number of digits present
         """
-        return int(ceil(log(abs(num) + 1, 10)))
+        return len(str(abs(num)))
 
 
 class ShifterDecorator(Directory):
@@ -174,46 +203,57 @@ class ShifterDecorator(Directory):
         if shift == 0:
             raise ValueError("File number shift is invalid: " + shift)
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(False, self.__shift_file)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        files, shift = self.get_files(), self.__shift
-        for k, v in files.items():
-            v.num = v.num + shift
+        run_stages(self.stages(), self.get_files())
+
+    def __shift_file(self, files: FileTable, start: int, stop: int) -> None:
+        numeric.shift(files.nums, self.__shift, start, stop)
 
 
 class FlattenDecorator(Directory):
-    def __init__(self, decorated: Directory):
+    def __init__(self, decorated: Directory, start: Optional[int] = None):
         """
         Decorator which flattens the numerical pattern, ensuring all files are consecutive
 
         e.g. [ "15.avi", "24.avi", "101.avi" ] -> [ "15.avi", "16.avi", "17.avi" ]
 
         :param decorated: Decorated directory
+        :param start: Number of the smallest file (None to keep the smallest number)
         """
         self.__decorated = require_non_none(decorated)
+        self.__start = start
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(True, self.__flatten)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        files = self.get_files()
-        if len(files) <= 1:
-            return  # A directory of zero or one files is already flattened
+        run_stages(self.stages(), self.get_files())
 
-        sort = sorted(files.items(), key=lambda t: t[1].num)
-        first: FileMetadata = sort[0][1]
-        small = int(first.num)  # Redundant cast
-        for i in range(1, len(files)):  # Skip first (smallest) element
-            v: FileMetadata = sort[i][1]
-            v.num = small + i
+    def __flatten(self, files: FileTable) -> None:
+        numeric.flatten(files.nums, self.__start, files.order())  # Order is unchanged, so it remains valid
 
 
 class NumeratedDecorator(Directory):
-    def __init__(self, decorated: Directory):
+    __run_pattern = compile("[0-9]+")  # Captures all 'runs' of integers in the filename
+
+    def __init__(self, decorated: Directory, run_index: Optional[int] = None, workers: Optional[int] = 1):
         """
         Decorator which initializes the numerical pattern according to the filenames in the directory.
         This decorator is an initialization operation and must be called before other decorators.
@@ -222,39 +262,100 @@ class NumeratedDecorator(Directory):
                 { "MyPhoto34HighRes.png": 34, "MyPhoto36HighRes.png": 36 }
 
         :param decorated: Decorated directory
+        :param run_index: Index of the run of integers which numbers the files (None to detect it)
+        :param workers: Number of processes which analyze the filenames of huge directories (None for one per CPU)
+        """
+        self.__decorated = require_non_none(decorated)
+        self.__run_index = run_index
+        self.__workers = workers
+
+    @staticmethod
+    def count_runs(filename: str) -> int:
+        """
+        :param filename: Name of a file
+        :return: Number of runs of integers in the filename
+        """
+        return len(NumeratedDecorator.__run_pattern.findall(filename))
+
+    @property
+    def run_index(self) -> Optional[int]:
+        """
+        :return: Index of the run of integers which numbers the files, or None if it was not yet detected
+        """
+        return self.__run_index
+
+    def get_files(self) -> FileTable:
+        return self.__decorated.get_files()
+
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(True, self.__numerate)]
+
+    def operate(self) -> None:
+        self.__decorated.operate()
+        run_stages(self.stages(), self.get_files())
+
+    def __numerate(self, files: FileTable) -> None:
+        self.__run_index, files.nums = find_numbers(files.names, self.__run_index, self.__workers)
+
+
+class MetadataNumeratedDecorator(Directory):
+    __CHUNK = 1 << 8  # Files whose timestamps are read by a thread at once
+
+    def __init__(self, decorated: Directory, directory: DirectoryHandle, source: str = "mtime",
+                 threads: Optional[int] = None):
+        """
+        Decorator which initializes the numerical pattern according to when the files were taken, rather than
+        their filenames. Files are numbered from 1 in order of their timestamp, and files of equal timestamps in
+        order of their filename. This decorator is an initialization operation and must be called before other decorators.
+
+            mtime   Modification time of the file
+            exif    Timestamp in the header of the file (see 'util.headers'), else its modification time
+
+        e.g. [ "IMG_0101.jpg" (taken 14:05), "DSC_7.jpg" (taken 09:30) ] ->
+                { "IMG_0101.jpg": 2, "DSC_7.jpg": 1 }
+
+        :param decorated: Decorated directory
+        :param directory: Handle of the directory, relative to which the files are read
+        :param source: Source of the timestamps, either 'mtime' or 'exif'
+        :param threads: Number of threads which read the timestamps concurrently (None for the executor's default)
         """
+        if source not in NUMBER_SOURCES[1:]:
+            raise ValueError("Files must be numbered by one of {}: {}".format(NUMBER_SOURCES[1:], source))
         self.__decorated = require_non_none(decorated)
+        self.__directory = require_non_none(directory)
+        self.__source = source
+        self.__threads = threads
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         return self.__decorated.get_files()
 
+    def get_decorated(self) -> Directory:
+        return self.__decorated
+
+    def stages(self) -> List[Stage]:
+        return [Stage(True, self.__numerate)]
+
     def operate(self) -> None:
         self.__decorated.operate()
-        files = self.get_files()
-
-        regexp = "([0-9]+)"  # Captures all 'runs' of integers in the filename
-        runs_by_file = {f: [int(e) for e in findall(regexp, f)] for f in files}
-        # Count of numerical 'runs' in which the filenames all share
-        num_runs = min(map(lambda x: len(x), runs_by_file.values()))
-        unique_runs = list(filter(
-            lambda x: NumeratedDecorator.__is_unique_run_set(runs_by_file, x), list(range(0, num_runs))))
-
-        if len(unique_runs) > 1:
-            for t in runs_by_file.items():
-                print("{}\n\tAmbiguous numbering: {}".format(t[0], ", ".join(map(lambda x: str(t[1][x]), unique_runs))))
-            raise Exception("A numerated pattern could not be differentiated")
-        if len(unique_runs) <= 0:
-            raise Exception("A numerated pattern is not present in the directory")
-        unique_runs = unique_runs[0]
-        for k, v in files.items():
-            v.num = runs_by_file[k][unique_runs]  # Pattern can now be determined
-
-    @staticmethod  # Returns true if all runs at an index are unique
-    def __is_unique_run_set(runs: Dict[str, List[int]], index: int):
-        s = set()
-        for nums in runs.values():
-            e = nums[index]
-            if e in s:
-                return False
-            s.add(e)
-        return True
+        run_stages(self.stages(), self.get_files())
+
+    def __numerate(self, files: FileTable) -> None:
+        names, chunk = files.names, MetadataNumeratedDecorator.__CHUNK
+        with ThreadPoolExecutor(max_workers=self.__threads) as pool:  # Reads are dominated by I/O latency
+            stamps = [stamp for stamps in pool.map(self.__timestamps, (names[i:i + chunk] for i in
+                                                                      range(0, len(names), chunk))) for stamp in stamps]
+        nums = array("q", bytes(8 * len(names)))
+        for rank, row in enumerate(sorted(range(len(names)), key=lambda r: (stamps[r], names[r]))):
+            nums[row] = rank + 1
+        files.nums = nums
+
+    def __timestamps(self, names: List[str]) -> List[float]:
+        directory, exif = self.__directory, self.__source == "exif"
+        stamps = []
+        for name in names:
+            stamp = read_timestamp(name, directory.open) if exif else None
+            stamps.append(directory.stat(name).st_mtime if stamp is None else stamp)
+        return stamps
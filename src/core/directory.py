@@ -17,96 +17,23 @@
 """
 
 from abc import abstractmethod, ABC
-from typing import Dict
-from os import listdir, rename
-from os.path import isdir, join
-from re import compile
-
+from typing import List, Optional, Set
+from os.path import isdir
+
+from core.executor import perform_plan
+from core.journal import JOURNAL_NAME
+from core.pipeline import Stage
+from core.profiler import NULL_PROFILER, Profiler
+from core.scanner import ScanFilter, scan_directory
+from core.scheduler import RenameOp, schedule_renames
+from core.table import FileMetadata, FileTable
+from util.fsops import DirectoryHandle
 from util.util import require_non_none
 
 
-class FileMetadata:
-    # Pattern to extract extensions from filenames
-    __ext_pattern = compile(r"^.*\.([^.]+)$")
-    __fmt_specifier = "$d"
-
-    def __init__(self, filename: str):
-        """
-        Constructs metadata for a specified file.
-
-        The following metadata is tracked:
-        * name: Original filename with extension
-        * fmt: Output format of the file, which must contain '$d' (file number)
-        * num: File number (unknown during initialization)
-        * fnum: Formatted number, used to override 'num'
-        * ext: Extension of the file
-
-        :param filename: Name of the file
-        """
-        self.__name = require_non_none(filename)
-        self.__fmt = FileMetadata.__fmt_specifier
-        self.__num = None
-        self.__fnum = None
-        match = FileMetadata.__ext_pattern.match(filename)
-        if match is None:
-            raise ValueError("The following file must contain an extension: " + filename)
-        self.__ext = match.group(1)
-    
-    @property
-    def name(self) -> str:
-        return self.__name
-
-    @property
-    def fmt(self) -> str:
-        return self.__fmt
-
-    @fmt.setter
-    def fmt(self, fmt: str) -> None:
-        if FileMetadata.__fmt_specifier not in require_non_none(fmt):
-            raise ValueError("Required format specified '{}' was not found in the following format: {}"
-                             .format(FileMetadata.__fmt_specifier, fmt))
-        self.__fmt = fmt
-
-    @property
-    def num(self) -> int:
-        return self.__num
-
-    @num.setter
-    def num(self, num: int) -> None:
-        self.__num = require_non_none(num)
-
-    @property
-    def fnum(self) -> str:
-        if self.__num is None:
-            raise Exception("File's number cannot be formatted as it was uninitialized: " + self.__name)
-        if self.__fnum is None:
-            self.__fnum = str(self.__num)
-        return self.__fnum
-
-    @fnum.setter
-    def fnum(self, fnum: str) -> None:
-        self.__fnum = require_non_none(fnum)
-
-    @property
-    def ext(self) -> str:
-        return self.__ext
-
-    @ext.setter
-    def ext(self, ext: str) -> None:
-        self.__ext = require_non_none(ext)
-
-    def __str__(self) -> str:
-        """
-        Formats the filename according to the object's metadata.
-
-        :return: Formatted filename of the object
-        """
-        return self.fmt.replace("$d", self.fnum) + "." + self.ext
-
-
 class Directory(ABC):
     @abstractmethod
-    def get_files(self) -> Dict[str, FileMetadata]:
+    def get_files(self) -> FileTable:
         """
         :rtype: object
         :return: Relation of filenames to their numerical ordering.
@@ -122,58 +49,122 @@ class Directory(ABC):
         """
         pass
 
+    def get_decorated(self) -> Optional["Directory"]:
+        """
+        :return: Directory which this directory decorates, or None if it is not a decorator
+        """
+        return None
+
+    def stages(self) -> List[Stage]:
+        """
+        Describes the operation of the directory as stages, such that a chain of decorators can be fused.
+
+        :return: Stages which together are equivalent to the operation of this directory alone
+        """
+        return []
+
 
 class ConcreteDirectory(Directory):
-    def __init__(self, path: str):
+    def __init__(self, path: str, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 profiler: Profiler = NULL_PROFILER, names: Optional[List[str]] = None,
+                 unselected: Optional[Set[str]] = None):
+        """
+        Constructs a directory from the files present within the specified path.
+
+        Only regular files which have an extension and which pass the include/exclude filters are
+        selected for renaming. All other entries are remembered so they are never overwritten.
+
+        If the filenames are already known (e.g. a batch of newly arrived files), the directory is not scanned.
+        The directory is opened once, and is scanned and renamed relative to its file descriptor.
+
+        :param path: Path to the directory
+        :param include: Glob or 're:' prefixed regex patterns, of which files must match at least one
+        :param exclude: Glob or 're:' prefixed regex patterns, of which files must match none
+        :param profiler: Profiler which measures the scan of the directory
+        :param names: Filenames selected for renaming (None to scan the directory)
+        :param unselected: Names of entries which are present but will not be renamed, used as is
+        """
         self.__path = require_non_none(path)
         if not isdir(path):
             raise Exception("Path is not a valid directory: {}".format(path))
-        self.__files = {e: FileMetadata(e) for e in listdir(path)}
-
-    def save_files(self) -> None:
+        self.__handle = DirectoryHandle(path)
+        if names is not None:
+            self.__files = FileTable(names)
+            self.__unselected: Set[str] = set() if unselected is None else unselected
+            return
+        name_filter = ScanFilter(include, exclude) if include or exclude else None
+        names: List[str] = []
+        self.__unselected: Set[str] = set()  # Entries which are present but will not be renamed
+        with profiler.stage("scan") as record:
+            for name, selected in scan_directory(path, name_filter, self.__handle):
+                if selected and not name.startswith(JOURNAL_NAME) and FileTable.parse_extension(name) is not None:
+                    names.append(name)
+                else:
+                    self.__unselected.add(name)
+            self.__files = FileTable(names)
+            record.files = len(names)
+
+    def save_files(self, profiler: Profiler = NULL_PROFILER, journal: bool = False, threads: int = 1) -> None:
         """
         Saves the directory to the storage medium.
 
         File name changes made to the directory object are renamed.
+        Renames are ordered such that no file is overwritten, including cyclic
+        renames (e.g. 3.jpg <-> 7.jpg) which are broken using a temporary filename.
+        The journal of a directory is never selected for renaming, nor is it overwritten.
 
+        :param profiler: Profiler which measures the planning and the renaming phases
+        :param journal: True if the renames should be recorded in a journal, such that they can be resumed or undone
+        :param threads: Number of threads which perform independent chains of renames concurrently
         :return: None
         """
+        perform_plan(self.__path, self.plan_files(profiler), journal, profiler, threads, self.__handle)
 
+    def plan_files(self, profiler: Profiler = NULL_PROFILER) -> List[List[RenameOp]]:
         """
-        Determine the correct order to rename files such that no rename conflicts arise.
-        1st Pass: Classify operations as either conflict-free or waiting on another operation.
-        2nd Pass: Pop safe operations -> update status of operations that were waiting on them.
+        :param profiler: Profiler which measures the planning
+        :return: Chains of renames which save the directory (see 'schedule_renames')
         """
-        operations = {k: str(v) for (k, v) in self.__files.items()}
-        performable = []  # Rename operations which can be performed without conflicts.
-        conflicts = {}  # Rename operations that wait on another rename operation.
+        files = self.__files
+        with profiler.stage("plan", len(files)):
+            names, renamed = files.names, files.render_all()
+            if files.has_order:  # Chains are planned in order of file number, if it is known
+                return schedule_renames({names[row]: renamed[row] for row in files.order()}, self.__unselected)
+            return schedule_renames(dict(zip(names, renamed)), self.__unselected)
 
-        for k, v in operations.items():
-            if v not in operations:
-                performable.append(k)
-            else:
-                conflicts[v] = k
+    @property
+    def path(self) -> str:
+        return self.__path
 
-        # Cyclical DAG -- Need to break it apart.
-        # Problem: It might be possible there are multiple cyclic DAG's.
+    @property
+    def handle(self) -> DirectoryHandle:
+        """
+        :return: Handle of the directory, whose entries are named relative to its file descriptor
+        """
+        return self.__handle
 
-        while len(performable) > 0:
-            op = performable.pop()
-            p1 = join(self.__path, op)
-            p2 = join(self.__path, operations[op])
-            rename(p1, p2)
-            if op in conflicts:
-                performable.append(conflicts[op])
-                del conflicts[op]
+    def __enter__(self) -> "ConcreteDirectory":
+        return self
 
-    def dag_topological_sort(self, vertices):
-        pass
+    def __exit__(self, *_) -> None:
+        self.close()
 
-    def dag_break_cycle(self):
-        pass
+    def close(self) -> None:
+        """
+        Closes the file descriptor of the directory. Entries are afterwards named by path.
 
-    def get_files(self) -> Dict[str, FileMetadata]:
+        :return: None
+        """
+        self.__handle.close()
+
+    def get_files(self) -> FileTable:
         return self.__files
 
+    def get_unselected(self) -> Set[str]:
+        """
+        :return: Names of directory entries which were not selected for renaming
+        """
+        return self.__unselected
+
     def operate(self) -> None:
         pass  # Sentinel method.
@@ -0,0 +1,255 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import List, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heapreplace
+from threading import Event
+
+from core.journal import COMMIT_BATCH, Journal
+from core.profiler import NULL_PROFILER, Profiler
+from core.scheduler import RenameOp
+from util.fsops import DirectoryHandle, can_exchange
+
+
+class Recovery(NamedTuple):
+    chains: List[List[RenameOp]]  # Planned renames of the journal
+    committed: List[int]  # Number of renames of each chain which were committed, in order
+    done: List[int]  # Number of renames of each chain which were performed, including those not committed
+
+
+def execute(path: str, chains: List[List[RenameOp]], journal: Optional[Journal] = None,
+            skip: Optional[List[int]] = None, profiler: Profiler = NULL_PROFILER, threads: int = 1,
+            directory: Optional[DirectoryHandle] = None) -> None:
+    """
+    Performs chains of renames, in order, optionally committing each rename to a journal.
+
+    Chains never share a filename, so they are independent of one another. With multiple threads the
+    chains are partitioned across the threads by number of renames, and each chain is performed in
+    order by a single thread. On storage where every rename is a round trip (e.g. NFS or SMB), the
+    throughput then scales with the number of threads. Once a rename fails, no further renames are started.
+
+    The first rename of a cycle (see 'schedule_renames') is synced immediately, as a cycle's entries
+    are otherwise identical before it starts and after it completes, and could not be recovered.
+
+    Where the platform supports it, a 2-cycle (e.g. 3.jpg <-> 7.jpg) is swapped with a single atomic
+    call rather than three renames through a temporary name. A journaled swap is recorded beforehand.
+
+    Files are renamed relative to the opened directory, such that its path is resolved once.
+
+    :param path: Path to the directory
+    :param chains: Chains of renames, numbered by the journal in order
+    :param journal: Journal of the renames, which is closed once every rename is performed (None for no journal)
+    :param skip: Number of renames to skip at the start of each chain, as they were already performed
+    :param profiler: Profiler which measures the renames
+    :param threads: Number of threads which perform renames concurrently
+    :param directory: Opened directory (None to open the path for the duration of the renames)
+    :return: None
+    """
+    if directory is None:
+        with DirectoryHandle(path) as directory:
+            return execute(path, chains, journal, skip, profiler, threads, directory)
+    skip = [0] * len(chains) if skip is None else skip
+    offsets, index = [], 0
+    for chain in chains:
+        offsets.append(index)
+        index += len(chain)
+    failed = Event()
+
+    def perform(c: int) -> int:
+        chain, offset, cycle = chains[c], offsets[c], _is_cycle(chains[c])
+        if skip[c] == 0 and _is_swap(chain) and can_exchange() and not failed.is_set():
+            a, b = chain[0].src, chain[1].src
+            if journal is not None:
+                journal.exchange(offset, directory.lstat(a).st_ino)
+            if directory.exchange(a, b):
+                if journal is not None:
+                    for i in range(len(chain)):
+                        journal.commit(offset + i)
+                return 1 if journal is not None else 2  # System calls saved, net of the stat of the journal
+        for i in range(skip[c], len(chain)):
+            if failed.is_set():
+                return 0
+            op = chain[i]
+            directory.rename(op.src, op.dst)
+            if journal is not None:
+                journal.commit(offset + i, cycle and i == 0)
+        return 0
+
+    def perform_all(indexes: List[int]) -> int:
+        try:
+            return sum(perform(c) for c in indexes)
+        except BaseException:
+            failed.set()
+            raise
+
+    with profiler.stage("rename", index) as record:
+        if threads <= 1 or len(chains) <= 1:
+            saved = perform_all(range(len(chains)))
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                futures = [pool.submit(perform_all, p) for p in _partition(chains, skip, threads)]
+            saved = sum(future.result() for future in futures)  # Raises the error of a failed rename
+        record.syscalls += index - sum(skip) - saved
+    if journal is not None:
+        journal.close(True)
+
+
+def perform_plan(path: str, chains: List[List[RenameOp]], journal: bool = False, profiler: Profiler = NULL_PROFILER,
+                 threads: int = 1, directory: Optional[DirectoryHandle] = None) -> None:
+    """
+    Performs planned chains of renames (see 'schedule_renames'), optionally recording them in a new journal.
+    The journal of a directory whose renames were interrupted is never replaced.
+
+    :param path: Path to the directory
+    :param chains: Chains of renames
+    :param journal: True if the renames should be recorded in a journal, such that they can be resumed or undone
+    :param profiler: Profiler which measures the renames
+    :param threads: Number of threads which perform renames concurrently
+    :param directory: Opened directory (None to open the path for the duration of the renames)
+    :return: None
+    """
+    if journal:
+        state = Journal.read(path)
+        if state is not None and state.sealed and not state.done:
+            raise Exception("Directory has an interrupted rename, which must be resumed or undone: {}".format(path))
+    execute(path, chains, Journal.create(path, chains) if journal else None, None, profiler, threads, directory)
+
+
+def _partition(chains: List[List[RenameOp]], skip: List[int], n: int) -> List[List[int]]:
+    """
+    Partitions chains such that each partition has roughly the same number of renames,
+    by assigning the longest remaining chain to the partition with the fewest renames.
+
+    :param chains: Chains of renames
+    :param skip: Number of renames which are skipped at the start of each chain
+    :param n: Maximum number of partitions
+    :return: Indexes of the chains of each non-empty partition
+    """
+    partitions = [[] for _ in range(n)]
+    heap = [(0, p) for p in range(n)]  # (renames, partition)
+    for c in sorted(range(len(chains)), key=lambda c: skip[c] - len(chains[c])):
+        if len(chains[c]) > skip[c]:
+            renames, p = heap[0]
+            partitions[p].append(c)
+            heapreplace(heap, (renames + len(chains[c]) - skip[c], p))
+    return [p for p in partitions if len(p) > 0]
+
+
+def recover(path: str) -> Recovery:
+    """
+    Determines how far the journaled renames of a directory progressed.
+
+    Within a chain, renames are committed in order, but the latest commits may not have been synced.
+    Only those (at most one batch) renames after the last commit are examined: each rename vacates
+    its source until the next rename of the chain fills it, so the source which is missing marks the
+    last rename performed. A 2-cycle which was swapped in a single call is recognized by the inode
+    of its first source having changed.
+
+    :param path: Path to the directory
+    :return: Progress of the journaled renames
+    """
+    state = Journal.read(path)
+    if state is None:
+        raise Exception("Directory has no rename journal: {}".format(path))
+    committed, done = [], []
+    index = 0
+    with DirectoryHandle(path) as directory:
+        for chain in state.chains:
+            k = 0
+            while k < len(chain) and index + k in state.committed:
+                k += 1
+            d = k
+            inode = state.exchanges.get(index) if k == 0 and _is_swap(chain) else None
+            if inode is not None and _inode(directory, chain[0].src) not in (None, inode):
+                d = len(chain)  # Swapped
+            else:
+                window = 1 if _is_cycle(chain) and k == 0 else COMMIT_BATCH + 1
+                for i in range(min(len(chain), k + window) - 1, k - 1, -1):
+                    if not directory.lexists(chain[i].src):
+                        d = i + 1
+                        break
+            committed.append(k)
+            done.append(d)
+            index += len(chain)
+    return Recovery(state.chains, committed, done)
+
+
+def resume(path: str, recovery: Recovery, profiler: Profiler = NULL_PROFILER, threads: int = 1) -> None:
+    """
+    Performs the renames of a journal which were not yet performed.
+
+    :param path: Path to the directory
+    :param recovery: Progress of the journaled renames (see 'recover')
+    :param profiler: Profiler which measures the renames
+    :param threads: Number of threads which perform renames concurrently
+    :return: None
+    """
+    journal = Journal.open(path)
+    index = 0
+    for chain, k, d in zip(recovery.chains, recovery.committed, recovery.done):
+        for i in range(k, d):  # Performed, but their commits were lost
+            journal.commit(index + i)
+        index += len(chain)
+    journal.sync()
+    execute(path, recovery.chains, journal, recovery.done, profiler, threads)
+
+
+def undo(path: str, recovery: Recovery, profiler: Profiler = NULL_PROFILER, threads: int = 1) -> None:
+    """
+    Reverts the renames of a journal which were performed, in reverse order.
+
+    The reverting renames replace the journal, such that an undo may itself be resumed or undone.
+
+    :param path: Path to the directory
+    :param recovery: Progress of the journaled renames (see 'recover')
+    :param profiler: Profiler which measures the renames
+    :param threads: Number of threads which perform renames concurrently
+    :return: None
+    """
+    chains = [[RenameOp(op.dst, op.src) for op in reversed(chain[:d])]
+              for chain, d in zip(recovery.chains, recovery.done) if d > 0]
+    execute(path, chains, Journal.create(path, chains), None, profiler, threads)
+
+
+def _is_cycle(chain: List[RenameOp]) -> bool:
+    """
+    :param chain: Chain of renames
+    :return: True if the chain is a cycle, which starts and ends with the same temporary filename
+    """
+    return len(chain) > 1 and chain[0].dst == chain[-1].src
+
+
+def _is_swap(chain: List[RenameOp]) -> bool:
+    """
+    :param chain: Chain of renames
+    :return: True if the chain is a 2-cycle, i.e. [a -> tmp, b -> a, tmp -> b], whose files may be exchanged
+    """
+    return len(chain) == 3 and _is_cycle(chain) and chain[1].dst == chain[0].src and chain[2].dst == chain[1].src
+
+
+def _inode(directory: DirectoryHandle, name: str) -> Optional[int]:
+    """
+    :param directory: Opened directory
+    :param name: Name of an entry
+    :return: Inode of the entry, or None if it does not exist
+    """
+    try:
+        return directory.lstat(name).st_ino
+    except FileNotFoundError:
+        return None
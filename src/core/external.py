@@ -0,0 +1,446 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Planning and renaming of directories with millions of entries under a memory cap (see '--memory').
+
+Rather than a table of every file, the scan is streamed to temporary spill files and every analysis
+which needs an order is an external merge sort: sorted runs of at most the memory cap are spilled,
+then lazily merged. File numbers are detected, flattened and padded from sorted runs of numbers,
+and conflicts are found by merging the sorted destinations with the sorted sources and unselected entries.
+
+Instead of decomposing the renames into chains, which needs every rename in memory, the renames are
+performed in three phases. Renames into vacant names are performed first, then the remaining files
+are moved to temporary names, then from their temporary names to their destinations. Only the files
+whose destination is another file's current name are renamed twice.
+"""
+
+import os
+import pickle
+from heapq import merge
+from itertools import chain, islice
+from os.path import join
+from re import compile
+from secrets import token_hex
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from core.journal import JOURNAL_NAME
+from core.profiler import NULL_PROFILER, Profiler
+from core.scheduler import RenameOp
+from core.scanner import ScanFilter, scan_directory
+from core.table import FileTable
+from core.template import Template
+from util.fsops import DirectoryHandle
+
+DEFAULT_MEMORY = 64 << 20  # Bytes of records which are held in memory at once
+_BLOCK = 1 << 8  # Number of records which are pickled at once, and read at once from each run being merged
+_BATCH = 1 << 12  # Number of renames which are performed at once
+_RESERVED_PREFIX = ".renamer-"  # Temporary filenames and journals
+_run_pattern = compile("[0-9]+")
+
+
+def _footprint(record) -> int:
+    """
+    :param record: Record of a spill file
+    :return: Approximate number of bytes the record occupies in memory
+    """
+    if isinstance(record, tuple):
+        return 56 + sum(map(_footprint, record))
+    if isinstance(record, str):
+        return 49 + len(record)
+    return 32
+
+
+class Spill:
+    def __init__(self, file: str):
+        """
+        Temporary file of records, which are written in blocks and read back in the order they were written.
+
+        :param file: Path to the spill file
+        """
+        self.__file = file
+        self.__stream = open(file, "wb")
+        self.__block: List[Any] = []
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def add(self, record) -> None:
+        self.__block.append(record)
+        self.__count += 1
+        if len(self.__block) >= _BLOCK:
+            pickle.dump(self.__block, self.__stream, pickle.HIGHEST_PROTOCOL)
+            self.__block = []
+
+    def extend(self, records: Iterable) -> None:
+        for record in records:
+            self.add(record)
+
+    def close(self) -> None:
+        """
+        Writes the remaining records, after which the spill may be read.
+
+        :return: None
+        """
+        if self.__stream is not None:
+            if len(self.__block) > 0:
+                pickle.dump(self.__block, self.__stream, pickle.HIGHEST_PROTOCOL)
+                self.__block = []
+            self.__stream.close()
+            self.__stream = None
+
+    def __iter__(self) -> Iterator:
+        self.close()
+        with open(self.__file, "rb") as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+
+class SpillSorter:
+    def __init__(self, directory: str, memory: int = DEFAULT_MEMORY):
+        """
+        External merge sort of records, which are spilled to sorted runs once they exceed the memory cap.
+
+        :param directory: Directory of the spilled runs
+        :param memory: Bytes of records which are held in memory before they are spilled
+        """
+        self.__directory = directory
+        self.__memory = memory
+        self.__buffer: List[Any] = []
+        self.__size = 0
+        self.__runs: List[Spill] = []
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def add(self, record) -> None:
+        self.__buffer.append(record)
+        self.__size += _footprint(record)
+        self.__count += 1
+        if self.__size >= self.__memory:
+            self.__spill()
+
+    def __spill(self) -> None:
+        self.__buffer.sort()
+        run = Spill(join(self.__directory, "{}.run".format(token_hex(8))))
+        run.extend(self.__buffer)
+        run.close()
+        self.__runs.append(run)
+        self.__buffer, self.__size = [], 0
+
+    def __iter__(self) -> Iterator:
+        """
+        :return: Generator of the records in sorted order, which merges the runs lazily
+        """
+        if len(self.__runs) <= 0:
+            self.__buffer.sort()
+            return iter(self.__buffer)
+        if len(self.__buffer) > 0:
+            self.__spill()
+        return merge(*self.__runs)
+
+
+def _duplicates(records: Iterable) -> Iterator:
+    """
+    :param records: Records in sorted order
+    :return: Generator of the records which are equal to their predecessor
+    """
+    previous = sentinel = object()
+    for record in records:
+        if previous is not sentinel and record == previous:
+            yield record
+        previous = record
+
+
+class ExternalPlan:
+    def __init__(self, path: str, options: Dict[str, Any], memory: int = DEFAULT_MEMORY,
+                 profiler: Profiler = NULL_PROFILER):
+        """
+        Renames of a directory which are planned with at most about the memory cap of records in memory.
+
+        Files are selected, numbered and renamed as 'build_chain' would, except that they cannot be shuffled.
+        The plan must be closed to remove its spill files.
+
+        :param path: Path to the directory
+        :param options: Options of the renames (see JOB_OPTIONS)
+        :param memory: Bytes of records which are held in memory at once
+        :param profiler: Profiler which measures the planning
+        """
+        if memory <= 0:
+            raise ValueError("Memory cap must be a positive number of bytes: {}".format(memory))
+        if options.get("random", False) is not False:
+            raise ValueError("Files cannot be shuffled when planned with a memory cap")
+        if options.get("number_by", "name") not in (None, "name"):
+            raise ValueError("Files must be numbered by their names when planned with a memory cap")
+        if not os.path.isdir(path):
+            raise Exception("Path is not a valid directory: {}".format(path))
+        self.__path = path
+        self.__handle = DirectoryHandle(path)  # Scanned and renamed relative to its file descriptor
+        self.__options = options
+        self.__memory = memory
+        self.__temp = TemporaryDirectory(prefix="renamer-")
+        self.__spills = 0
+        self.__renames = self.__new_spill()  # Original and renamed filename of each file, ordered by number
+        self.__direct = self.__new_spill()  # Renames into vacant names
+        self.__deferred = self.__new_spill()  # Renames into the names of other files being renamed
+        self.__reserved: List[str] = []  # Entries which share the prefix of temporary filenames
+        self.__prefix = None  # Prefix of the temporary filenames, chosen when first needed
+        self.__plan(profiler)
+
+    def __enter__(self) -> "ExternalPlan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__temp.cleanup()
+        self.__handle.close()
+
+    def __new_spill(self) -> Spill:
+        self.__spills += 1
+        return Spill(join(self.__temp.name, "{}.spill".format(self.__spills)))
+
+    def __sorter(self, share: int = 1) -> SpillSorter:
+        return SpillSorter(self.__temp.name, max(1, self.__memory // share))
+
+    def __len__(self) -> int:
+        return len(self.__renames)
+
+    @property
+    def changes(self) -> int:
+        """
+        :return: Number of files whose filename is changed by the renames
+        """
+        return len(self.__direct) + len(self.__deferred)
+
+    def renames(self) -> Iterator[Tuple[str, str]]:
+        """
+        :return: Generator of the original and renamed filename of each file, ordered by file number
+        """
+        return iter(self.__renames)
+
+    def operations(self) -> Iterator[RenameOp]:
+        """
+        :return: Generator of the renames in the order they are performed, including the renames to and from
+            temporary filenames which stand in for files being renamed into the names of other such files
+        """
+        for phase in self.__phases():
+            for src, dst in phase:
+                yield RenameOp(src, dst)
+
+    def __phases(self) -> Tuple[Iterable[Tuple[str, str]], ...]:
+        """
+        :return: Renames into vacant names, renames of the deferred files to temporary filenames,
+            and renames of the temporary filenames to their destinations
+        """
+        direct, deferred = self.__direct, self.__deferred
+        if self.__prefix is None:
+            self.__prefix = self.__temp_prefix()
+        prefix = self.__prefix
+        temps = ((src, "{}{}.tmp".format(prefix, i)) for i, (src, _) in enumerate(deferred))
+        restores = (("{}{}.tmp".format(prefix, i), dst) for i, (_, dst) in enumerate(deferred))
+        return direct, temps, restores
+
+    def __plan(self, profiler: Profiler) -> None:
+        options = self.__options
+        include, exclude = options.get("include"), options.get("exclude")
+        name_filter = ScanFilter(include, exclude) if include or exclude else None
+        names, unselected = self.__new_spill(), self.__sorter(4)
+        runs = None  # Fewest runs of integers of any selected filename
+        with profiler.stage("scan") as record:
+            for name, selected in scan_directory(self.__path, name_filter, self.__handle):
+                if name.startswith(_RESERVED_PREFIX):
+                    self.__reserved.append(name)
+                if selected and not name.startswith(JOURNAL_NAME) and FileTable.parse_extension(name) is not None:
+                    names.add(name)
+                    if options.get("run_index") is None:
+                        count = len(_run_pattern.findall(name))
+                        runs = count if runs is None else min(runs, count)
+                else:
+                    unselected.add(name)
+            record.files = len(names)
+        names.close()
+        if len(names) <= 0:
+            return
+
+        with profiler.stage("number", len(names)):
+            run_index = options.get("run_index")
+            if run_index is None:
+                run_index = self.__detect(names, runs)
+            numbered, largest = self.__sorter(4), None
+            shift = options.get("shift") or 0
+            for name in names:
+                found = _run_pattern.findall(name)
+                if len(found) <= run_index:
+                    raise Exception("A numerated pattern is not present in the directory")
+                num = int(found[run_index]) + shift
+                numbered.add((num, name))
+                largest = num if largest is None else max(largest, num)
+        with profiler.stage("plan", len(names)):
+            self.__render(numbered, largest, unselected)
+
+    def __detect(self, names: Spill, runs: int) -> int:
+        """
+        :param names: Selected filenames
+        :param runs: Fewest runs of integers of any selected filename
+        :return: Index of the only run of integers which is unique across the filenames
+        """
+        sorters = [self.__sorter(2 * max(1, runs)) for _ in range(runs)]
+        for name in names:
+            for sorter, run in zip(sorters, _run_pattern.findall(name)):
+                sorter.add(int(run))
+        unique = [i for i, sorter in enumerate(sorters) if next(_duplicates(sorter), None) is None]
+        if len(unique) > 1:
+            raise Exception("A numerated pattern could not be differentiated")
+        if len(unique) <= 0:
+            raise Exception("A numerated pattern is not present in the directory")
+        return unique[0]
+
+    def __render(self, numbered: SpillSorter, largest: int, unselected: SpillSorter) -> None:
+        """
+        Renders the filename of every file in order of file number, then sorts the renames by
+        destination, such that conflicts and renames into other files' names are found by merging.
+
+        :param numbered: Number and filename of every file
+        :param largest: Largest number of any file
+        :param unselected: Entries which are not renamed
+        """
+        options, count = self.__options, len(numbered)
+        fmt, ext = options.get("fmt"), options.get("ext")
+        pattern = compile(fmt[1]) if fmt and len(fmt) > 1 else None
+        template = Template(fmt[0], pattern.groups if pattern is not None else 0) if fmt else Template("$d")
+        consecutive, start = options.get("consecutive"), options.get("start")
+        zeroes = options.get("zeroes")
+
+        ordered = iter(numbered)
+        first = next(ordered)
+        if consecutive:
+            start = first[0] if start is None else start
+            largest = start + count - 1
+        width = 0 if zeroes is None else max(zeroes, len(str(abs(largest))))
+
+        targets, sources = self.__sorter(4), self.__sorter(4)
+        renames = self.__renames
+        for rank, (num, name) in enumerate(chain([first], ordered)):
+            if consecutive:
+                num = start + rank
+            fnum = str(num)
+            if width > 0:
+                fnum = (width - len(fnum) + (num < 0)) * "0" + fnum
+            stem, _, original = name.rpartition(".")
+            captures = ()
+            if pattern is not None:
+                matcher = pattern.fullmatch(name)
+                if matcher is None:
+                    raise Exception("--format optional capture regex does not match file: {}".format(name))
+                captures = matcher.groups()
+            dst = template.render(fnum, ext or original, stem if template.uses_name else "", captures)
+            renames.add((name, dst))
+            targets.add((dst, name))
+            if dst != name:
+                sources.add(name)
+        renames.close()
+        self.__classify(targets, sources, unselected)
+
+    def __classify(self, targets: SpillSorter, sources: SpillSorter, unselected: SpillSorter) -> None:
+        """
+        Merges the renames, sorted by destination, with the sorted sources and unselected entries.
+
+        :param targets: Destination and source of every rename
+        :param sources: Sources of the renames which change a filename
+        :param unselected: Entries which are not renamed
+        """
+        direct, deferred = self.__direct, self.__deferred
+        sources, unselected = iter(sources), iter(unselected)
+        source, entry = next(sources, None), next(unselected, None)
+        previous = None
+        for dst, src in targets:
+            if previous is not None and dst == previous[0]:
+                raise Exception("Files [{}] and [{}] would both be renamed to: {}".format(previous[1], src, dst))
+            previous = (dst, src)
+            while entry is not None and entry < dst:
+                entry = next(unselected, None)
+            if entry == dst:
+                raise Exception("Renaming [{}] would overwrite an entry which is not being renamed: {}"
+                                .format(src, dst))
+            if dst == src:
+                continue
+            while source is not None and source < dst:
+                source = next(sources, None)
+            (deferred if source == dst else direct).add((src, dst))
+        direct.close()
+        deferred.close()
+
+    def save_files(self, profiler: Profiler = NULL_PROFILER, threads: int = 1) -> None:
+        """
+        Performs the planned renames, in three phases which each perform independent renames.
+
+        :param profiler: Profiler which measures the renames
+        :param threads: Number of threads which perform the renames of a phase concurrently
+        :return: None
+        """
+        handle = self.__handle
+        with profiler.stage("rename", self.changes) as record:
+            for phase in self.__phases():
+                record.syscalls += _perform(handle, phase, threads)
+
+    def __temp_prefix(self) -> str:
+        """
+        :return: Prefix of temporary filenames which no entry of the directory starts with
+        """
+        while True:
+            prefix = "{}{}-".format(_RESERVED_PREFIX, token_hex(4))
+            if not any(name.startswith(prefix) for name in self.__reserved):
+                return prefix
+
+
+def _perform(directory: DirectoryHandle, renames: Iterable[Tuple[str, str]], threads: int = 1) -> int:
+    """
+    Performs independent renames, in blocks.
+
+    :param directory: Opened directory
+    :param renames: Source and destination of each rename, which may be performed in any order
+    :param threads: Number of threads which perform renames concurrently
+    :return: Number of renames performed
+    """
+    count, renames = 0, iter(renames)
+    pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+    try:
+        while True:
+            block = list(islice(renames, _BATCH))
+            if len(block) <= 0:
+                return count
+            if pool is None:
+                for src, dst in block:
+                    directory.rename(src, dst)
+            else:
+                for _ in pool.map(lambda op: directory.rename(*op), block):
+                    pass
+            count += len(block)
+    finally:
+        if pool is not None:
+            pool.shutdown()
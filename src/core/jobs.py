@@ -0,0 +1,196 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+from os import scandir
+from os.path import abspath, dirname, join
+
+from core.decorators import *
+from core.pipeline import compile_pipeline
+from core.profiler import NULL_PROFILER, Profiler
+
+# Options which may be specified for a job, mirroring the destinations of the CLI arguments
+JOB_OPTIONS = ("include", "exclude", "shift", "zeroes", "random", "fmt", "ext", "consecutive", "number_by")
+
+
+class JobResult(NamedTuple):
+    path: str  # Directory the job operated on
+    renames: List[Tuple[str, str]]  # Original and renamed filenames, ordered by file number
+    error: Optional[str]  # Reason the job failed, or None if it succeeded
+    saved: bool  # True if the renames were made on the file system
+    profile: Optional[List[Tuple[str, int, int, float]]] = None  # Measurements of the job's stages, if profiled
+
+
+def build_chain(directory: Directory, shift: int = None, zeroes: int = None, random: Any = False,
+                fmt: List[str] = None, ext: str = None, consecutive: bool = False, run_index: int = None,
+                start: int = None, number_by: str = "name", workers: Optional[int] = 1, **_) -> Directory:
+    """
+    Decorates a directory according to the specified options, in the same order the CLI applies them.
+
+    :param directory: Directory to be decorated
+    :param shift: Offset to shift file numbers by (None or zero for no shift)
+    :param zeroes: Number of leading zeroes (0 for automatic, None for no zeroes)
+    :param random: Seed to shuffle file numbers by (None for a random seed, False for no shuffle)
+    :param fmt: Output format, optionally followed by an input capture regex
+    :param ext: Extension to be set
+    :param consecutive: True if file numbers should be flattened
+    :param run_index: Index of the run of integers which numbers the files (None to detect it)
+    :param start: Number of the smallest file once flattened (None to keep the smallest number)
+    :param number_by: Source of the file numbers, one of NUMBER_SOURCES (the run index is ignored unless 'name')
+    :param workers: Number of processes which analyze the filenames of huge directories (None for one per CPU)
+    :return: Outermost decorator of the chain
+    """
+    if number_by in (None, "name"):
+        dec = NumeratedDecorator(directory, run_index, workers)
+    else:
+        dec = MetadataNumeratedDecorator(directory, directory.handle, number_by)
+    if shift:
+        dec = ShifterDecorator(dec, shift)
+    if fmt:
+        dec = FormatDecorator(dec, fmt)
+    if consecutive:
+        dec = FlattenDecorator(dec, start)
+    if random is not False:
+        dec = RandomizeDecorator(dec, random)
+    if zeroes is not None:
+        dec = ZeroesDecorator(dec, zeroes)
+    if ext:
+        dec = ExtensionDecorator(dec, ext)
+    return dec
+
+
+def find_decorator(directory: Directory, cls: type) -> Optional[Directory]:
+    """
+    :param directory: Outermost decorator of a chain
+    :param cls: Type of the decorator to be found
+    :return: Outermost decorator of the specified type within the chain, or None if there is none
+    """
+    while directory is not None and not isinstance(directory, cls):
+        directory = directory.get_decorated()
+    return directory
+
+
+def run_job(path: str, options: Dict[str, Any], confirm: bool = False, profile: bool = False,
+            journal: bool = False, threads: int = 1) -> JobResult:
+    """
+    Renames the files of a single directory.
+
+    Errors are captured in the result rather than raised, such that one failing
+    directory does not abort the other jobs of a run.
+
+    :param path: Path to the directory
+    :param options: Options of the job (see JOB_OPTIONS)
+    :param confirm: True if the renames should be made on the file system
+    :param profile: True if the stages of the job should be measured
+    :param journal: True if the renames should be recorded in a journal (see '--journal')
+    :param threads: Number of threads which perform renames concurrently
+    :return: Result of the job
+    """
+    profiler = Profiler() if profile else NULL_PROFILER
+    try:
+        with ConcreteDirectory(path, options.get("include"), options.get("exclude"), profiler) as directory:
+            compile_pipeline(build_chain(directory, **options)).run(profiler)
+            files = directory.get_files()
+            names, renamed = files.names, files.render_all()
+            renames = [(names[row], renamed[row]) for row in files.order()]
+            if confirm:
+                directory.save_files(profiler, journal, threads)
+        return JobResult(path, renames, None, confirm, profiler.to_tuples() if profile else None)
+    except Exception as e:
+        return JobResult(path, [], str(e), False, profiler.to_tuples() if profile else None)
+
+
+def load_manifest(file: str, defaults: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Loads the jobs of a batch manifest, which is a JSON list of jobs (or an object with a "jobs" list).
+
+    Each job is an object with a "path" and any of the JOB_OPTIONS, which take precedence over the defaults.
+    Relative paths are relative to the manifest's directory.
+
+    e.g. [ { "path": "Season 1", "shift": -1, "zeroes": 2 }, { "path": "Photos", "fmt": "IMG $d", "ext": "jpg" } ]
+
+    :param file: Path to the manifest
+    :param defaults: Options of every job, unless the job specifies otherwise
+    :return: Directory path and options of each job
+    """
+    with open(file, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = manifest.get("jobs")
+    if not isinstance(manifest, list):
+        raise ValueError("Manifest must be a list of jobs: {}".format(file))
+    base = dirname(abspath(file))
+    jobs = []
+    for i, job in enumerate(manifest):
+        if not isinstance(job, dict) or not isinstance(job.get("path"), str):
+            raise ValueError("Job #{} of the manifest does not specify a path".format(i + 1))
+        unknown = set(job) - set(JOB_OPTIONS) - {"path"}
+        if len(unknown) > 0:
+            raise ValueError("Job #{} of the manifest has unknown options: {}".format(i + 1, ", ".join(sorted(unknown))))
+        options = dict(defaults or {})
+        options.update((k, v) for k, v in job.items() if k != "path")
+        for k in ("fmt", "include", "exclude"):  # Single patterns need not be lists
+            if isinstance(options.get(k), str):
+                options[k] = [options[k]]
+        jobs.append((join(base, job["path"]), options))
+    return jobs
+
+
+def find_leaf_directories(root: str) -> Iterator[str]:
+    """
+    Discovers all directories beneath the root which do not contain any subdirectories.
+
+    Symbolic links to directories are not followed, which prevents cycles in the tree.
+
+    :param root: Path to the root directory
+    :return: Generator of leaf directory paths (the root itself if it has no subdirectories)
+    """
+    stack = [root]
+    while len(stack) > 0:
+        path = stack.pop()
+        with scandir(path) as entries:
+            children = [join(path, e.name) for e in entries if e.is_dir(follow_symlinks=False)]
+        if len(children) <= 0:
+            yield path
+        else:
+            stack.extend(reversed(sorted(children)))
+
+
+def run_jobs(jobs: List[Tuple[str, Dict[str, Any]]], confirm: bool = False, workers: int = None,
+             profile: bool = False, journal: bool = False, threads: int = 1) -> Iterator[JobResult]:
+    """
+    Runs many rename jobs, in parallel across a pool of worker processes.
+
+    :param jobs: Directory path and options of each job
+    :param confirm: True if the renames should be made on the file system
+    :param workers: Number of worker processes (None for one per CPU, 1 to run in this process)
+    :param profile: True if the stages of each job should be measured
+    :param journal: True if the renames of each job should be recorded in a journal (see '--journal')
+    :param threads: Number of threads which perform the renames of each job concurrently
+    :return: Generator of job results, in order of completion
+    """
+    if workers == 1 or len(jobs) <= 1:
+        for path, options in jobs:
+            yield run_job(path, options, confirm, profile, journal, threads)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, path, options, confirm, profile, journal, threads) for path, options in jobs]
+        for future in as_completed(futures):
+            yield future.result()
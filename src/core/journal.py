@@ -0,0 +1,239 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Write-ahead journal of the renames of a directory (see '--journal', '--resume' and '--undo').
+
+The journal is an append-only file of NUL-terminated fields, which cannot occur within filenames:
+
+    renamer-journal 1           Header
+    P <src> <dst>               Planned rename, numbered in order of appearance
+    E                           End of a chain of planned renames (see 'schedule_renames')
+    S                           End of the plan, after which renames may be performed
+    C<index>                    Planned rename which was performed
+    X<index>:<inode>            Swap of a 2-cycle (see 'exchange') which is about to be performed, where the
+                                cycle's first rename is at the index and its source had the inode beforehand
+    D                           Every planned rename was performed
+
+The plan is written and synced before the first rename. Commits are synced in batches, so a crash may
+lose the most recent commits; those renames are recovered from the directory's entries instead.
+Plan files (see '--plan-out') share the encoding of the planned renames.
+"""
+
+import os
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Set
+from os.path import join
+
+from core.scheduler import RenameOp
+
+JOURNAL_NAME = ".renamer-journal"  # Filename of the journal, within the directory it journals
+COMMIT_BATCH = 1 << 10  # Number of commits which are synced at once
+_HEADER = b"renamer-journal 1"
+
+
+class JournalState(NamedTuple):
+    chains: List[List[RenameOp]]  # Planned renames, as chains which must each be performed in order
+    committed: Set[int]  # Indexes of the planned renames which were committed
+    sealed: bool  # True if the plan was completely written, otherwise no rename was performed
+    done: bool  # True if every planned rename was performed
+    exchanges: Dict[int, int]  # Inode of the source of each swapped 2-cycle beforehand, by index of its first rename
+
+
+class Journal:
+    def __init__(self, path: str, file):
+        """
+        Open journal, to which commits are appended. See 'Journal.create' and 'Journal.open'.
+        Commits may be appended from multiple threads.
+
+        :param path: Path to the journaled directory
+        :param file: Journal file, opened for appending
+        """
+        self.__path = path
+        self.__file = file
+        self.__unsynced = 0  # Number of commits which were written since the last sync
+        self.__lock = Lock()
+
+    @staticmethod
+    def create(path: str, chains: List[List[RenameOp]]) -> "Journal":
+        """
+        Writes and syncs the plan of a directory, replacing any previous journal of the directory.
+
+        The plan is written to a temporary file which then atomically replaces the journal,
+        such that the journal of a previous run is never lost to a partially written plan.
+
+        :param path: Path to the journaled directory
+        :param chains: Chains of renames which are about to be performed
+        :return: Journal, to which the renames should be committed as they are performed
+        """
+        journal, temp = join(path, JOURNAL_NAME), join(path, JOURNAL_NAME + ".new")
+        with open(temp, "wb") as f:
+            f.write(_HEADER + b"\0")
+            write_chains(f, chains)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, journal)
+        _sync_directory(path)
+        return Journal(path, open(journal, "ab"))
+
+    @staticmethod
+    def open(path: str) -> "Journal":
+        """
+        :param path: Path to the journaled directory
+        :return: Existing journal of the directory, to which further commits are appended
+        """
+        return Journal(path, open(join(path, JOURNAL_NAME), "ab"))
+
+    @staticmethod
+    def read(path: str) -> Optional[JournalState]:
+        """
+        Parses the journal of a directory. A partially written record at the end of the journal is ignored.
+
+        :param path: Path to the journaled directory
+        :return: State of the journal, or None if the directory has no journal
+        """
+        try:
+            with open(join(path, JOURNAL_NAME), "rb") as f:
+                fields = f.read().split(b"\0")
+        except FileNotFoundError:
+            return None
+        if fields[0] != _HEADER:
+            raise Exception("File is not a rename journal: {}".format(join(path, JOURNAL_NAME)))
+        return parse_fields(fields, 1)
+
+    def commit(self, index: int, sync: bool = False) -> None:
+        """
+        Records that a planned rename was performed.
+
+        :param index: Index of the rename within the plan
+        :param sync: True if the commit must be synced before returning, rather than with its batch
+        :return: None
+        """
+        with self.__lock:
+            self.__file.write(b"C%d\0" % index)
+            self.__unsynced += 1
+            if sync or self.__unsynced >= COMMIT_BATCH:
+                self.__sync()
+
+    def exchange(self, index: int, inode: int) -> None:
+        """
+        Records and syncs that a 2-cycle is about to be swapped in a single call. A swap cannot be recovered
+        from the names of the directory's entries, as they are identical before and after it, so the
+        inode of the first source is recorded, which the first source no longer has once swapped.
+
+        :param index: Index of the first rename of the 2-cycle within the plan
+        :param inode: Inode of the source of the first rename
+        :return: None
+        """
+        with self.__lock:
+            self.__file.write(b"X%d:%d\0" % (index, inode))
+            self.__sync()
+
+    def sync(self) -> None:
+        """
+        Syncs all commits to the storage medium.
+
+        :return: None
+        """
+        with self.__lock:
+            self.__sync()
+
+    def __sync(self) -> None:
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__unsynced = 0
+
+    def close(self, done: bool = False) -> None:
+        """
+        Syncs all commits and closes the journal.
+
+        :param done: True if every planned rename was performed
+        :return: None
+        """
+        with self.__lock:
+            if done:
+                self.__file.write(b"D\0")
+            self.__sync()
+            self.__file.close()
+
+
+def write_chains(f, chains: List[List[RenameOp]]) -> None:
+    """
+    Writes the planned renames, followed by the end of the plan.
+
+    :param f: Binary file
+    :param chains: Chains of renames
+    :return: None
+    """
+    for chain in chains:
+        f.write(b"".join(b"P\0" + os.fsencode(op.src) + b"\0" + os.fsencode(op.dst) + b"\0" for op in chain))
+        f.write(b"E\0")
+    f.write(b"S\0")
+
+
+def parse_fields(fields: List[bytes], i: int = 0) -> JournalState:
+    """
+    Parses the records of a journal or plan file, after its header.
+
+    :param fields: NUL-separated fields of the file, of which the last is the remainder after the last NUL
+    :param i: Index of the first record
+    :return: State of the records
+    """
+    fields.pop()  # Remainder after the last NUL, which is either empty or partially written
+    chains, chain, committed, sealed, done, exchanges = [], [], set(), False, False, {}
+    while i < len(fields):
+        field = fields[i]
+        if field == b"P":
+            if i + 2 >= len(fields):
+                break
+            chain.append(RenameOp(os.fsdecode(fields[i + 1]), os.fsdecode(fields[i + 2])))
+            i += 2
+        elif field == b"E":
+            chains.append(chain)
+            chain = []
+        elif field == b"S":
+            sealed = True
+        elif field.startswith(b"C"):
+            committed.add(int(field[1:]))
+        elif field.startswith(b"X"):
+            index, inode = field[1:].split(b":")
+            exchanges[int(index)] = int(inode)
+        elif field == b"D":
+            done = True
+        i += 1
+    return JournalState(chains if sealed else [], committed, sealed, done, exchanges)
+
+
+def _sync_directory(path: str) -> None:
+    """
+    Syncs the entries of a directory, such that a newly created file survives a crash.
+    Not every platform allows directories to be opened, in which case this does nothing.
+
+    :param path: Path to the directory
+    :return: None
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
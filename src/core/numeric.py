@@ -0,0 +1,170 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Numerical transforms of a column of file numbers (see 'FileTable.nums').
+
+When NumPy is importable, columns of at least 'VECTORIZE_THRESHOLD' numbers are transformed
+through a zero-copy int64 view of the column's buffer. Otherwise, or when NumPy is absent,
+plain Python loops are used. Both backends produce identical results.
+"""
+
+from typing import Optional
+from array import array
+from random import Random
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+VECTORIZE_THRESHOLD = 1 << 10  # Smaller columns are not worth the overhead of a NumPy view
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+_enabled = numpy is not None
+
+
+def set_vectorized(enabled: bool) -> bool:
+    """
+    Enables or disables the NumPy backend.
+
+    :param enabled: True if NumPy should be used, if it is available
+    :return: True if the NumPy backend is now in use
+    """
+    global _enabled
+    _enabled = enabled and numpy is not None
+    return _enabled
+
+
+def is_vectorized() -> bool:
+    """
+    :return: True if the NumPy backend is in use
+    """
+    return _enabled
+
+
+def _view(nums: array, start: int = 0, stop: Optional[int] = None):
+    """
+    :param nums: Column of file numbers
+    :param start: First index of the range
+    :param stop: Index after the last index of the range (None for the end of the column)
+    :return: Writable int64 NumPy view of the range, or None if the Python backend should be used
+    """
+    stop = len(nums) if stop is None else stop
+    if not _enabled or stop - start < VECTORIZE_THRESHOLD:
+        return None
+    return numpy.frombuffer(nums, dtype=numpy.int64)[start:stop]
+
+
+def shift(nums: array, offset: int, start: int = 0, stop: Optional[int] = None) -> None:
+    """
+    Shifts a range of file numbers by an offset, in place.
+
+    :param nums: Column of file numbers
+    :param offset: Offset to shift by
+    :param start: First index of the range
+    :param stop: Index after the last index of the range (None for the end of the column)
+    :return: None
+    """
+    stop = len(nums) if stop is None else stop
+    view = _view(nums, start, stop)
+    if view is None:
+        nums[start:stop] = array("q", [e + offset for e in nums[start:stop]])
+        return
+    # NumPy silently wraps around on overflow, whereas the array raises
+    if (offset > 0 and int(view.max()) > _INT64_MAX - offset) or \
+            (offset < 0 and int(view.min()) < _INT64_MIN - offset):
+        raise OverflowError("signed integer is greater than maximum")
+    view += offset
+
+
+def argsort(nums: array) -> array:
+    """
+    :param nums: Column of file numbers
+    :return: Indexes of the column in order of their number, where equal numbers are in order of their index
+    """
+    view = _view(nums)
+    if view is None:
+        return array("q", sorted(range(len(nums)), key=nums.__getitem__))
+    return array("q", numpy.argsort(view, kind="stable").astype(numpy.int64).tobytes())
+
+
+def flatten(nums: array, start: Optional[int] = None, order: Optional[array] = None) -> None:
+    """
+    Flattens file numbers such that they are consecutive, in place.
+
+    Every number is replaced by the starting number plus its rank, where the starting number
+    defaults to the smallest number. Equal numbers are ranked in order of their index.
+    The order of the numbers is unchanged, so their sort order remains valid.
+
+    :param nums: Column of file numbers
+    :param start: Number of the smallest file (None to keep the smallest number)
+    :param order: Sort order of the column (see 'argsort'), which is computed if it is None
+    :return: None
+    """
+    if len(nums) <= 1:
+        if len(nums) == 1 and start is not None:
+            nums[0] = start
+        return  # A column of zero or one numbers is already flattened
+    view = _view(nums)
+    if view is None:
+        sort = argsort(nums) if order is None else order  # Indexes, in order of their number
+        small = nums[sort[0]] if start is None else start
+        for i in range(0 if start is not None else 1, len(sort)):  # Smallest element is kept, unless a start is given
+            nums[sort[i]] = small + i
+        return
+    sort = numpy.argsort(view, kind="stable") if order is None else numpy.frombuffer(order, dtype=numpy.int64)
+    small = int(view[sort[0]]) if start is None else start
+    # NumPy silently wraps around on overflow, whereas the array raises
+    if small > _INT64_MAX - (len(view) - 1):
+        raise OverflowError("signed integer is greater than maximum")
+    if small < _INT64_MIN:
+        raise OverflowError("signed integer is less than minimum")
+    view[sort] = small + numpy.arange(len(view), dtype=numpy.int64)
+
+
+def largest(nums: array) -> int:
+    """
+    :param nums: Column of file numbers, which must not be empty
+    :return: Largest file number
+    """
+    view = _view(nums)
+    return max(nums) if view is None else int(view.max())
+
+
+def shuffle(nums: array, seed: Optional[int] = None) -> None:
+    """
+    Randomly shuffles file numbers, in place.
+
+    The permutation is always drawn from Python's 'Random' in the same sequence, such that a seed
+    produces the same permutation with or without NumPy. With NumPy the swaps are performed on a
+    list of indexes and the numbers are gathered in a single vectorized step.
+
+    :param nums: Column of file numbers
+    :param seed: Seed to be used (None for system's clock)
+    :return: None
+    """
+    gen, n = Random(seed), len(nums)
+    view = _view(nums)
+    perm = nums if view is None else list(range(n))
+    for i in range(n - 1):
+        j = gen.randrange(i, n)
+        if i != j:
+            perm[i], perm[j] = perm[j], perm[i]
+    if view is not None:
+        view[:] = view[numpy.array(perm, dtype=numpy.intp)]
@@ -0,0 +1,134 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Streaming output of renames (see '--output').
+
+    text    Renaming [old]\\n\\t--> [new]       Human readable, preceded by 'Directory [path]' in recursive runs
+    jsonl   {"old": ..., "new": ...}            One JSON object per line, with a "path" in recursive runs
+    tsv     old<TAB>new                         Backslash, tab, CR and LF are escaped, preceded by the path in recursive runs
+    null    old<NUL>new<NUL>                    Unescaped, e.g. for 'xargs -0', joined with the path in recursive runs
+"""
+
+import io
+import json
+from os import fsencode
+from os.path import join
+from typing import Iterable, List, Optional, Tuple
+
+OUTPUT_FORMATS = ("text", "jsonl", "tsv", "null")
+_tsv_escapes = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class RenameWriter:
+    __BUFFERED = 1 << 12  # Number of renames which are encoded and written at once
+
+    def __init__(self, stream, fmt: str = "text"):
+        """
+        Buffered writer of renames, in one of the 'OUTPUT_FORMATS'.
+
+        Filenames are encoded as the file system encodes them, such that filenames which are
+        not valid in the stream's encoding are still written.
+
+        :param stream: Binary stream, or text stream (whose binary buffer is written to, if it has one)
+        :param fmt: Format of the output
+        """
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError("Output format must be one of {}: {}".format(OUTPUT_FORMATS, fmt))
+        self.__stream = stream
+        self.__text = isinstance(stream, io.TextIOBase) and not hasattr(stream, "buffer")
+        self.__fmt = fmt
+        self.__encode = {"text": self.__text_line, "jsonl": self.__jsonl_line,
+                         "tsv": self.__tsv_line, "null": self.__null_line}[fmt]
+        self.__path: Optional[str] = None
+        self.__pending: List[str] = []
+
+    @property
+    def human_readable(self) -> bool:
+        """
+        :return: True if the output is meant to be read by a human rather than parsed
+        """
+        return self.__fmt == "text"
+
+    def directory(self, path: str) -> None:
+        """
+        Begins the renames of another directory, in recursive runs.
+
+        :param path: Path to the directory
+        :return: None
+        """
+        self.__path = path
+        if self.__fmt == "text":
+            self.__pending.append("Directory [{}]\n".format(path))
+
+    def write(self, old: str, new: str) -> None:
+        """
+        :param old: Original filename
+        :param new: Renamed filename
+        :return: None
+        """
+        self.__pending.append(self.__encode(old, new))
+        if len(self.__pending) >= RenameWriter.__BUFFERED:
+            self.flush()
+
+    def write_all(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """
+        :param pairs: Original and renamed filename of each rename
+        :return: None
+        """
+        encode, pending = self.__encode, self.__pending
+        for old, new in pairs:
+            pending.append(encode(old, new))
+            if len(pending) >= RenameWriter.__BUFFERED:
+                self.flush()
+                pending = self.__pending
+
+    def flush(self) -> None:
+        """
+        Writes all buffered renames to the stream.
+
+        :return: None
+        """
+        if len(self.__pending) <= 0:
+            return
+        chunk = "".join(self.__pending)
+        self.__pending = []
+        stream = self.__stream
+        if self.__text:
+            stream.write(chunk)
+        elif isinstance(stream, io.TextIOBase):
+            stream.flush()  # Preserve the order of anything written to the text stream
+            stream.buffer.write(fsencode(chunk))
+            stream.buffer.flush()
+        else:
+            stream.write(fsencode(chunk))
+
+    def __text_line(self, old: str, new: str) -> str:
+        return "Renaming [{}]\n\t--> [{}]\n".format(old, new)
+
+    def __jsonl_line(self, old: str, new: str) -> str:
+        path = self.__path
+        return json.dumps({"old": old, "new": new} if path is None else {"path": path, "old": old, "new": new}) + "\n"
+
+    def __tsv_line(self, old: str, new: str) -> str:
+        line = old.translate(_tsv_escapes) + "\t" + new.translate(_tsv_escapes) + "\n"
+        return line if self.__path is None else self.__path.translate(_tsv_escapes) + "\t" + line
+
+    def __null_line(self, old: str, new: str) -> str:
+        path = self.__path
+        return old + "\0" + new + "\0" if path is None else join(path, old) + "\0" + join(path, new) + "\0"
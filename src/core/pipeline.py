@@ -0,0 +1,117 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, List, NamedTuple
+
+from core.profiler import NULL_PROFILER, Profiler
+
+CHUNK_SIZE = 1 << 14  # Number of rows each fused run of per-file stages operates on at once
+
+
+class Stage(NamedTuple):
+    barrier: bool  # True if the stage requires a view of all files, False if it operates on one file at a time
+    operation: Callable[..., None]  # Barrier: f(files: FileTable), otherwise f(files: FileTable, start, stop)
+    name: str = ""  # Name of the stage when profiled, defaults to the name of the decorator
+
+
+def run_stages(stages: List[Stage], files: Any) -> None:
+    """
+    Performs stages one after another, without fusing them.
+
+    :param stages: Stages to be performed, in order
+    :param files: Table of the files' metadata
+    :return: None
+    """
+    for stage in stages:
+        if stage.barrier:
+            stage.operation(files)
+        else:
+            stage.operation(files, 0, len(files))
+
+
+class Pipeline:
+    def __init__(self, files: Any, segments: List[List[Stage]]):
+        """
+        Compiled form of a decorator chain, see 'compile_pipeline'.
+
+        :param files: Table of the files' metadata
+        :param segments: Single barrier stages, or runs of per-file stages which are fused into one pass
+        """
+        self.__files = files
+        self.__segments = segments
+
+    def __len__(self) -> int:
+        """
+        :return: Number of passes made over the files when the pipeline is run
+        """
+        return len(self.__segments)
+
+    def run(self, profiler: Profiler = NULL_PROFILER) -> None:
+        """
+        Performs every stage of the pipeline.
+
+        Fused stages are measured together, as their passes over the files are interleaved.
+
+        :param profiler: Profiler which measures each pass over the files
+        :return: None
+        """
+        files = self.__files
+        n = len(files)
+        for segment in self.__segments:
+            with profiler.stage("+".join(stage.name for stage in segment), n):
+                if segment[0].barrier:
+                    segment[0].operation(files)
+                elif len(segment) == 1:
+                    segment[0].operation(files, 0, n)
+                else:  # Every stage operates on one chunk of rows while it is still hot in the cache
+                    operations = [stage.operation for stage in segment]
+                    for start in range(0, n, CHUNK_SIZE):
+                        stop = min(start + CHUNK_SIZE, n)
+                        for operation in operations:
+                            operation(files, start, stop)
+
+
+def compile_pipeline(directory) -> Pipeline:
+    """
+    Compiles a decorator chain into a pipeline which makes as few passes over the files as possible.
+
+    The chain is walked from the outermost decorator to the concrete directory and its stages are
+    collected in the order the decorators would perform them. Consecutive per-file stages (e.g. shift,
+    format, extension) are fused into a single pass over chunks of rows, whereas barrier stages which
+    require a view of all files (e.g. numbering, flattening, leading zeroes' maximum) are performed on their own.
+
+    e.g. Ext(Fmt(Flatten(Shift(Numerated(dir))))) -> [ Numerated ], [ Shift ], [ Flatten ], [ Fmt + Ext ]
+
+    :param directory: Outermost decorator of the chain
+    :return: Pipeline equivalent to calling 'operate' on the decorator
+    """
+    chain = []
+    d = directory
+    while d is not None:
+        chain.append(d)
+        d = d.get_decorated()
+    segments = []
+    for d in reversed(chain):  # Innermost (concrete directory) first
+        for stage in d.stages():
+            if not stage.name:
+                stage = stage._replace(name=type(d).__name__)
+            if stage.barrier or len(segments) <= 0 or segments[-1][0].barrier:
+                segments.append([stage])
+            else:
+                segments[-1].append(stage)
+    return Pipeline(directory.get_files(), segments)
@@ -0,0 +1,99 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Plan files, which separate planning renames from performing them (see '--plan-out' and '--apply-plan').
+
+A plan file holds the fully resolved chains of renames of a directory, including the temporary names
+which break cycles, in the encoding of the journal (see 'core.journal'):
+
+    renamer-plan 1              Header
+    <path>                      Absolute path to the directory
+    <mtime>                     Modification time (ns) of the directory before it was scanned
+    P <src> <dst> ... E ... S   Planned renames, as in the journal
+
+A plan is applied only if the directory's modification time is unchanged, which a single stat
+verifies: adding, removing or renaming an entry of the directory updates its modification time.
+As with cached scans, the modification time must not be racy (see 'Signature.racy'), which
+'ScanCache.settled_signature' ensures by waiting out the tick of a recent modification.
+"""
+
+import os
+from os.path import abspath, dirname, realpath
+from typing import List, NamedTuple
+
+from core.cache import ScanCache, Signature
+from core.journal import parse_fields, write_chains
+from core.scheduler import RenameOp
+
+_HEADER = b"renamer-plan 1"
+
+
+class SavedPlan(NamedTuple):
+    path: str  # Absolute path to the directory
+    mtime: int  # Modification time (ns) of the directory when it was planned
+    chains: List[List[RenameOp]]  # Chains of renames, each of which must be performed in order
+
+
+def write_plan(file: str, path: str, signature: Signature, chains: List[List[RenameOp]]) -> None:
+    """
+    Writes a plan file, which atomically replaces any previous file.
+
+    :param file: Path to the plan file, which must not be within the directory
+    :param path: Path to the directory
+    :param signature: Signature of the directory before it was scanned, which must not be racy
+        (see 'ScanCache.settled_signature')
+    :param chains: Chains of renames
+    :return: None
+    """
+    if signature.racy:
+        raise ValueError("Directory was modified within a timestamp tick of being planned: {}".format(path))
+    if realpath(dirname(abspath(file))) == realpath(path):
+        raise ValueError("Plan file must not be written to the directory it plans: {}".format(file))
+    temp = "{}.{}.tmp".format(file, os.getpid())
+    with open(temp, "wb") as f:
+        f.write(_HEADER + b"\0" + os.fsencode(abspath(path)) + b"\0" + b"%d\0" % signature.mtime)
+        write_chains(f, chains)
+    os.replace(temp, file)
+
+
+def read_plan(file: str) -> SavedPlan:
+    """
+    :param file: Path to the plan file
+    :return: Plan of the file
+    """
+    with open(file, "rb") as f:
+        fields = f.read().split(b"\0")
+    if len(fields) < 4 or fields[0] != _HEADER:
+        raise ValueError("File is not a rename plan: {}".format(file))
+    state = parse_fields(fields, 3)
+    if not state.sealed:
+        raise ValueError("Rename plan is incomplete: {}".format(file))
+    return SavedPlan(os.fsdecode(fields[1]), int(fields[2]), state.chains)
+
+
+def check_plan(plan: SavedPlan) -> None:
+    """
+    Verifies that the directory of a plan is unchanged since it was planned.
+
+    :param plan: Plan of the directory
+    :return: None
+    """
+    if ScanCache.signature(plan.path).mtime != plan.mtime:
+        raise Exception("Directory changed since the renames were planned, they must be planned again: {}"
+                        .format(plan.path))
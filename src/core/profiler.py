@@ -0,0 +1,165 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Timing instrumentation of the stages of a rename (see '--profile').
+
+Every stage records its wall time, the number of files it operated on and the number of file system
+calls renamer made during it (directory listings and renames, not the kernel calls underneath them).
+Stages which share a name are aggregated, e.g. the same stage across the directories of a recursive run.
+"""
+
+import json
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class StageRecord:
+    __slots__ = ("name", "files", "syscalls", "seconds")
+
+    def __init__(self, name: str, files: int = 0, syscalls: int = 0, seconds: float = 0.0):
+        """
+        Measurements of a single stage.
+
+        :param name: Name of the stage
+        :param files: Number of files the stage operated on
+        :param syscalls: Number of file system calls made during the stage
+        :param seconds: Wall time of the stage
+        """
+        self.name = name
+        self.files = files
+        self.syscalls = syscalls
+        self.seconds = seconds
+
+    def to_tuple(self) -> Tuple[str, int, int, float]:
+        return self.name, self.files, self.syscalls, self.seconds
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Records the measurements of stages, in the order they were first performed.
+        """
+        self.__records: Dict[str, StageRecord] = {}
+
+    @contextmanager
+    def stage(self, name: str, files: int = 0) -> Iterator[StageRecord]:
+        """
+        Measures the code run within the context as a stage.
+
+        The system calls made during the stage may be counted by incrementing 'syscalls' of the yielded record.
+
+        :param name: Name of the stage
+        :param files: Number of files the stage operates on
+        :return: Record of the stage, whose measurements are added to the profile once the context exits
+        """
+        record = StageRecord(name, files)
+        start = perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = perf_counter() - start
+            self.add(*record.to_tuple())
+
+    def add(self, name: str, files: int = 0, syscalls: int = 0, seconds: float = 0.0) -> None:
+        """
+        Adds measurements to the stage of the specified name.
+
+        :param name: Name of the stage
+        :param files: Number of files the stage operated on
+        :param syscalls: Number of file system calls made during the stage
+        :param seconds: Wall time of the stage
+        :return: None
+        """
+        record = self.__records.get(name)
+        if record is None:
+            self.__records[name] = StageRecord(name, files, syscalls, seconds)
+        else:
+            record.files += files
+            record.syscalls += syscalls
+            record.seconds += seconds
+
+    def merge(self, records: Iterable[Tuple[str, int, int, float]]) -> None:
+        """
+        Adds the measurements of another profile, e.g. one recorded by a worker process.
+
+        :param records: Measurements as (name, files, syscalls, seconds) tuples
+        :return: None
+        """
+        for record in records:
+            self.add(*record)
+
+    @property
+    def records(self) -> List[StageRecord]:
+        return list(self.__records.values())
+
+    def to_tuples(self) -> List[Tuple[str, int, int, float]]:
+        """
+        :return: Measurements as (name, files, syscalls, seconds) tuples, which can be pickled
+        """
+        return [record.to_tuple() for record in self.__records.values()]
+
+    def to_table(self) -> str:
+        """
+        :return: Measurements formatted as a human readable table
+        """
+        records = self.records
+        width = max([len("Stage")] + [len(r.name) for r in records])
+        row = "{:<" + str(width) + "}  {:>10}  {:>10}  {:>10}"
+        lines = [row.format("Stage", "Files", "Syscalls", "Seconds")]
+        for r in records:
+            lines.append(row.format(r.name, r.files, r.syscalls, "{:.4f}".format(r.seconds)))
+        lines.append(row.format("Total", "", sum(r.syscalls for r in records),
+                                "{:.4f}".format(sum(r.seconds for r in records))))
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        """
+        :return: Measurements formatted as a JSON document
+        """
+        return json.dumps({"stages": [{"name": r.name, "files": r.files, "syscalls": r.syscalls,
+                                       "seconds": round(r.seconds, 6)} for r in self.records],
+                           "seconds": round(sum(r.seconds for r in self.records), 6)}, indent=2)
+
+
+class _NullStage:
+    __slots__ = ()
+    __record = StageRecord("")  # Shared, its measurements are discarded
+
+    def __enter__(self) -> StageRecord:
+        return _NullStage.__record
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+class NullProfiler(Profiler):
+    __stage = _NullStage()
+
+    def stage(self, name: str, files: int = 0) -> _NullStage:
+        """
+        Discards the measurements of the stage, without measuring its wall time.
+        """
+        return NullProfiler.__stage
+
+    def add(self, name: str, files: int = 0, syscalls: int = 0, seconds: float = 0.0) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()  # Profiler used when profiling is disabled
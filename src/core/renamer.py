@@ -16,17 +16,45 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from argparse import ArgumentParser
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import List, Optional, Tuple
 
 from core.version import __version__
 from core.decorators import *
+from core.pipeline import compile_pipeline
+from core.jobs import JOB_OPTIONS, build_chain, find_decorator, find_leaf_directories, load_manifest, run_jobs
+from core.profiler import NULL_PROFILER, Profiler
+from core.output import OUTPUT_FORMATS, RenameWriter
+from core.watch import WatchSession, watch
+from core.cache import CachedScan, ScanCache
+from core.external import ExternalPlan
+from core.planfile import check_plan, read_plan, write_plan
+from core import executor
 
 
-def main(*args, **kwargs):
-    args = ArgumentParser(description="CLI tool written in Python 3 used to systemically rename file "
-                                      "in a directory while adhering to a variety of criteria")
+class _Parser(ArgumentParser):
+    def __init__(self, out, err, **kwargs):
+        super().__init__(**kwargs)
+        self.__out = out
+        self.__err = err
+
+    def _print_message(self, message, file=None):
+        if message:
+            (self.__out if file is sys.stdout else self.__err).write(message)
+
+
+def build_parser(out=None, err=None) -> ArgumentParser:
+    """
+    :param out: Stream of the help and version text (None for stdout)
+    :param err: Stream of the usage errors (None for stderr)
+    :return: Parser of the command line arguments
+    """
+    args = _Parser(sys.stdout if out is None else out, sys.stderr if err is None else err,
+                   description="CLI tool written in Python 3 used to systemically rename file "
+                               "in a directory while adhering to a variety of criteria")
     # Required arguments
-    args.add_argument("path", type=str, help="Absolute or relative path to the directory")
+    args.add_argument("path", type=str, nargs="?", help="Absolute or relative path to the directory")
     # Optional arguments
     args.add_argument("-s", "--shift", dest="shift", type=int,
                       help="Shifts all numerical values by the specified offset")
@@ -40,35 +68,299 @@ def main(*args, **kwargs):
                       help="Changes the extension of all files to the specified extension")
     args.add_argument("-c", "--consecutive", dest="consecutive", action="store_true",
                       help="Flattens numerical values such that they are all consecutive")
+    args.add_argument("--number-by", dest="number_by", type=str, default="name", choices=NUMBER_SOURCES,
+                      help="Numbers the files by the number in their names (default), or in order of their "
+                           "modification time or of the capture time in their EXIF or video header")
+    args.add_argument("-i", "--include", dest="include", type=str, action="append",
+                      help="Only renames files matching the glob (or 're:' prefixed regex) pattern")
+    args.add_argument("-x", "--exclude", dest="exclude", type=str, action="append",
+                      help="Skips files matching the glob (or 're:' prefixed regex) pattern")
     args.add_argument("-m", "--mute", dest="mute", action="store_false",
                       help="Squelches the console output of filenames and their renamed filename")
     args.add_argument("-y", "--yes", dest="confirm", action="store_true",
                       help="Confirms the operation and makes changes to your file system according to the parameters")
+    args.add_argument("-r", "--recursive", dest="recursive", action="store_true",
+                      help="Renames the files of every leaf directory beneath the path, in parallel")
+    args.add_argument("-w", "--workers", dest="workers", type=int,
+                      help="Number of worker processes used by --recursive and --batch, or which analyze the "
+                           "filenames of a huge directory (defaults to one per CPU)")
+    args.add_argument("-b", "--batch", dest="batch", type=str,
+                      help="Runs the jobs of a JSON manifest, each a path with its own options, in one process")
+    args.add_argument("--watch", dest="watch", type=float, const=1.0, nargs="?",
+                      help="Keeps renaming files as they arrive, in batches after the specified seconds of quiet (default: 1)")
+    args.add_argument("-t", "--threads", dest="threads", type=int, default=1,
+                      help="Number of threads which perform renames concurrently, e.g. on network storage (default: 1)")
+    args.add_argument("--cache", dest="cache", action="store_true",
+                      help="Reuses the scan and numbering of the directory from a previous run, if it is unchanged")
+    args.add_argument("--memory", dest="memory", type=int,
+                      help="Plans the renames within the specified MiB of memory by spilling to temporary files, "
+                           "for directories with millions of files")
+    args.add_argument("--plan-out", dest="plan_out", type=str,
+                      help="Writes the planned renames to a file, to be performed later by --apply-plan")
+    args.add_argument("--apply-plan", dest="apply_plan", type=str,
+                      help="Performs the renames of a plan file (see --plan-out) if its directory is unchanged")
+    args.add_argument("--journal", dest="journal", action="store_true",
+                      help="Records the renames in a journal within the directory, such that they can be resumed or undone")
+    recovery = args.add_mutually_exclusive_group()
+    recovery.add_argument("--resume", dest="resume", action="store_true",
+                          help="Resumes the journaled renames of the directory which were interrupted")
+    recovery.add_argument("--undo", dest="undo", action="store_true",
+                          help="Reverts the journaled renames of the directory")
+    args.add_argument("-o", "--output", dest="output", type=str, default="text", choices=OUTPUT_FORMATS,
+                      help="Format of the console output: text (default), jsonl, tsv or null (NUL-separated)")
+    args.add_argument("--sort", dest="sort", action="store_true",
+                      help="Orders the jsonl, tsv or null output by file number (text output is always ordered)")
+    args.add_argument("--profile", dest="profile", type=str, const="table", nargs="?", choices=("table", "json"),
+                      help="Prints the time spent in each stage to stderr, as a table (default) or JSON")
+    args.add_argument("--serve", dest="serve", type=str, const="", nargs="?",
+                      help="Serves requests of 'renamer-client' on the specified Unix socket (default: $RENAMER_SOCKET)")
     args.add_argument("-v", "--version", action="version", version=f"%(prog)s {__version__}")
-    args = args.parse_args()
+    return args
+
+
+def main(argv: Optional[List[str]] = None, out=None, err=None) -> None:
+    """
+    :param argv: Command line arguments (None for those of the process)
+    :param out: Stream of the renames and summaries (None for stdout)
+    :param err: Stream of the errors and profile (None for stderr)
+    :return: None
+    """
+    out, err = sys.stdout if out is None else out, sys.stderr if err is None else err
+    parser = build_parser(out, err)
+    args = parser.parse_args(argv)
+    if args.serve is not None:
+        from core.daemon import serve
+        return serve(args.serve or None)
+    run(parser, args, out, err)
+
+
+def run(parser: ArgumentParser, args: Namespace, out, err) -> None:
+    """
+    Performs the operation requested by the parsed command line arguments.
+
+    :param parser: Parser of the arguments, which reports usage errors
+    :param args: Parsed arguments
+    :param out: Stream of the renames and summaries
+    :param err: Stream of the errors and profile
+    :return: None
+    """
+    if sum(arg is not None for arg in (args.path, args.batch, args.apply_plan)) != 1:
+        parser.error("either a path, --batch or --apply-plan must be specified")
+    if args.batch is not None and (args.resume or args.undo or args.watch is not None or args.memory is not None or
+                                   args.plan_out is not None or args.recursive):
+        parser.error("--batch cannot be combined with --resume, --undo, --watch, --memory, --plan-out or --recursive")
+    if args.plan_out is not None and (args.confirm or args.recursive or args.watch is not None or
+                                      args.memory is not None or args.resume or args.undo):
+        parser.error("--plan-out cannot be combined with --yes, --recursive, --watch, --memory, --resume or --undo")
+    if args.memory is not None and args.memory <= 0:
+        parser.error("--memory must be a positive number of MiB")
 
     # Process arguments
-    directory = ConcreteDirectory(args.path)
-    dec = NumeratedDecorator(directory)
-    if args.shift:
-        dec = ShifterDecorator(dec, args.shift)
-    if args.fmt:
-        dec = FormatDecorator(dec, args.fmt)
-    if args.consecutive:
-        dec = FlattenDecorator(dec)
-    if args.random is not False:
-        dec = RandomizeDecorator(dec, args.random)
-    if args.zeroes is not None:
-        dec = ZeroesDecorator(dec, args.zeroes)
-    if args.ext:
-        dec = ExtensionDecorator(dec, args.ext)
-    dec.operate()  # Perform operations according to decorators
-
-    if args.mute:
-        for old, new in sorted(directory.get_files().items(), key=lambda x: x[1].num):
-            print("Renaming [{}]\n\t--> [{}]".format(old, str(new)))
-    if args.confirm:
-        directory.save_files()
+    options = {k: getattr(args, k) for k in JOB_OPTIONS}
+    profiler = NULL_PROFILER if args.profile is None else Profiler()
+    writer = RenameWriter(out, args.output) if args.mute else None
+    try:
+        if args.apply_plan is not None:
+            return apply(args.apply_plan, writer, args.confirm, profiler, args.journal, args.threads)
+        if args.resume or args.undo:
+            return recover(args.path, args.undo, writer, args.confirm, profiler, args.threads)
+        if args.watch is not None:
+            if args.random is not False or args.recursive or args.number_by != "name" or args.memory is not None or \
+                    args.cache:
+                raise SystemExit("--watch cannot be combined with --random, --recursive, --number-by, --memory "
+                                 "or --cache")
+            session = WatchSession(args.path, options, writer, args.confirm, profiler, args.journal, args.threads)
+            try:
+                return watch(session, args.watch, on_error=lambda e: print("Failed\n\t--> {}".format(e), file=err))
+            except KeyboardInterrupt:
+                return
+        if args.batch is not None:
+            try:
+                jobs = load_manifest(args.batch, options)
+            except (OSError, ValueError) as e:
+                parser.error("invalid batch manifest: {}".format(e))
+            return report(jobs, writer, args.confirm, args.workers, profiler, args.journal, args.threads, out, err)
+        if args.memory is not None:
+            if args.random is not False or args.recursive or args.journal or args.cache or args.number_by != "name":
+                raise SystemExit("--memory cannot be combined with --random, --recursive, --journal, --cache "
+                                 "or --number-by")
+            return bounded(args.path, options, args.memory << 20, writer, args.confirm, profiler, args.threads)
+        if args.recursive:
+            return recursive(args.path, options, writer, args.confirm, args.workers, profiler, args.journal,
+                             args.threads, out, err)
+        cache = ScanCache() if args.cache else None
+        cached = None
+        if args.plan_out is not None:  # Before the scan, such that changes during it invalidate the plan
+            signature = ScanCache.settled_signature(args.path)
+        elif cache is not None:
+            signature = ScanCache.signature(args.path)  # Before the scan, such that changes during it invalidate it
+        if cache is not None:
+            with profiler.stage("cache") as record:
+                cached = cache.load(args.path, signature, args.include, args.exclude)
+                record.files = 0 if cached is None else len(cached.names)
+        if cached is None:
+            directory = ConcreteDirectory(args.path, args.include, args.exclude, profiler)
+        else:
+            directory = ConcreteDirectory(args.path, profiler=profiler, names=cached.names, unselected=cached.unselected)
+            options["run_index"] = cached.run_index
+        with directory:
+            chain = build_chain(directory, workers=args.workers, **options)
+            compile_pipeline(chain).run(profiler)  # Perform operations according to decorators
+            if cache is not None and cached is None:
+                files, numerated = directory.get_files(), find_decorator(chain, NumeratedDecorator)
+                cache.store(args.path, signature, CachedScan(files.names, directory.get_unselected(),
+                                                             None if numerated is None else numerated.run_index),
+                            args.include, args.exclude)
+
+            if writer is not None:
+                files = directory.get_files()
+                with profiler.stage("print", len(files)):
+                    names, renamed = files.names, files.render_all()
+                    if args.sort or args.output == "text":
+                        writer.write_all((names[row], renamed[row]) for row in files.order())
+                    else:  # Streamed in the order the files were scanned
+                        writer.write_all(zip(names, renamed))
+                    writer.flush()
+            if args.plan_out is not None:
+                write_plan(args.plan_out, args.path, signature, directory.plan_files(profiler))
+            if args.confirm:
+                directory.save_files(profiler, args.journal, args.threads)
+    finally:
+        if args.profile is not None:
+            print(profiler.to_json() if args.profile == "json" else profiler.to_table(), file=err)
+
+
+def recover(path: str, revert: bool, writer: Optional[RenameWriter], confirm: bool,
+            profiler: Profiler = NULL_PROFILER, threads: int = 1) -> None:
+    """
+    Resumes or reverts the journaled renames of a directory, without scanning the directory again.
+
+    :param path: Path to the directory
+    :param revert: True if the performed renames should be reverted, False if the remaining renames should be performed
+    :param writer: Writer of the renames (None for no output)
+    :param confirm: True if the renames should be made on the file system
+    :param profiler: Profiler which measures the renames
+    :param threads: Number of threads which perform renames concurrently
+    :return: None
+    """
+    recovery = executor.recover(path)
+    if writer is not None:
+        for chain, d in zip(recovery.chains, recovery.done):
+            writer.write_all([(op.dst, op.src) for op in reversed(chain[:d])] if revert else chain[d:])
+        writer.flush()
+    if confirm:
+        if revert:
+            executor.undo(path, recovery, profiler, threads)
+        else:
+            executor.resume(path, recovery, profiler, threads)
+
+
+def apply(file: str, writer: Optional[RenameWriter], confirm: bool, profiler: Profiler = NULL_PROFILER,
+          journal: bool = False, threads: int = 1) -> None:
+    """
+    Performs the renames of a plan file, without scanning the directory again.
+
+    :param file: Path to the plan file (see '--plan-out')
+    :param writer: Writer of the renames, in the order they are performed (None for no output)
+    :param confirm: True if the renames should be made on the file system
+    :param profiler: Profiler which measures the renames
+    :param journal: True if the renames should be recorded in a journal
+    :param threads: Number of threads which perform renames concurrently
+    :return: None
+    """
+    plan = read_plan(file)
+    check_plan(plan)
+    if writer is not None:
+        for chain in plan.chains:
+            writer.write_all(chain)
+        writer.flush()
+    if confirm:
+        executor.perform_plan(plan.path, plan.chains, journal, profiler, threads)
+
+
+def bounded(path: str, options: dict, memory: int, writer: Optional[RenameWriter], confirm: bool,
+            profiler: Profiler = NULL_PROFILER, threads: int = 1) -> None:
+    """
+    Renames the files of a directory, planned with a memory cap rather than in memory.
+
+    :param path: Path to the directory
+    :param options: Options of the renames (see JOB_OPTIONS)
+    :param memory: Bytes of records which are held in memory at once
+    :param writer: Writer of the renames (None for no output)
+    :param confirm: True if the renames should be made on the file system
+    :param profiler: Profiler which measures the planning and the renames
+    :param threads: Number of threads which perform renames concurrently
+    :return: None
+    """
+    with ExternalPlan(path, options, memory, profiler) as plan:
+        if writer is not None:
+            with profiler.stage("print", len(plan)):
+                writer.write_all(plan.renames())
+                writer.flush()
+        if confirm:
+            plan.save_files(profiler, threads)
+
+
+def recursive(root: str, options: dict, writer: Optional[RenameWriter], confirm: bool, workers: int = None,
+              profiler: Profiler = NULL_PROFILER, journal: bool = False, threads: int = 1, out=None, err=None) -> None:
+    """
+    Renames the files of every leaf directory beneath the root, reporting failures once all directories are done.
+
+    :param root: Path to the root directory
+    :param options: Options applied to every directory (see JOB_OPTIONS)
+    :param writer: Writer of the renamed filenames (None for no output)
+    :param confirm: True if the renames should be made on the file system
+    :param workers: Number of worker processes (None for one per CPU)
+    :param profiler: Profiler to which the measurements of every directory are added
+    :param journal: True if the renames of every directory should be recorded in a journal
+    :param threads: Number of threads which perform the renames of each directory concurrently
+    :param out: Stream of the summary (None for stdout)
+    :param err: Stream of the summary of machine-readable runs (None for stderr)
+    :return: None
+    """
+    report([(path, options) for path in find_leaf_directories(root)], writer, confirm, workers, profiler, journal,
+           threads, out, err)
+
+
+def report(jobs: List[Tuple[str, dict]], writer: Optional[RenameWriter], confirm: bool, workers: int = None,
+           profiler: Profiler = NULL_PROFILER, journal: bool = False, threads: int = 1, out=None, err=None) -> None:
+    """
+    Runs many jobs in parallel, reporting their renames as they complete, then their failures and a summary.
+
+    :param jobs: Directory path and options of each job (see JOB_OPTIONS)
+    :param writer: Writer of the renamed filenames (None for no output)
+    :param confirm: True if the renames should be made on the file system
+    :param workers: Number of worker processes (None for one per CPU)
+    :param profiler: Profiler to which the measurements of every job are added
+    :param journal: True if the renames of every job should be recorded in a journal
+    :param threads: Number of threads which perform the renames of each job concurrently
+    :param out: Stream of the summary (None for stdout)
+    :param err: Stream of the summary of machine-readable runs (None for stderr)
+    :return: None
+    """
+    failures, renamed = [], 0
+    for result in run_jobs(jobs, confirm, workers, profiler is not NULL_PROFILER, journal, threads):
+        if result.profile is not None:
+            profiler.merge(result.profile)
+        if result.error is not None:
+            failures.append(result)
+            continue
+        renamed += sum(1 for old, new in result.renames if old != new)
+        if writer is not None:
+            writer.directory(result.path)
+            writer.write_all(result.renames)
+    if writer is not None:
+        writer.flush()
+    if writer is None or writer.human_readable:
+        out = sys.stdout if out is None else out
+    else:  # Kept out of machine-readable output
+        out = sys.stderr if err is None else err
+    for result in failures:
+        print("Failed [{}]\n\t--> {}".format(result.path, result.error), file=out)
+    print("{} of {} directories succeeded, {} files {}".format(len(jobs) - len(failures), len(jobs), renamed,
+                                                              "renamed" if confirm else "to be renamed"), file=out)
+    if len(failures) > 0:
+        raise SystemExit("{} of {} directories could not be renamed".format(len(failures), len(jobs)))
 
 
 if __name__ == '__main__':
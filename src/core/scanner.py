@@ -0,0 +1,92 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+from os import scandir
+from fnmatch import translate
+from re import compile
+
+from util.fsops import DirectoryHandle
+
+
+class ScanFilter:
+    __regex_prefix = "re:"  # Patterns with this prefix are regular expressions rather than globs
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        """
+        Filter which decides which filenames of a directory are to be renamed.
+
+        Patterns are shell-style globs (e.g. "*.mkv") unless prefixed with 're:', in which case
+        the remainder is a regular expression (e.g. "re:S01E[0-9]+"). Regular expressions are searched
+        for anywhere in the filename, whereas globs must match the entire filename.
+        All patterns are compiled once up front so no per-file parsing occurs during the scan.
+
+        :param include: Patterns of which a filename must match at least one (None to include all)
+        :param exclude: Patterns of which a filename must match none (None to exclude none)
+        """
+        self.__include = ScanFilter.__compile(include)
+        self.__exclude = ScanFilter.__compile(exclude)
+
+    def __call__(self, name: str) -> bool:
+        """
+        :param name: Filename to be tested
+        :return: True if the filename passes the filter
+        """
+        if self.__include is not None and self.__include.search(name) is None:
+            return False
+        return self.__exclude is None or self.__exclude.search(name) is None
+
+    @staticmethod
+    def __compile(patterns: Optional[List[str]]):
+        """
+        Folds a list of patterns into a single alternation so each filename is tested by one regex search.
+
+        :param patterns: Glob or 're:' prefixed regex patterns
+        :return: Compiled pattern, or None if no patterns were specified
+        """
+        if not patterns:
+            return None
+        prefix = ScanFilter.__regex_prefix
+        return compile("|".join("(?:{})".format(
+            p[len(prefix):] if p.startswith(prefix) else translate(p)) for p in patterns))
+
+
+def scan_directory(path: str, name_filter: Optional[ScanFilter] = None,
+                   directory: Optional[DirectoryHandle] = None) -> Iterator[Tuple[str, bool]]:
+    """
+    Lazily scans the entries of a directory.
+
+    File type information is taken from the directory entry itself, which on most platforms
+    does not require an additional stat call per entry. The filter is applied to regular files
+    before the caller constructs any metadata for them.
+
+    :param path: Path to the directory
+    :param name_filter: Filter which filenames must pass in order to be selected (None to select all files)
+    :param directory: Opened directory, which is scanned rather than the path (None to scan the path)
+    :return: Generator of (filename, selected) tuples for every entry of the directory
+    """
+    with (scandir(path) if directory is None else directory.scandir()) as entries:
+        for entry in entries:
+            name = entry.name
+            try:
+                selected = entry.is_file()
+            except OSError:  # Entry vanished or is unreadable, it cannot be renamed
+                selected = False
+            if selected and name_filter is not None:
+                selected = name_filter(name)
+            yield name, selected
@@ -0,0 +1,94 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import AbstractSet, Dict, List, NamedTuple
+from secrets import token_hex
+
+
+class RenameOp(NamedTuple):
+    src: str  # Current filename
+    dst: str  # Filename after the rename
+
+
+def schedule_renames(operations: Dict[str, str], occupied: AbstractSet[str] = frozenset()) -> List[List[RenameOp]]:
+    """
+    Orders rename operations such that no file is ever overwritten.
+
+    Every filename is the destination of at most one operation, so the operations decompose into
+    independent chains (each ending at a vacant filename) and cycles (e.g. 3.jpg <-> 7.jpg).
+    Chains are performed starting from their vacant end. Each cycle is broken by moving one of its
+    files to a temporary name, which is then renamed to its destination last. A chain of 'n' files
+    costs 'n' renames and a cycle of 'n' files costs 'n + 1' renames, the minimum possible.
+
+    e.g. { "a": "b", "b": "c", "x": "y", "y": "x" } ->
+            [ [ b->c, a->b ], [ x->tmp, y->x, tmp->y ] ]
+
+    :param operations: Relation of current filenames to their new filenames
+    :param occupied: Filenames present in the directory which are not being renamed
+    :return: Independent sequences of rename operations, each of which must be performed in order
+    """
+    targets = {}  # Map[dst] -> src
+    for src, dst in operations.items():
+        if dst in targets:
+            raise Exception("Files [{}] and [{}] would both be renamed to: {}".format(targets[dst], src, dst))
+        if dst in occupied:
+            raise Exception("Renaming [{}] would overwrite an entry which is not being renamed: {}".format(src, dst))
+        targets[dst] = src
+    pending = {src: dst for src, dst in operations.items() if src != dst}
+
+    chains = []
+    for src, dst in pending.items():
+        if dst in pending:
+            continue  # Destination is not vacant yet, it is renamed later in a chain or cycle
+        chain = []
+        while src is not None:  # Walk backwards, each rename vacates the destination of the next
+            chain.append(RenameOp(src, pending[src]))
+            src = targets.get(src)
+        chains.append(chain)
+
+    scheduled = set(op.src for chain in chains for op in chain)
+    if len(scheduled) < len(pending):  # Remaining operations form cycles
+        temp_names = _temp_names(operations, targets, occupied)
+        for start in pending:
+            if start in scheduled:
+                continue
+            cycle = [start]
+            while pending[cycle[-1]] != start:
+                cycle.append(pending[cycle[-1]])
+            scheduled.update(cycle)
+            temp = next(temp_names)
+            chain = [RenameOp(start, temp)]
+            chain.extend(RenameOp(cycle[i], pending[cycle[i]]) for i in range(len(cycle) - 1, 0, -1))
+            chain.append(RenameOp(temp, pending[start]))
+            chains.append(chain)
+    return chains
+
+
+def _temp_names(operations: Dict[str, str], targets: Dict[str, str], occupied: AbstractSet[str]):
+    """
+    :param operations: Relation of current filenames to their new filenames
+    :param targets: Relation of new filenames to their current filenames
+    :param occupied: Filenames present in the directory which are not being renamed
+    :return: Generator of temporary filenames which do not collide with any filename of the directory
+    """
+    prefix, i = ".renamer-{}-".format(token_hex(4)), 0
+    while True:
+        name = "{}{}.tmp".format(prefix, i)
+        i += 1
+        if name not in operations and name not in targets and name not in occupied:
+            yield name
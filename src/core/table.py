@@ -0,0 +1,455 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections.abc import Mapping
+from array import array
+
+from core import numeric
+from core.template import Template
+from util.util import require_non_none
+
+MAX_NUM = (1 << 63) - 1  # Largest file number, as numbers are stored in a column of signed 64-bit integers
+
+
+def to_nums(nums: Iterable[int]) -> array:
+    """
+    :param nums: File numbers
+    :return: Column of the file numbers
+    """
+    nums = nums if isinstance(nums, (list, array)) else list(nums)
+    try:
+        return array("q", nums)
+    except OverflowError:
+        raise _too_large(next(num for num in nums if not -MAX_NUM - 1 <= num <= MAX_NUM))
+
+
+def _too_large(num: int) -> Exception:
+    return Exception("File number is too large to be renamed (at most {}): {}".format(MAX_NUM, num))
+
+
+class FileTable(Mapping):
+    __default_fmt = Template("$d")
+    __slots__ = ("__names", "__index", "__nums", "__numbered", "__assigned", "__unassigned", "__exts", "__ext_lookup",
+                 "__ext_ids", "__fmts", "__fmt_lookup", "__fmt_ids", "__captures", "__fnums", "__width", "__order")
+
+    def __init__(self, names: List[str]):
+        """
+        Constructs a columnar table of metadata for the specified files.
+
+        Rather than one object per file, each kind of metadata is stored as a column:
+        * names: Original filenames with extension
+        * nums: File numbers, as a compact array of 64-bit integers (unknown during initialization)
+        * ext ids: Index of each file's extension within the table's interned extensions
+        * fmt ids: Index of each file's output format within the table's interned format templates
+        * captures: Groups captured from each filename, for formats which use an input capture regex
+        * width: Number of digits file numbers are padded to with leading zeroes, when formatted
+        * order: Rows in order of their file number, computed once and shared by every consumer of the order
+
+        The table is a mapping of filenames to 'FileMetadata', which are views of a single row.
+
+        :param names: Names of the files, each of which must have an extension
+        """
+        self.__names = require_non_none(names)
+        self.__index: Optional[Dict[str, int]] = None  # Map[name] -> row, built upon the first lookup by name
+        self.__nums = array("q", bytes(8 * len(names)))
+        self.__numbered = False  # True once every file has been numbered
+        self.__assigned: Optional[bytearray] = None  # Rows numbered individually, before the table was numbered
+        self.__unassigned = len(names)  # Count of rows which are yet to be numbered individually
+        self.__exts: List[str] = []  # Interned extensions
+        self.__ext_lookup: Dict[str, int] = {}  # Map[extension] -> Index within the interned extensions
+        self.__ext_ids = array("i")
+        for name in names:
+            ext = FileTable.parse_extension(name)
+            if ext is None:
+                raise ValueError("The following file must contain an extension: " + name)
+            self.__ext_ids.append(FileTable.__intern(self.__exts, self.__ext_lookup, ext))
+        self.__fmts: List[Template] = [FileTable.__default_fmt]  # Interned output format templates
+        self.__fmt_lookup: Dict[Tuple[str, int], int] = {("$d", 0): 0}  # Map[(format, groups)] -> Index
+        self.__fmt_ids = array("i", bytes(4 * len(names)))
+        self.__captures: Optional[List[Tuple[str, ...]]] = None  # Created once any file has captures
+        self.__fnums: Optional[Dict[int, str]] = None  # Formatted numbers which were explicitly overridden
+        self.__width = 0
+        self.__order: Optional[array] = None  # Rows in order of their number, None until needed or once invalidated
+
+    @staticmethod
+    def parse_extension(filename: str) -> Optional[str]:
+        """
+        :param filename: Name of the file
+        :return: Extension of the file, or None if the file does not have one
+        """
+        stem, dot, ext = filename.rpartition(".")
+        return ext if dot and ext else None
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.__lookup()
+
+    def __getitem__(self, name: str) -> FileMetadata:
+        return FileMetadata(name, self, self.__lookup()[name])
+
+    def row(self, row: int) -> FileMetadata:
+        """
+        :param row: Row of the file
+        :return: View of the file's metadata
+        """
+        return FileMetadata(self.__names[row], self, row)
+
+    def rows(self) -> Iterator[FileMetadata]:
+        """
+        :return: Generator of views of every file's metadata, in row order
+        """
+        for row, name in enumerate(self.__names):
+            yield FileMetadata(name, self, row)
+
+    def __lookup(self) -> Dict[str, int]:
+        if self.__index is None:
+            self.__index = {name: row for row, name in enumerate(self.__names)}
+        return self.__index
+
+    @property
+    def names(self) -> List[str]:
+        """
+        :return: Column of original filenames, which must not be modified
+        """
+        return self.__names
+
+    @property
+    def numbered(self) -> bool:
+        return self.__numbered
+
+    @property
+    def nums(self) -> array:
+        """
+        Operations which modify numbers in place must preserve their order (e.g. a uniform shift),
+        otherwise they must call 'invalidate_order'.
+
+        :return: Column of file numbers, which may be modified in place
+        """
+        if not self.__numbered:
+            raise Exception("Files cannot be operated on as their numbers were uninitialized")
+        return self.__nums
+
+    @nums.setter
+    def nums(self, nums: array) -> None:
+        if len(require_non_none(nums)) != len(self.__names):
+            raise ValueError("Expected {} file numbers but received {}".format(len(self.__names), len(nums)))
+        self.__nums = nums if isinstance(nums, array) and nums.typecode == "q" else to_nums(nums)
+        self.__numbered = True
+        self.__assigned, self.__unassigned = None, 0
+        self.__order = None
+
+    def num(self, row: int) -> Optional[int]:
+        """
+        :param row: Row of the file
+        :return: Number of the file, or None if the file is not numbered
+        """
+        if self.__numbered or (self.__assigned is not None and self.__assigned[row]):
+            return self.__nums[row]
+        return None
+
+    def set_num(self, row: int, num: int) -> None:
+        try:
+            self.__nums[row] = require_non_none(num)
+        except OverflowError:
+            raise _too_large(num)
+        self.__order = None
+        if not self.__numbered:
+            if self.__assigned is None:
+                self.__assigned = bytearray(len(self.__names))
+            if not self.__assigned[row]:
+                self.__assigned[row] = 1
+                self.__unassigned -= 1
+            if self.__unassigned <= 0:
+                self.__numbered, self.__assigned = True, None
+
+    def order(self) -> array:
+        """
+        Sorts the rows by file number, unless they are already sorted, where equal numbers are in row order.
+
+        :return: Rows in order of their file number, which must not be modified
+        """
+        if self.__order is None:
+            self.__order = numeric.argsort(self.nums)
+        return self.__order
+
+    @property
+    def has_order(self) -> bool:
+        """
+        :return: True if the sort order is known, such that 'order' and 'largest' are free
+        """
+        return self.__order is not None
+
+    def invalidate_order(self) -> None:
+        """
+        Discards the sort order, after the numbers were modified such that their order changed.
+
+        :return: None
+        """
+        self.__order = None
+
+    def largest(self) -> int:
+        """
+        :return: Largest file number, taken from the sort order if it is known, otherwise found by a scan
+        """
+        if self.__order is not None:
+            return self.__nums[self.__order[-1]]
+        return numeric.largest(self.nums)
+
+    @property
+    def width(self) -> int:
+        """
+        :return: Number of digits file numbers are padded to with leading zeroes (0 for no padding)
+        """
+        return self.__width
+
+    @width.setter
+    def width(self, width: int) -> None:
+        self.__width = require_non_none(width)
+
+    def fnum(self, row: int) -> str:
+        """
+        :param row: Row of the file
+        :return: Number of the file, formatted with leading zeroes
+        """
+        if self.__fnums is not None and row in self.__fnums:
+            return self.__fnums[row]
+        num = self.num(row)
+        if num is None:
+            raise Exception("File's number cannot be formatted as it was uninitialized: " + self.__names[row])
+        fnum = str(num)
+        if self.__width > 0:
+            fnum = (self.__width - len(fnum) + (num < 0)) * "0" + fnum
+        return fnum
+
+    def set_fnum(self, row: int, fnum: str) -> None:
+        if self.__fnums is None:
+            self.__fnums = {}
+        self.__fnums[row] = require_non_none(fnum)
+
+    def ext(self, row: int) -> str:
+        return self.__exts[self.__ext_ids[row]]
+
+    def set_ext(self, row: int, ext: str) -> None:
+        self.__ext_ids[row] = FileTable.__intern(self.__exts, self.__ext_lookup, require_non_none(ext))
+
+    def fill_ext(self, ext: str, start: int = 0, stop: int = None) -> None:
+        """
+        Sets the extension of a range of files.
+
+        :param ext: Extension to be set
+        :param start: First row of the range
+        :param stop: Row after the last row of the range (None for the last row of the table)
+        :return: None
+        """
+        eid = FileTable.__intern(self.__exts, self.__ext_lookup, require_non_none(ext))
+        FileTable.__fill(self.__ext_ids, eid, start, stop)
+
+    def fmt(self, row: int) -> str:
+        return self.__fmts[self.__fmt_ids[row]].source
+
+    def set_fmt(self, row: int, fmt: Union[str, Template]) -> None:
+        self.__fmt_ids[row] = self.__intern_fmt(fmt)
+
+    def fill_fmt(self, fmt: Union[str, Template], start: int = 0, stop: int = None) -> None:
+        """
+        Sets the output format of a range of files.
+
+        :param fmt: Output format or its template, which must contain '$d' (file number)
+        :param start: First row of the range
+        :param stop: Row after the last row of the range (None for the last row of the table)
+        :return: None
+        """
+        FileTable.__fill(self.__fmt_ids, self.__intern_fmt(fmt), start, stop)
+
+    def set_captures(self, row: int, captures: Tuple[str, ...]) -> None:
+        """
+        :param row: Row of the file
+        :param captures: Groups captured from the filename, substituted for '$1', '$2', etc
+        :return: None
+        """
+        if self.__captures is None:
+            self.__captures = [()] * len(self.__names)
+        self.__captures[row] = tuple("" if e is None else e for e in require_non_none(captures))
+
+    def render(self, row: int) -> str:
+        """
+        Formats the filename of a file according to its metadata.
+
+        :param row: Row of the file
+        :return: Formatted filename of the file
+        """
+        template = self.__fmts[self.__fmt_ids[row]]
+        stem = self.__names[row].rpartition(".")[0] if template.uses_name else ""
+        return template.render(self.fnum(row), self.__exts[self.__ext_ids[row]], stem,
+                               () if self.__captures is None else self.__captures[row])
+
+    def render_all(self) -> List[str]:
+        """
+        Formats the filenames of every file according to their metadata.
+
+        Numbers are formatted in one pass over the number column and each filename is
+        produced by a single call of its precompiled template.
+
+        :return: Formatted filenames, in row order
+        """
+        fnums = self.__format_nums()
+        if len(fnums) <= 0:
+            return fnums
+        names, exts, fmts, captures = self.__names, self.__exts, self.__fmts, self.__captures
+        ext_ids, fmt_ids = self.__ext_ids, self.__fmt_ids
+        template = fmts[fmt_ids[0]]
+        if not template.uses_name and captures is None and \
+                fmt_ids.count(fmt_ids[0]) == len(fmt_ids) and ext_ids.count(ext_ids[0]) == len(ext_ids):
+            render, ext = template.render, exts[ext_ids[0]]  # Every file shares its format and extension
+            return [render(fnum, ext) for fnum in fnums]
+        return [fmts[fid].render(fnum, exts[eid], names[row].rpartition(".")[0] if fmts[fid].uses_name else "",
+                                 () if captures is None else captures[row])
+                for row, (fnum, eid, fid) in enumerate(zip(fnums, ext_ids, fmt_ids))]
+
+    def __format_nums(self) -> List[str]:
+        """
+        :return: Formatted numbers of every file, in row order
+        """
+        if not self.__numbered:
+            return [self.fnum(row) for row in range(len(self.__names))]
+        width = self.__width
+        if width <= 0:
+            fnums = [str(num) for num in self.__nums]
+        else:
+            fnums = [str(num).rjust(width, "0") if num >= 0 else (width - len(str(num)) + 1) * "0" + str(num)
+                     for num in self.__nums]
+        if self.__fnums is not None:
+            for row, fnum in self.__fnums.items():
+                fnums[row] = fnum
+        return fnums
+
+    def __intern_fmt(self, fmt: Union[str, Template]) -> int:
+        """
+        :param fmt: Output format or its template to be interned, which is parsed only the first time it is seen
+        :return: Index of the format within the interned format templates
+        """
+        key = (fmt.source, fmt.groups) if isinstance(require_non_none(fmt), Template) else (fmt, 0)
+        fid = self.__fmt_lookup.get(key)
+        if fid is None:
+            fid = self.__fmt_lookup[key] = len(self.__fmts)
+            self.__fmts.append(fmt if isinstance(fmt, Template) else Template(fmt))
+        return fid
+
+    @staticmethod
+    def __intern(values: List[str], lookup: Dict[str, int], value: str) -> int:
+        """
+        :param values: Interned values
+        :param lookup: Relation of interned values to their index
+        :param value: Value to be interned
+        :return: Index of the value within the interned values
+        """
+        index = lookup.get(value)
+        if index is None:
+            index = lookup[value] = len(values)
+            values.append(value)
+        return index
+
+    @staticmethod
+    def __fill(column: array, value: int, start: int, stop: Optional[int]) -> None:
+        stop = len(column) if stop is None else stop
+        if stop > start:
+            column[start:stop] = array(column.typecode, [value]) * (stop - start)
+
+
+class FileMetadata:
+    __slots__ = ("__table", "__row")
+
+    def __init__(self, filename: str, table: FileTable = None, row: int = 0):
+        """
+        Constructs metadata for a specified file.
+
+        The metadata is a view of a single row of a 'FileTable'. If no table is specified,
+        a table containing only the specified file is constructed.
+
+        The following metadata is tracked:
+        * name: Original filename with extension
+        * fmt: Output format of the file, which must contain '$d' (file number)
+        * num: File number (unknown during initialization)
+        * fnum: Formatted number, used to override 'num'
+        * ext: Extension of the file
+
+        :param filename: Name of the file
+        :param table: Table which contains the file
+        :param row: Row of the file within the table
+        """
+        self.__table = FileTable([require_non_none(filename)]) if table is None else table
+        self.__row = row
+
+    @staticmethod
+    def parse_extension(filename: str) -> Optional[str]:
+        """
+        :param filename: Name of the file
+        :return: Extension of the file, or None if the file does not have one
+        """
+        return FileTable.parse_extension(filename)
+
+    @property
+    def name(self) -> str:
+        return self.__table.names[self.__row]
+
+    @property
+    def fmt(self) -> str:
+        return self.__table.fmt(self.__row)
+
+    @fmt.setter
+    def fmt(self, fmt: str) -> None:
+        self.__table.set_fmt(self.__row, fmt)
+
+    @property
+    def num(self) -> int:
+        return self.__table.num(self.__row)
+
+    @num.setter
+    def num(self, num: int) -> None:
+        self.__table.set_num(self.__row, num)
+
+    @property
+    def fnum(self) -> str:
+        return self.__table.fnum(self.__row)
+
+    @fnum.setter
+    def fnum(self, fnum: str) -> None:
+        self.__table.set_fnum(self.__row, fnum)
+
+    @property
+    def ext(self) -> str:
+        return self.__table.ext(self.__row)
+
+    @ext.setter
+    def ext(self, ext: str) -> None:
+        self.__table.set_ext(self.__row, ext)
+
+    def __str__(self) -> str:
+        """
+        Formats the filename according to the object's metadata.
+
+        :return: Formatted filename of the object
+        """
+        return self.__table.render(self.__row)
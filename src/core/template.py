@@ -0,0 +1,121 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import List, Sequence, Tuple
+from re import compile
+
+from util.util import require_non_none
+
+LITERAL, NUMBER, CAPTURE, EXTENSION, NAME = range(5)  # Kinds of template segments
+
+
+class Template:
+    __specifier_pattern = compile(r"\$(\$|d|e|n|[0-9]+)")
+    __kinds = {"d": NUMBER, "e": EXTENSION, "n": NAME}
+
+    def __init__(self, fmt: str, groups: int = 0):
+        """
+        Output format of a filename, parsed once into a list of segments.
+
+        The following specifiers are substituted when the template is rendered:
+        * $d: File number, formatted with leading zeroes (required)
+        * $1, $2, etc: Groups captured from the original filename by the optional input capture regex
+        * $e: Extension of the file
+        * $n: Original filename, without its extension
+        * $$: A literal '$'
+
+        Specifiers which do not correspond to a captured group are kept literally. The segments are
+        compiled into a single 'str.format' string, so rendering a filename is one call rather than
+        one scan of the format per specifier.
+
+        e.g. Template("$1 - Episode $d", 1) -> [ (CAPTURE, 0), (LITERAL, " - Episode "), (NUMBER, None) ]
+
+        :param fmt: Output format, which must contain '$d' (file number)
+        :param groups: Number of groups the input capture regex captures
+        """
+        self.__source = require_non_none(fmt)
+        self.__groups = groups
+        segments: List[Tuple[int, object]] = []
+        pos = 0
+        for match in Template.__specifier_pattern.finditer(fmt):
+            token = match.group(1)
+            kind = Template.__kinds.get(token)
+            if kind is not None:
+                segments.append((LITERAL, fmt[pos:match.start()]))
+                segments.append((kind, None))
+            elif token.isdigit() and 1 <= int(token) <= groups:
+                segments.append((LITERAL, fmt[pos:match.start()]))
+                segments.append((CAPTURE, int(token) - 1))
+            else:  # '$$' or a group which is not captured, both of which are literal
+                segments.append((LITERAL, fmt[pos:match.start()] + ("$" if token == "$" else match.group(0))))
+            pos = match.end()
+        segments.append((LITERAL, fmt[pos:]))
+        self.__segments = Template.__merge_literals(segments)
+        if (NUMBER, None) not in self.__segments:
+            raise ValueError("Required format specified '$d' was not found in the following format: {}".format(fmt))
+        self.__uses_name = (NAME, None) in self.__segments
+
+        # Positional arguments of the format string: 0 -> fnum, 1 -> ext, 2 -> stem, 3 -> captures
+        fields = {NUMBER: "{0}", EXTENSION: "{1}", NAME: "{2}"}
+        self.__format = "".join(v.replace("{", "{{").replace("}", "}}") if k == LITERAL else
+                                "{{3[{}]}}".format(v) if k == CAPTURE else fields[k]
+                                for k, v in self.__segments) + ".{1}"
+
+    @staticmethod
+    def __merge_literals(segments: List[Tuple[int, object]]) -> Tuple[Tuple[int, object], ...]:
+        merged = []
+        for kind, value in segments:
+            if kind == LITERAL:
+                if not value:
+                    continue
+                if len(merged) > 0 and merged[-1][0] == LITERAL:
+                    value = merged.pop()[1] + value
+            merged.append((kind, value))
+        return tuple(merged)
+
+    @property
+    def source(self) -> str:
+        return self.__source
+
+    @property
+    def groups(self) -> int:
+        return self.__groups
+
+    @property
+    def segments(self) -> Tuple[Tuple[int, object], ...]:
+        """
+        :return: Segments of the template, as (kind, value) tuples
+        """
+        return self.__segments
+
+    @property
+    def uses_name(self) -> bool:
+        """
+        :return: True if the template contains the original filename ('$n')
+        """
+        return self.__uses_name
+
+    def render(self, fnum: str, ext: str, stem: str = "", captures: Sequence[str] = ()) -> str:
+        """
+        :param fnum: Formatted file number
+        :param ext: Extension of the file
+        :param stem: Original filename, without its extension
+        :param captures: Groups captured from the original filename
+        :return: Filename, including its extension
+        """
+        return self.__format.format(fnum, ext, stem, captures)
@@ -0,0 +1,304 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Incremental renaming of files as they arrive in a directory (see '--watch').
+
+Files which arrive close together are debounced into a batch. Only the files of a batch are
+numbered and renamed; the numerical run detected by the first batch, the number after which
+flattened files continue and the inferred leading zeroes are kept for every later batch.
+"""
+
+import os
+import struct
+from abc import ABC, abstractmethod
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from os.path import isfile, join, lexists
+from select import select
+from threading import Event
+from time import monotonic, sleep
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.decorators import NumeratedDecorator
+from core.directory import ConcreteDirectory
+from core.jobs import build_chain, find_decorator
+from core.output import RenameWriter
+from core.pipeline import compile_pipeline
+from core.profiler import NULL_PROFILER, Profiler
+from core.scanner import ScanFilter, scan_directory
+from core.table import FileTable
+
+_RESERVED_PREFIX = ".renamer-"  # Temporary filenames and journals, which are never renamed
+_MAX_DELAY = 10  # Factor of the debounce interval after which a batch is processed even while files keep arriving
+
+Changes = Tuple[Set[str], Set[str], bool]  # Names which were added, names which were removed, True if events were lost
+
+
+class DirectoryWatcher(ABC):
+    @abstractmethod
+    def wait(self, timeout: float) -> Changes:
+        """
+        Waits for entries of the directory to be added or removed.
+
+        :param timeout: Maximum number of seconds to wait
+        :return: Changes observed since the previous call, which are empty if none were observed in time
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PollingWatcher(DirectoryWatcher):
+    def __init__(self, path: str):
+        """
+        Watcher which compares scans of the directory, for platforms without inotify.
+
+        :param path: Path to the directory
+        """
+        self.__path = path
+        self.__names = self.__scan()
+
+    def __scan(self) -> Set[str]:
+        return set(name for name, _ in scan_directory(self.__path))
+
+    def wait(self, timeout: float) -> Changes:
+        sleep(timeout)
+        names = self.__scan()
+        added, removed = names - self.__names, self.__names - names
+        self.__names = names
+        return added, removed, False
+
+
+class InotifyWatcher(DirectoryWatcher):
+    # See inotify(7)
+    __IN_CLOSE_WRITE, __IN_MOVED_FROM, __IN_MOVED_TO, __IN_DELETE = 0x8, 0x40, 0x80, 0x200
+    __IN_Q_OVERFLOW, __IN_ISDIR = 0x4000, 0x40000000
+    __IN_NONBLOCK, __IN_CLOEXEC = 0o4000, 0o2000000
+    __event = struct.Struct("iIII")  # wd, mask, cookie, len, followed by the NUL padded name
+
+    def __init__(self, path: str):
+        """
+        Watcher which is notified by the Linux kernel of files being written or moved into the directory.
+        Files are added once they are closed after writing, rather than when they are created.
+
+        :param path: Path to the directory
+        """
+        libc = CDLL(find_library("c"), use_errno=True)
+        self.__fd = libc.inotify_init1(InotifyWatcher.__IN_NONBLOCK | InotifyWatcher.__IN_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(get_errno(), "inotify_init1 failed")
+        mask = InotifyWatcher.__IN_CLOSE_WRITE | InotifyWatcher.__IN_MOVED_TO | \
+            InotifyWatcher.__IN_MOVED_FROM | InotifyWatcher.__IN_DELETE
+        if libc.inotify_add_watch(self.__fd, os.fsencode(path), mask) < 0:
+            errno = get_errno()
+            os.close(self.__fd)
+            raise OSError(errno, "inotify_add_watch failed: {}".format(path))
+
+    def wait(self, timeout: float) -> Changes:
+        added, removed, overflow = set(), set(), False
+        if len(select([self.__fd], [], [], timeout)[0]) <= 0:
+            return added, removed, overflow
+        event, size = InotifyWatcher.__event, InotifyWatcher.__event.size
+        while True:
+            try:
+                data = os.read(self.__fd, 1 << 16)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                _, mask, _, length = event.unpack_from(data, pos)
+                name = os.fsdecode(data[pos + size:pos + size + length].rstrip(b"\0"))
+                pos += size + length
+                if mask & InotifyWatcher.__IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & InotifyWatcher.__IN_ISDIR:
+                    continue
+                elif mask & (InotifyWatcher.__IN_MOVED_FROM | InotifyWatcher.__IN_DELETE):
+                    added.discard(name)
+                    removed.add(name)
+                else:
+                    removed.discard(name)
+                    added.add(name)
+        return added, removed, overflow
+
+    def close(self) -> None:
+        os.close(self.__fd)
+
+
+def open_watcher(path: str) -> DirectoryWatcher:
+    """
+    :param path: Path to the directory
+    :return: Inotify watcher of the directory, or a polling watcher if inotify is unavailable
+    """
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError):  # Not Linux, or the watch limit was reached
+        return PollingWatcher(path)
+
+
+class WatchSession:
+    def __init__(self, path: str, options: Dict[str, Any], writer: Optional[RenameWriter] = None,
+                 confirm: bool = False, profiler: Profiler = NULL_PROFILER, journal: bool = False, threads: int = 1):
+        """
+        State of a watched directory, which is kept between batches of arriving files.
+
+        :param path: Path to the directory
+        :param options: Options applied to every batch (see JOB_OPTIONS), which must not shuffle nor number by metadata
+        :param writer: Writer of the renames (None for no output)
+        :param confirm: True if the renames should be made on the file system
+        :param profiler: Profiler which measures every batch
+        :param journal: True if the renames of every batch should be recorded in a journal
+        :param threads: Number of threads which perform renames concurrently
+        """
+        if options.get("random", False) is not False:
+            raise ValueError("Files which arrive in batches cannot be shuffled")
+        if options.get("number_by", "name") not in (None, "name"):
+            raise ValueError("Files which arrive in batches must be numbered by their names")
+        self.__path = path
+        self.__options = dict(options)
+        self.__writer = writer
+        self.__confirm = confirm
+        self.__profiler = profiler
+        self.__journal = journal
+        self.__threads = threads
+        include, exclude = options.get("include"), options.get("exclude")
+        self.__filter = ScanFilter(include, exclude) if include or exclude else None
+        self.__known: Set[str] = set()  # Entries of the directory which were already processed
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def known(self) -> Set[str]:
+        """
+        :return: Entries of the directory which were already processed, including the renamed filenames
+        """
+        return self.__known
+
+    def process(self, names: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Numbers and renames a batch of newly arrived entries. Entries which were already processed,
+        which are not regular files, which do not pass the filters or which lack the numerical run
+        of previous batches are remembered but not renamed.
+
+        :param names: Names of the entries
+        :return: Original and renamed filename of each file of the batch, ordered by file number
+        """
+        known, path, name_filter = self.__known, self.__path, self.__filter
+        run_index = self.__options.get("run_index")
+        batch = []
+        for name in set(names):
+            if name in known or name.startswith(_RESERVED_PREFIX):
+                continue
+            if isfile(join(path, name)) and (name_filter is None or name_filter(name)) and \
+                    FileTable.parse_extension(name) is not None and \
+                    (run_index is None or NumeratedDecorator.count_runs(name) > run_index):
+                batch.append(name)
+            else:
+                known.add(name)
+        if len(batch) <= 0:
+            return []
+        known.update(batch)  # Not renamed again, even if the batch fails
+        with ConcreteDirectory(path, profiler=self.__profiler, names=batch, unselected=known - set(batch)) as directory:
+            chain = build_chain(directory, **self.__options)
+            compile_pipeline(chain).run(self.__profiler)
+
+            files = directory.get_files()
+            names, renamed = files.names, files.render_all()
+            renames = [(names[row], renamed[row]) for row in files.order()]
+            if self.__writer is not None:
+                self.__writer.write_all(renames)
+                self.__writer.flush()
+            if self.__confirm:
+                directory.save_files(self.__profiler, self.__journal, self.__threads)
+                known.difference_update(batch)
+                known.update(renamed)
+
+        options = self.__options  # Later batches continue where this batch left off
+        options["run_index"] = find_decorator(chain, NumeratedDecorator).run_index
+        if options.get("consecutive"):
+            options["start"] = files.largest() + 1
+        if options.get("zeroes") is not None:
+            options["zeroes"] = files.width
+        return renames
+
+    def remove(self, names: Iterable[str]) -> None:
+        """
+        Forgets entries which were removed from the directory. An entry which is present again,
+        e.g. because another file was renamed into its name, is still known.
+
+        :param names: Names of entries which were removed from the directory
+        :return: None
+        """
+        path = self.__path
+        self.__known.difference_update([name for name in names if not lexists(join(path, name))])
+
+    def rescan(self, pending: Set[str]) -> Set[str]:
+        """
+        Reconciles the session with the entries of the directory, after events were lost.
+
+        :param pending: Names of entries which arrived but were not yet processed
+        :return: Names of entries which arrived but were not yet processed, including those which were lost
+        """
+        names = set(name for name, _ in scan_directory(self.__path))
+        self.__known.intersection_update(names)
+        return (pending & names) | (names - self.__known)
+
+
+def watch(session: WatchSession, debounce: float = 1.0, stop: Optional[Event] = None, on_error=None) -> None:
+    """
+    Processes the entries of a directory, then processes batches of entries as they arrive, until stopped.
+
+    A batch is processed once no entry has arrived for the debounce interval, or after ten intervals
+    while entries keep arriving.
+
+    :param session: Session of the watched directory
+    :param debounce: Number of seconds without arrivals after which a batch is processed
+    :param stop: Event which stops the watch once set (None to watch until interrupted)
+    :param on_error: Function which is called with the error of each failed batch (None to raise errors)
+    :return: None
+    """
+    stop = Event() if stop is None else stop
+    watcher = open_watcher(session.path)  # Opened before the directory is scanned, such that no arrival is missed
+    try:
+        pending, first = session.rescan(set()), monotonic()
+        while not stop.is_set():
+            added, removed, overflow = watcher.wait(debounce)
+            session.remove(removed)
+            pending -= removed
+            if overflow:
+                pending = session.rescan(pending)
+            if len(added) > 0:
+                if len(pending) <= 0:
+                    first = monotonic()
+                pending |= added
+                if monotonic() - first < debounce * _MAX_DELAY:
+                    continue  # Wait for the arrivals to settle
+            if len(pending) > 0:
+                batch, pending = pending, set()
+                try:
+                    session.process(batch)
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(e)
+    finally:
+        watcher.close()
@@ -17,29 +17,46 @@
 """
 
 from __future__ import annotations
-from typing import TypeVar
+from typing import Dict, Iterator, List, TypeVar, Generic
 from collections import deque
+from array import array
 
 from util.util import require_non_none
 
 T = TypeVar("T")
 
 
-class DAG:
+class DirectedGraph(Generic[T]):
     def __init__(self):
         """
-        Constructs a directed acyclic graph instance
+        Constructs a directed graph instance, used to order (and detect cycles between) dependent vertices.
+        The graph may contain cycles, which 'find_cycles' reports and 'topological_sort' rejects.
+
+        Vertices are mapped to dense integer ids in order of insertion. Edges are appended to a pair of
+        compact arrays and compiled into a compressed adjacency (CSR) layout the first time the graph is
+        traversed, so every algorithm below runs in O(V+E) time without recursion.
         """
-        self.__nodes = {}  # Map[data] -> Node
+        self.__ids: Dict[T, int] = {}  # Map[data] -> Vertex id
+        self.__data: List[T] = []  # Map[Vertex id] -> data
+        self.__tails = array("q")  # Edge origin vertex ids
+        self.__heads = array("q")  # Edge destination vertex ids
+        self.__edges = set()  # (tail, head) pairs of vertex ids, used to reject duplicate edges
+        self.__offsets = None  # CSR: Edges of vertex 'v' are __adjacent[__offsets[v]:__offsets[v + 1]]
+        self.__adjacent = None
+
+    def __len__(self) -> int:
+        return len(self.__data)
 
     def add_vertex(self, data: T) -> bool:
         """
         :param data: Data of the vertex
         :return: False if the graph already contains the vertex
         """
-        if require_non_none(data) in self.__nodes:
+        if require_non_none(data) in self.__ids:
             return False
-        self.__nodes[data] = DAG.__DAGNode(data)
+        self.__ids[data] = len(self.__data)
+        self.__data.append(data)
+        self.__offsets = None
         return True
 
     def add_edge(self, vertex: T, edge: T) -> bool:
@@ -48,45 +65,181 @@ class DAG:
         :param edge: Connected vertex from the specified vertex
         :return: False if the vertex already contains the specified edge
         """
-        if require_non_none(vertex) not in self.__nodes:
+        v = self.__ids.get(require_non_none(vertex))
+        if v is None:
             raise ValueError("Vertex is not present within the graph: {}".format(vertex))
-        if require_non_none(edge) not in self.__nodes:
+        e = self.__ids.get(require_non_none(edge))
+        if e is None:
             raise ValueError("Vertex edge is not present within the graph: {}".format(edge))
-        if vertex == require_non_none(edge):
+        if v == e:
             raise ValueError("Vertex is already a strongly connected component with itself: {}".format(vertex))
-        v, e = self.__nodes[vertex], self.__nodes[edge]
-        if e in v.edges:
+        key = (v, e)
+        if key in self.__edges:
             return False
-        v.edges.add(e)
-        e.degree += 1
+        self.__edges.add(key)
+        self.__tails.append(v)
+        self.__heads.append(e)
+        self.__offsets = None
         return True
 
-    def dfs_find_cycles(self) -> None:
+    def vertex_id(self, data: T) -> int:
+        """
+        :param data: Data of the vertex
+        :return: Dense integer id of the vertex
+        """
+        v = self.__ids.get(require_non_none(data))
+        if v is None:
+            raise ValueError("Vertex is not present within the graph: {}".format(data))
+        return v
 
-        # White: Vertices which are currently unvisited
-        # Gray: Vertices which are in the process of being visited
-        # Black: Vertices which have been completely visited
-        white, grey, black = self.__nodes.copy(), set(), set()
+    def vertex(self, vid: int) -> T:
+        """
+        :param vid: Dense integer id of the vertex
+        :return: Data of the vertex
+        """
+        return self.__data[vid]
 
-        parents = {}  # Map of vertices -> edge for traversal history
-        stack = deque()
+    def successors(self, data: T) -> Iterator[T]:
+        """
+        :param data: Data of the vertex
+        :return: Generator of the vertices which the specified vertex has an edge to
+        """
+        offsets, adjacent = self.__compile()
+        v = self.vertex_id(data)
+        return (self.__data[e] for e in adjacent[offsets[v]:offsets[v + 1]])
 
-        # TODO: This makes way more sense to use recursion
+    def strongly_connected_components(self) -> List[List[T]]:
+        """
+        Finds all strongly connected components of the graph using an iterative form of Tarjan's algorithm.
 
-        while len(white > 1):  # Cycle of one or no element(s) is impossible
-            w = next(iter(white))
-            stack.append(w)
-            parents[w] = None
-            while len(stack) > 0:
-                v = stack.pop()
-                grey.add(v)
-                for e in v.edges:
-                    stack.append(e)
-                    parents[e] = v  # Edge was introduced by vertex
+        :return: Components of the graph, in reverse topological order
+        """
+        data = self.__data
+        return [[data[v] for v in component] for component in self.__tarjan()]
 
-    class __DAGNode:
-        def __init__(self, data: T):
-            self.data = data
-            self.edges = set()
-            self.degree = 0
+    def topological_sort(self) -> List[T]:
+        """
+        Orders the vertices such that every vertex precedes all vertices it has an edge to (Kahn's algorithm).
+
+        :return: Vertices in topological order
+        """
+        offsets, adjacent = self.__compile()
+        n = len(self.__data)
+        degree = array("q", bytes(8 * n))  # In-degree of each vertex
+        for e in adjacent:
+            degree[e] += 1
+        ready = deque(v for v in range(n) if degree[v] == 0)
+        order = []
+        while len(ready) > 0:
+            v = ready.popleft()
+            order.append(v)
+            for i in range(offsets[v], offsets[v + 1]):
+                e = adjacent[i]
+                degree[e] -= 1
+                if degree[e] == 0:
+                    ready.append(e)
+        if len(order) < n:
+            raise ValueError("Graph cannot be topologically sorted as it contains {} cycle(s)"
+                             .format(len(self.find_cycles())))
+        data = self.__data
+        return [data[v] for v in order]
+
+    def find_cycles(self) -> List[List[T]]:
+        """
+        Finds one simple cycle within every cyclic strongly connected component of the graph.
+
+        Each cycle is listed in edge order, such that every vertex has an edge to its successor
+        and the last vertex has an edge to the first. Every vertex of a graph in which vertices have at
+        most one edge each (such as a rename mapping) belongs to at most one cycle, all of which are found.
 
+        :return: Cycles of the graph
+        """
+        offsets, adjacent = self.__compile()
+        data, cycles = self.__data, []
+        component_of = {}
+        for c, component in enumerate(self.__tarjan()):
+            if len(component) <= 1:
+                continue  # Self-edges are rejected, a single vertex cannot be cyclic
+            for v in component:
+                component_of[v] = c
+            # Walk edges which stay within the component until a vertex repeats
+            position, path, v = {}, [], component[0]
+            while v not in position:
+                position[v] = len(path)
+                path.append(v)
+                for i in range(offsets[v], offsets[v + 1]):
+                    if component_of.get(adjacent[i]) == c:
+                        v = adjacent[i]
+                        break
+            cycles.append([data[u] for u in path[position[v]:]])
+        return cycles
+
+    def __compile(self):
+        """
+        Compiles the edge list into a compressed adjacency layout, if it is not already compiled.
+
+        :return: Tuple of the vertex offsets and the adjacent vertex ids
+        """
+        if self.__offsets is None:
+            n = len(self.__data)
+            offsets = array("q", bytes(8 * (n + 1)))
+            for v in self.__tails:
+                offsets[v + 1] += 1
+            for v in range(n):
+                offsets[v + 1] += offsets[v]
+            cursor = offsets[:-1]
+            adjacent = array("q", bytes(8 * len(self.__heads)))
+            for v, e in zip(self.__tails, self.__heads):
+                adjacent[cursor[v]] = e
+                cursor[v] += 1
+            self.__offsets, self.__adjacent = offsets, adjacent
+        return self.__offsets, self.__adjacent
+
+    def __tarjan(self) -> List[List[int]]:
+        """
+        :return: Strongly connected components as lists of vertex ids, in reverse topological order
+        """
+        offsets, adjacent = self.__compile()
+        n = len(self.__data)
+        index = array("q", [-1]) * n  # Order in which vertices were discovered (-1 if undiscovered)
+        low = array("q", bytes(8 * n))  # Smallest index reachable from the vertex's subtree
+        cursor = offsets[:-1]  # Next edge to be explored of each vertex
+        on_stack = bytearray(n)
+        stack, components, counter = [], [], 0
+
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [root]  # Emulates the call stack of the recursive algorithm
+            while len(work) > 0:
+                v = work[-1]
+                i = cursor[v]
+                if i < offsets[v + 1]:
+                    cursor[v] = i + 1
+                    e = adjacent[i]
+                    if index[e] < 0:  # Descend into the undiscovered vertex
+                        index[e] = low[e] = counter
+                        counter += 1
+                        stack.append(e)
+                        on_stack[e] = 1
+                        work.append(e)
+                    elif on_stack[e] and index[e] < low[v]:
+                        low[v] = index[e]
+                    continue
+                work.pop()  # All edges explored, return to the parent vertex
+                if len(work) > 0 and low[v] < low[work[-1]]:
+                    low[work[-1]] = low[v]
+                if low[v] == index[v]:  # Vertex is the root of a component
+                    component = []
+                    while True:
+                        e = stack.pop()
+                        on_stack[e] = 0
+                        component.append(e)
+                        if e == v:
+                            break
+                    components.append(component)
+        return components
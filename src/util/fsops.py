@@ -0,0 +1,194 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+File system operations which the 'os' module does not expose, and directories whose entries are named
+relative to a file descriptor of the directory rather than by path.
+"""
+
+import os
+import sys
+from ctypes import CDLL, c_char_p, c_int, c_uint, get_errno
+from ctypes.util import find_library
+from errno import EINVAL, ENOSYS, EOPNOTSUPP
+from os.path import join
+from typing import Iterator, Optional
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2  # See renameat2(2)
+
+_supported = sys.platform.startswith("linux")
+_renameat2 = None
+_relative = os.rename in os.supports_dir_fd and os.stat in os.supports_dir_fd and os.open in os.supports_dir_fd and \
+    os.scandir in os.supports_fd
+
+
+def _load_renameat2():
+    """
+    :return: Function 'renameat2' of the C library, or None if the C library does not provide it (glibc < 2.28)
+    """
+    global _renameat2
+    if _renameat2 is None:
+        try:
+            func = CDLL(find_library("c"), use_errno=True).renameat2
+        except (OSError, AttributeError):
+            return None
+        func.argtypes = (c_int, c_char_p, c_int, c_char_p, c_uint)
+        func.restype = c_int
+        _renameat2 = func
+    return _renameat2
+
+
+def can_exchange() -> bool:
+    """
+    :return: True if the platform may be able to exchange entries (see 'exchange')
+    """
+    return _supported
+
+
+def exchange(a: str, b: str, dir_fd: Optional[int] = None) -> bool:
+    """
+    Atomically exchanges two directory entries, such that each name refers to the other's file,
+    with a single renameat2(RENAME_EXCHANGE) call. No temporary name is ever visible.
+
+    :param a: Path to the first entry
+    :param b: Path to the second entry
+    :param dir_fd: File descriptor of the directory which the paths are relative to (None for the working directory)
+    :return: True if the entries were exchanged, False if the platform or file system cannot exchange
+        entries, in which case neither entry was changed
+    """
+    global _supported
+    if not _supported:
+        return False
+    renameat2 = _load_renameat2()
+    if renameat2 is None:
+        _supported = False
+        return False
+    fd = _AT_FDCWD if dir_fd is None else dir_fd
+    if renameat2(fd, os.fsencode(a), fd, os.fsencode(b), _RENAME_EXCHANGE) == 0:
+        return True
+    errno = get_errno()
+    if errno == ENOSYS:  # Kernel older than 3.15
+        _supported = False
+        return False
+    if errno in (EINVAL, EOPNOTSUPP):  # File system does not support exchanges
+        return False
+    raise OSError(errno, os.strerror(errno), a, None, b)
+
+
+class DirectoryHandle:
+    def __init__(self, path: str):
+        """
+        Directory which is opened once, such that its entries are named relative to its file descriptor.
+        The kernel then resolves the path to the directory once rather than on every call, and the
+        entries are still found if the directory is moved. Platforms without such calls use paths.
+
+        :param path: Path to the directory
+        """
+        self.__path = path
+        self.__fd: Optional[int] = None
+        if _relative:
+            self.__fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_CLOEXEC", 0))
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def __enter__(self) -> "DirectoryHandle":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        fd, self.__fd = self.__fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def scandir(self) -> Iterator[os.DirEntry]:
+        """
+        :return: Iterator of the entries of the directory, which must be closed (see 'os.scandir')
+        """
+        return os.scandir(self.__path if self.__fd is None else self.__fd)
+
+    def rename(self, src: str, dst: str) -> None:
+        """
+        :param src: Name of the entry
+        :param dst: Name the entry is renamed to, replacing any file of that name
+        :return: None
+        """
+        fd = self.__fd
+        if fd is None:
+            os.rename(join(self.__path, src), join(self.__path, dst))
+        else:
+            os.rename(src, dst, src_dir_fd=fd, dst_dir_fd=fd)
+
+    def open(self, name: str, flags: int, mode: int = 0o777) -> int:
+        """
+        Opens an entry of the directory, which may be used as the opener of the builtin 'open'.
+
+        :param name: Name of the entry
+        :param flags: Flags of the file descriptor (see 'os.open')
+        :param mode: Mode of a created file
+        :return: File descriptor of the entry
+        """
+        if self.__fd is None:
+            return os.open(join(self.__path, name), flags, mode)
+        return os.open(name, flags, mode, dir_fd=self.__fd)
+
+    def stat(self, name: str) -> os.stat_result:
+        """
+        :param name: Name of the entry
+        :return: Status of the entry, following a symbolic link
+        """
+        if self.__fd is None:
+            return os.stat(join(self.__path, name))
+        return os.stat(name, dir_fd=self.__fd)
+
+    def lstat(self, name: str) -> os.stat_result:
+        """
+        :param name: Name of the entry
+        :return: Status of the entry, without following a symbolic link
+        """
+        if self.__fd is None:
+            return os.lstat(join(self.__path, name))
+        return os.stat(name, dir_fd=self.__fd, follow_symlinks=False)
+
+    def lexists(self, name: str) -> bool:
+        """
+        :param name: Name of the entry
+        :return: True if the directory has an entry of the name, including a broken symbolic link
+        """
+        try:
+            self.lstat(name)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def exchange(self, a: str, b: str) -> bool:
+        """
+        :param a: Name of the first entry
+        :param b: Name of the second entry
+        :return: True if the entries were exchanged (see 'exchange')
+        """
+        if self.__fd is None:
+            return exchange(join(self.__path, a), join(self.__path, b))
+        return exchange(a, b, self.__fd)
@@ -0,0 +1,182 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Timestamps embedded in the headers of media files, read with small bounded reads rather than whole files.
+
+    JPEG        EXIF DateTimeOriginal (or DateTimeDigitized, or DateTime), with its sub-second time
+    MP4/MOV     Creation time of the movie header ('mvhd'), wherever the 'moov' box is in the file
+"""
+
+import struct
+from calendar import timegm
+from re import compile
+from time import mktime, strptime
+from typing import BinaryIO, Callable, Optional
+
+HEADER_SIZE = 1 << 16  # Bytes read from the start of a JPEG, which bound an EXIF segment
+_MAX_BOXES = 64  # Top-level boxes of an MP4 which are skipped in search of the movie header
+_MP4_EPOCH = 2082844800  # Seconds from 1904-01-01, the epoch of MP4 times, to 1970-01-01
+_MP4_TYPES = (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip")
+
+# EXIF tags (see the EXIF 2.3 specification)
+_EXIF_IFD, _DATE_TIME = 0x8769, 0x0132
+_DATE_TIME_ORIGINAL, _DATE_TIME_DIGITIZED = 0x9003, 0x9004
+_SUB_SEC_ORIGINAL, _SUB_SEC_DIGITIZED = 0x9291, 0x9292
+_OFFSET_TIME, _OFFSET_ORIGINAL, _OFFSET_DIGITIZED = 0x9010, 0x9011, 0x9012
+_offset_pattern = compile(r"^([+-])([0-9]{2}):([0-9]{2})$")  # UTC offset of an EXIF time, e.g. '-05:00'
+
+
+def read_timestamp(path: str, opener: Optional[Callable[[str, int], int]] = None) -> Optional[float]:
+    """
+    :param path: Path to the file
+    :param opener: Opener of the file (see the builtin 'open'), e.g. relative to a directory's file descriptor
+    :return: Seconds since the epoch at which the file was captured, or None if its header has no timestamp,
+        or is truncated, malformed or unreadable
+    """
+    try:
+        with open(path, "rb", opener=opener) as f:
+            head = f.read(16)
+            if head[:2] == b"\xff\xd8":
+                return _jpeg_timestamp(head + f.read(HEADER_SIZE - len(head)))
+            if head[4:8] in _MP4_TYPES:
+                return _mp4_timestamp(f)
+    except (OSError, struct.error, ValueError, OverflowError):
+        return None
+    return None
+
+
+def _jpeg_timestamp(data: bytes) -> Optional[float]:
+    """
+    :param data: Start of a JPEG file
+    :return: Timestamp of its EXIF segment, or None if it has none
+    """
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker, length = data[pos + 1], struct.unpack_from(">H", data, pos + 2)[0]
+        if marker in (0xD9, 0xDA):  # End of image, or start of the image data
+            break
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\0\0":
+            return _tiff_timestamp(data[pos + 10:pos + 2 + length])
+        pos += 2 + length
+    return None
+
+
+def _tiff_timestamp(tiff: bytes) -> Optional[float]:
+    """
+    :param tiff: TIFF structure of an EXIF segment
+    :return: Timestamp of the EXIF data, or None if it has none
+    """
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return None
+    try:
+        ifd0 = _read_ifd(tiff, order, struct.unpack_from(order + "I", tiff, 4)[0])
+        exif = _read_ifd(tiff, order, ifd0[_EXIF_IFD]) if _EXIF_IFD in ifd0 else {}
+        for tag, sub, offset in ((_DATE_TIME_ORIGINAL, _SUB_SEC_ORIGINAL, _OFFSET_ORIGINAL),
+                                 (_DATE_TIME_DIGITIZED, _SUB_SEC_DIGITIZED, _OFFSET_DIGITIZED)):
+            if tag in exif:
+                return _exif_time(exif[tag], exif.get(sub), exif.get(offset))
+        return _exif_time(ifd0[_DATE_TIME], None, exif.get(_OFFSET_TIME)) if _DATE_TIME in ifd0 else None
+    except (struct.error, ValueError):  # Truncated or malformed
+        return None
+
+
+def _read_ifd(tiff: bytes, order: str, offset: int) -> dict:
+    """
+    :param tiff: TIFF structure
+    :param order: Byte order of the structure
+    :param offset: Offset of the image file directory within the structure
+    :return: Values of the directory's ASCII and pointer tags, by tag
+    """
+    values = {}
+    for i in range(struct.unpack_from(order + "H", tiff, offset)[0]):
+        tag, kind, count, value = struct.unpack_from(order + "HHII", tiff, offset + 2 + 12 * i)
+        if kind == 2:  # ASCII, stored within the entry if it fits
+            start = offset + 2 + 12 * i + 8 if count <= 4 else value
+            values[tag] = tiff[start:start + count].split(b"\0")[0].decode("ascii", "replace")
+        elif kind in (4, 13):  # Long or IFD pointer
+            values[tag] = value
+    return values
+
+
+def _exif_time(text: str, sub_second: Optional[str], offset: Optional[str]) -> float:
+    """
+    :param text: EXIF date and time, e.g. '2021:07:14 18:03:59', in the camera's local time
+    :param sub_second: Fraction of the second, as its decimal digits
+    :param offset: UTC offset of the camera's local time, e.g. '+09:00' (None if unknown)
+    :return: Seconds since the epoch, comparable with modification times and MP4 times, where a time
+        without a UTC offset is taken to be in this machine's time zone
+    """
+    fields = strptime(text.strip(), "%Y:%m:%d %H:%M:%S")
+    match = _offset_pattern.match((offset or "").strip())
+    if match is None:
+        seconds = mktime(fields)
+    else:
+        sign = -1 if match.group(1) == "-" else 1
+        seconds = timegm(fields) - sign * (int(match.group(2)) * 3600 + int(match.group(3)) * 60)
+    digits = (sub_second or "").strip()
+    return seconds + (int(digits) / 10 ** len(digits) if digits.isdigit() else 0)
+
+
+def _mp4_timestamp(f: BinaryIO) -> Optional[float]:
+    """
+    :param f: MP4 or QuickTime file
+    :return: Creation time of the movie header, or None if it has none
+    """
+    f.seek(0)
+    for _ in range(_MAX_BOXES):
+        start = f.tell()
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", header)
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return None
+            size = struct.unpack(">Q", large)[0]
+        if kind == b"moov":
+            return _mvhd_timestamp(f.read(min(size, 1 << 12)))
+        if size < 8:  # Box extends to the end of the file, or is malformed
+            return None
+        f.seek(start + size)
+    return None
+
+
+def _mvhd_timestamp(moov: bytes) -> Optional[float]:
+    """
+    :param moov: Start of the content of a 'moov' box
+    :return: Creation time of its movie header, or None if it has none
+    """
+    pos = 0
+    while pos + 8 <= len(moov):
+        size, kind = struct.unpack_from(">I4s", moov, pos)
+        if kind == b"mvhd":
+            if pos + 12 > len(moov):  # Truncated before the version and flags
+                return None
+            version = moov[pos + 8]
+            fmt = ">Q" if version == 1 else ">I"
+            if pos + 12 + struct.calcsize(fmt) > len(moov):
+                return None
+            created = struct.unpack_from(fmt, moov, pos + 12)[0]
+            return float(created - _MP4_EPOCH) if created > 0 else None
+        if size < 8:
+            return None
+        pos += size
+    return None
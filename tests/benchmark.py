@@ -0,0 +1,176 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Benchmarks each stage of a rename against synthesized directories of increasing size.
+
+    $ PYTHONPATH=src python tests/benchmark.py --sizes 1000 100000 --memory -o bench.json
+
+Directories are synthesized in a temporary directory, on tmpfs (/dev/shm) when available such that
+the storage medium does not dominate the measurements. Results are reported as JSON, one record
+per (size, stage), so regressions can be compared across versions.
+"""
+
+import os
+import sys
+import json
+import platform
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from core import numeric
+from core.version import __version__
+from core.directory import ConcreteDirectory
+from core.decorators import (ShifterDecorator, NumeratedDecorator, FlattenDecorator, ZeroesDecorator,
+                             FormatDecorator, ExtensionDecorator, RandomizeDecorator)
+from core.pipeline import compile_pipeline, run_stages
+from core.scheduler import schedule_renames
+
+SIZES = (1000, 10000, 100000, 1000000)
+TMPFS = "/dev/shm"
+
+
+class Recorder:
+    def __init__(self, memory: bool):
+        """
+        Collects the measurements of every benchmarked stage.
+
+        :param memory: True if the peak memory of each stage should be traced (slows down every stage)
+        """
+        self.__memory = memory
+        self.results = []
+
+    @contextmanager
+    def stage(self, files: int, name: str, **extra):
+        """
+        Measures the code run within the context as a single stage.
+
+        :param files: Number of files the stage operates on
+        :param name: Name of the stage
+        :param extra: Additional fields to be reported with the stage
+        """
+        if self.__memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        yield extra
+        seconds = perf_counter() - start
+        record = {"files": files, "stage": name, "seconds": round(seconds, 6),
+                  "files_per_second": round(files / seconds) if seconds > 0 else None}
+        if self.__memory:
+            record["peak_bytes"] = tracemalloc.get_traced_memory()[1] - base
+        record.update(extra)
+        self.results.append(record)
+        print("{:>9} files  {:<12} {:>10.4f}s".format(files, name, seconds), file=sys.stderr)
+
+
+def synthesize(path: str, n: int) -> None:
+    """
+    Creates empty files with realistic camera dump names, e.g. "Vacation 2021 IMG_0000042.jpg".
+    Every other number is skipped such that the numbering is sparse.
+
+    :param path: Directory in which to create the files
+    :param n: Number of files to be created
+    """
+    for i in range(n):
+        open(os.path.join(path, "Vacation 2021 IMG_{:07d}.jpg".format(2 * i + 1)), "x").close()
+
+
+def bench(recorder: Recorder, root: str, n: int) -> None:
+    """
+    Benchmarks every stage against a directory of the specified size.
+
+    :param recorder: Recorder of the measurements
+    :param root: Directory in which the synthesized directory is created
+    :param n: Number of files
+    """
+    with TemporaryDirectory(dir=root) as path:
+        synthesize(path, n)
+
+        with recorder.stage(n, "scan"):
+            directory = ConcreteDirectory(path)
+        with recorder.stage(n, "numerate"):
+            compile_pipeline(NumeratedDecorator(directory)).run()
+        files = directory.get_files()
+        for name, dec in (("shift", ShifterDecorator(directory, 3)), ("format", FormatDecorator(directory, ["P $d"])),
+                          ("extension", ExtensionDecorator(directory, "jpeg")), ("zeroes", ZeroesDecorator(directory)),
+                          ("flatten", FlattenDecorator(directory)), ("random", RandomizeDecorator(directory, 42))):
+            with recorder.stage(n, name):
+                run_stages(dec.stages(), files)
+        with recorder.stage(n, "render"):
+            renamed = files.render_all()
+        with recorder.stage(n, "plan") as extra:
+            chains = schedule_renames(dict(zip(files.names, renamed)), directory.get_unselected())
+            extra["renames"] = sum(len(chain) for chain in chains)
+
+        # Chains: Every file is renamed into a vacant name
+        directory = ConcreteDirectory(path)
+        compile_pipeline(ShifterDecorator(NumeratedDecorator(directory), 1)).run()
+        with recorder.stage(n, "save_chain", renames=n):
+            directory.save_files()
+
+        # Worst case: The numbers of all files are shuffled amongst each other, which produces cycles
+        directory = ConcreteDirectory(path)
+        compile_pipeline(RandomizeDecorator(NumeratedDecorator(directory), 839693)).run()
+        with recorder.stage(n, "save_cycles"):
+            directory.save_files()
+
+
+def main():
+    args = ArgumentParser(description="Benchmarks each stage of a rename against synthesized directories")
+    args.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                      help="Number of files of each synthesized directory (default: 1k, 10k, 100k, 1M)")
+    args.add_argument("--dir", type=str, default=None,
+                      help="Directory in which to synthesize directories (default: tmpfs, if available)")
+    args.add_argument("--memory", action="store_true", help="Traces the peak memory of each stage")
+    args.add_argument("--python", action="store_true", help="Disables the NumPy backend")
+    args.add_argument("-o", "--output", type=str, default=None, help="Path of the JSON report (default: stdout)")
+    args = args.parse_args()
+
+    root = args.dir
+    if root is None and os.path.isdir(TMPFS) and os.access(TMPFS, os.W_OK):
+        root = TMPFS
+    if args.python:
+        numeric.set_vectorized(False)
+    if args.memory:
+        tracemalloc.start()
+
+    recorder = Recorder(args.memory)
+    for n in args.sizes:
+        bench(recorder, root, n)
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": numeric.is_vectorized(),
+        "directory": root,
+        "results": recorder.results,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
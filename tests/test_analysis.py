@@ -0,0 +1,57 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from core import analysis
+from core.analysis import find_numbers
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.shard_size, analysis.SHARD_SIZE = analysis.SHARD_SIZE, 2  # Shards of two filenames
+
+    def tearDown(self):
+        analysis.SHARD_SIZE = self.shard_size
+
+    def test_shards(self):
+        names = ["cam1 10.jpg", "cam2 11.jpg", "cam1 12.jpg", "cam2 13.jpg", "cam3 9.jpg"]
+        for workers in (1, 3):  # Run 0 is only duplicated across shards
+            index, nums = find_numbers(names, workers=workers)
+            self.assertEqual((index, list(nums)), (1, [10, 11, 12, 13, 9]))
+        self.assertEqual(list(find_numbers(names, 1, 3)[1]), [10, 11, 12, 13, 9])
+        self.assertRaises(Exception, lambda: find_numbers(names, 0, 3))
+
+    def test_errors(self):
+        with redirect_stdout(StringIO()) as out:
+            self.assertRaisesRegex(Exception, r"a1 b4 \(ambiguous numbering: 1, 4\)",
+                                   lambda: find_numbers(["a1 b4", "a2 b5", "a3 b6"], workers=2))
+        self.assertEqual(out.getvalue(), "")  # Nothing is printed, as the output may be a stream of records
+        self.assertRaises(Exception, lambda: find_numbers(["a1", "a1", "b"], workers=2))
+        self.assertRaises(Exception, lambda: find_numbers([], workers=2))
+        big = ["{} {}".format(10 ** 30 + i % 2, i) for i in range(4)]  # Runs which do not fit are kept as lists
+        self.assertEqual(list(find_numbers(big, workers=2)[1]), [0, 1, 2, 3])
+        ids = ["{}.jpg".format(10 ** 19 + i) for i in range(3)]  # Unique, but too large for a file number
+        for workers in (1, 2):
+            self.assertRaisesRegex(Exception, "too large", lambda: find_numbers(ids, workers=workers))
+
+
+if __name__ == '__main__':
+    unittest.main()
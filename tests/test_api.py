@@ -0,0 +1,89 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from core.api import plan
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = self.tmp.name
+        for name in ("a7.jpg", "a3.jpg", "a5.jpg", "notes.txt"):
+            open(os.path.join(self.path, name), "w").close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_plan(self):
+        for memory in (None, 1 << 10):
+            renames = plan(self.path, fmt="IMG $d", consecutive=True, include="a*", memory=memory)
+            self.assertEqual(list(renames), [("a3.jpg", "IMG 3.jpg"), ("a5.jpg", "IMG 4.jpg"), ("a7.jpg", "IMG 5.jpg")])
+            stream = StringIO()
+            self.assertEqual(renames.dry_run(stream, "tsv"), 3)
+            self.assertEqual(stream.getvalue().splitlines()[0], "a3.jpg\tIMG 3.jpg")
+            self.assertEqual(len(os.listdir(self.path)), 4)  # Nothing was renamed
+        self.assertRaises(ValueError, lambda: plan(self.path, random=1, memory=1 << 10))
+
+    def test_operations(self):
+        for memory in (None, 1 << 10):
+            operations = list(plan(self.path, shift=-2, fmt="a$d", include="a*", memory=memory).operations())
+            if memory is None:  # Performed from the vacant end of the chain
+                self.assertEqual(operations, [("a3.jpg", "a1.jpg"), ("a5.jpg", "a3.jpg"), ("a7.jpg", "a5.jpg")])
+            names = set(os.listdir(self.path))
+            for src, dst in operations:  # No file is overwritten
+                self.assertIn(src, names)
+                self.assertNotIn(dst, names)
+                names.remove(src)
+                names.add(dst)
+            self.assertEqual(names, {"a1.jpg", "a3.jpg", "a5.jpg", "notes.txt"})
+            self.assertEqual(len(os.listdir(self.path)), 4)  # Nothing was renamed
+
+    def test_lazy(self):
+        renames = plan(os.path.join(self.path, "missing"))  # Not scanned until used
+        self.assertRaises(Exception, lambda: next(iter(renames)))
+
+    def test_apply(self):
+        renames = plan(self.path, shift=1, zeroes=2, include=["*.jpg"])
+        self.assertEqual(renames.apply(), 3)
+        self.assertEqual(sorted(os.listdir(self.path)), ["04.jpg", "06.jpg", "08.jpg", "notes.txt"])
+        self.assertRaises(Exception, renames.apply)  # Only once
+        self.assertEqual(plan(self.path, ext="png", include="*.jpg", memory=1 << 10).apply(threads=2), 3)
+        self.assertEqual(sorted(os.listdir(self.path)), ["4.png", "6.png", "8.png", "notes.txt"])
+        for memory in (None, 1 << 10):
+            self.assertEqual(plan(self.path, include="*.png", memory=memory).apply(), 0)  # Unchanged files
+
+    def test_retry(self):
+        for memory in (None, 1 << 10):
+            blocker = os.path.join(self.path, "IMG 3.jpg")
+            open(blocker, "w").close()  # Not selected, so it must not be overwritten
+            renames = plan(self.path, fmt="IMG $d", include="a*", memory=memory)
+            self.assertRaises(Exception, renames.apply)
+            os.remove(blocker)
+            self.assertEqual(renames.apply(), 3)
+            self.assertEqual(sorted(os.listdir(self.path)), ["IMG 3.jpg", "IMG 5.jpg", "IMG 7.jpg", "notes.txt"])
+            for name, original in (("IMG 3.jpg", "a3.jpg"), ("IMG 5.jpg", "a5.jpg"), ("IMG 7.jpg", "a7.jpg")):
+                os.rename(os.path.join(self.path, name), os.path.join(self.path, original))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,6 +22,10 @@ import re
 from core.directory import ConcreteDirectory
 from core.decorators import (ShifterDecorator, NumeratedDecorator, FlattenDecorator, ZeroesDecorator,
                              FormatDecorator, ExtensionDecorator, RandomizeDecorator)
+from core.pipeline import compile_pipeline
+from core.profiler import Profiler
+from core.table import FileMetadata, FileTable
+from core.template import Template, LITERAL, NUMBER, CAPTURE, NAME
 
 
 class MyTestCase(unittest.TestCase):
@@ -31,6 +35,15 @@ class MyTestCase(unittest.TestCase):
         d = ConcreteDirectory(MyTestCase.__TESTING_PATH)
         self.assertEqual(True, True)
 
+    def test_directory_include(self):
+        d = ConcreteDirectory(MyTestCase.__TESTING_PATH, include=["re:^1[0-9]"])
+        self.assertEqual(sorted(d.get_files()), ["10.mp3", "11.mp3", "12.mp3", "13.mp3", "14.mp3", "15.mp3"])
+
+    def test_directory_exclude(self):
+        d = ConcreteDirectory(MyTestCase.__TESTING_PATH, include=["*.mp3"], exclude=["1*", "5.mp3"])
+        self.assertEqual(sorted(d.get_files()), ["6.mp3", "7.mp3", "8.mp3", "9.mp3"])
+        self.assertIn("5.mp3", d.get_unselected())
+
     def test_shift_decorator1(self):
         d = ConcreteDirectory(MyTestCase.__TESTING_PATH)
         d.operate()
@@ -98,6 +111,21 @@ class MyTestCase(unittest.TestCase):
         f: str = str(f[1])
         self.assertTrue(re.match(r"My Test Episode \([0-9]+\)", f))
 
+    def test_format_decorator4(self):
+        d = ConcreteDirectory(MyTestCase.__TESTING_PATH)
+        d = NumeratedDecorator(d)
+        d = ZeroesDecorator(FormatDecorator(d, ["Track $1 {$d} ($n) $$3", r"([0-9])([0-9]*)\.mp3"]), 2)
+        d.operate()
+        self.assertEqual(str(d.get_files()["12.mp3"]), "Track 1 {12} (12) $3.mp3")
+        self.assertEqual(str(d.get_files()["7.mp3"]), "Track 7 {07} (7) $3.mp3")
+
+    def test_template1(self):
+        t = Template("$1x$d-$n$3", 2)
+        self.assertEqual(t.segments, ((CAPTURE, 0), (LITERAL, "x"), (NUMBER, None), (LITERAL, "-"), (NAME, None),
+                                      (LITERAL, "$3")))
+        self.assertEqual(t.render("04", "png", "img", ("a", "b")), "ax04-img$3.png")
+        self.assertRaises(ValueError, lambda: Template("$1", 1))
+
     def test_ext_decorator1(self):
         d = ConcreteDirectory(MyTestCase.__TESTING_PATH)
         d = NumeratedDecorator(d)
@@ -118,6 +146,81 @@ class MyTestCase(unittest.TestCase):
         d = RandomizeDecorator(d)
         d.operate()
 
+    def test_pipeline1(self):
+        def chain(d):
+            d = ShifterDecorator(NumeratedDecorator(d), -2)
+            d = FormatDecorator(d, ["Track $d"])
+            return ExtensionDecorator(ZeroesDecorator(d, 0), "ogg")
+
+        a = ConcreteDirectory(MyTestCase.__TESTING_PATH)
+        chain(a).operate()
+        b = ConcreteDirectory(MyTestCase.__TESTING_PATH)
+        pipeline = compile_pipeline(chain(b))
+        self.assertEqual(len(pipeline), 4)  # [Numerated], [Shift + Format], [Zeroes], [Extension]
+        pipeline.run()
+        self.assertEqual({k: str(v) for k, v in a.get_files().items()}, {k: str(v) for k, v in b.get_files().items()})
+        self.assertEqual(str(b.get_files()["5.mp3"]), "Track 03.ogg")
+
+    def test_profiler1(self):
+        profiler = Profiler()
+        d = ConcreteDirectory(MyTestCase.__TESTING_PATH, profiler=profiler)
+        compile_pipeline(FormatDecorator(ShifterDecorator(NumeratedDecorator(d), 1), ["$d"])).run(profiler)
+        records = {r.name: r for r in profiler.records}
+        self.assertEqual(list(records), ["scan", "NumeratedDecorator", "ShifterDecorator+FormatDecorator"])
+        self.assertEqual(records["scan"].files, len(d.get_files()))
+        self.assertEqual(records["scan"].syscalls, 0)  # Calls made by the scan are not counted
+        profiler.merge(profiler.to_tuples())
+        self.assertEqual(profiler.records[0].files, 2 * len(d.get_files()))
+
+    def test_file_table1(self):
+        t = FileTable(["b7.png", "a3.jpg", "c1.png"])
+        self.assertRaises(Exception, lambda: t.nums)
+        self.assertIsNone(t["a3.jpg"].num)
+        t.nums = [7, 3, 1]
+        t.width = 2
+        t.fill_fmt("Photo $d", 1)
+        t.fill_ext("gif", 2)
+        self.assertEqual([str(v) for v in t.values()], ["07.png", "Photo 03.jpg", "Photo 01.gif"])
+        self.assertRaises(ValueError, lambda: t.fill_fmt("Photo"))
+
+    def test_file_table_large(self):
+        t = FileTable(["20240101123456789012.jpg", "b2.jpg"])
+        with self.assertRaisesRegex(Exception, "too large"):
+            t.nums = [20240101123456789012, 2]
+        with self.assertRaisesRegex(Exception, "too large"):
+            t["b2.jpg"].num = 1 << 63
+        with self.assertRaisesRegex(Exception, "too large"):
+            t.nums = [1, -(1 << 64)]
+
+    def test_file_table_order1(self):
+        t = FileTable(["b7.png", "a3.jpg", "c1.png", "d5.png"])
+        t.nums = [7, 3, 1, 5]
+        self.assertFalse(t.has_order)
+        self.assertEqual(list(t.order()), [2, 1, 3, 0])
+        t.nums[0] += 100  # Order preserving change, which need not invalidate the order
+        self.assertEqual((t.largest(), list(t.order())), (107, [2, 1, 3, 0]))
+        t.set_num(0, 0)
+        self.assertFalse(t.has_order)
+        self.assertEqual(list(t.order()), [0, 2, 1, 3])
+
+    def test_file_table_order2(self):
+        d = ZeroesDecorator(FlattenDecorator(ShifterDecorator(NumeratedDecorator(
+            ConcreteDirectory(MyTestCase.__TESTING_PATH)), 5), 1))
+        d.operate()
+        files = d.get_files()
+        self.assertTrue(files.has_order)  # Sorted once by the flatten, then reused
+        self.assertEqual(list(files.order()), sorted(range(len(files)), key=files.nums.__getitem__))
+        self.assertEqual(files.largest(), len(files))
+
+    def test_file_metadata1(self):
+        v = FileMetadata("Episode 4.mkv")
+        self.assertEqual((v.name, v.ext, v.fmt), ("Episode 4.mkv", "mkv", "$d"))
+        v.num = 4
+        v.fnum = "004"
+        v.ext = "mp4"
+        self.assertEqual(str(v), "004.mp4")
+        self.assertRaises(ValueError, lambda: FileMetadata("README"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from tempfile import TemporaryDirectory
+
+from core.cache import CachedScan, ScanCache
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cache = ScanCache(os.path.join(self.tmp.name, "cache"), capacity=2)
+        self.dirs = []
+        for i in range(3):
+            path = os.path.join(self.tmp.name, str(i))
+            os.mkdir(path)
+            open(os.path.join(path, "a1.jpg"), "w").close()
+            os.utime(path, ns=(10 ** 18, 10 ** 18))  # Not modified within a timestamp tick of being cached
+            self.dirs.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load(self):
+        path, scan = self.dirs[0], CachedScan(["a1.jpg"], {"notes"}, 0)
+        self.cache.store(path, ScanCache.signature(path), scan, ["*.jpg"])
+        self.assertEqual(self.cache.load(path, ScanCache.signature(path), ["*.jpg"]), scan)
+        self.assertIsNone(self.cache.load(path, ScanCache.signature(path)))  # Different filter
+        os.rename(os.path.join(path, "a1.jpg"), os.path.join(path, "a2.jpg"))
+        os.utime(path, ns=(0, 0))  # Modification time differs, even on a coarse file system clock
+        self.assertIsNone(self.cache.load(path, ScanCache.signature(path), ["*.jpg"]))
+
+    def test_evict(self):
+        root = os.path.join(self.tmp.name, "cache")
+        for path in self.dirs[:2]:
+            self.cache.store(path, ScanCache.signature(path), CachedScan(["a1.jpg"], set(), None))
+        for name in os.listdir(root):
+            os.utime(os.path.join(root, name), ns=(0, 0))
+        self.assertIsNotNone(self.cache.load(self.dirs[0], ScanCache.signature(self.dirs[0])))  # Now most recent
+        self.cache.store(self.dirs[2], ScanCache.signature(self.dirs[2]), CachedScan(["a1.jpg"], set(), None))
+        self.assertEqual(len(os.listdir(root)), 2)
+        self.assertIsNotNone(self.cache.load(self.dirs[0], ScanCache.signature(self.dirs[0])))
+        self.assertIsNone(self.cache.load(self.dirs[1], ScanCache.signature(self.dirs[1])))
+
+    def test_racy(self):
+        path = self.dirs[0]
+        os.utime(path)  # Just modified, such that an entry added later in the same tick may go unnoticed
+        signature = ScanCache.signature(path)
+        self.assertTrue(signature.racy)
+        self.cache.store(path, signature, CachedScan(["a1.jpg"], set(), None))
+        self.assertIsNone(self.cache.load(path, signature))
+        self.assertFalse(ScanCache.signature(self.dirs[1]).racy)
+
+
+if __name__ == '__main__':
+    unittest.main()
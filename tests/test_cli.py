@@ -45,6 +45,36 @@ class MyTestCase(unittest.TestCase):
             except SystemExit as e:
                 self.assertEquals(e.code, 0)
 
+    def test_batch_conflicts(self):
+        for flags in (["--resume"], ["--undo"], ["--watch"], ["--memory", "64"], ["--plan-out", "p.plan"], ["-r"]):
+            err = StringIO()
+            with self.assertRaises(SystemExit) as e:
+                main(["--batch", "jobs.json"] + flags, err=err)
+            self.assertEqual(e.exception.code, 2)  # Usage error, before the manifest is read
+            self.assertIn("--batch cannot be combined", err.getvalue())
+
+
+    def test_memory(self):
+        for memory in ("0", "-5"):
+            err = StringIO()
+            with self.assertRaises(SystemExit) as e:
+                main([".", "--memory", memory], err=err)
+            self.assertEqual(e.exception.code, 2)
+            self.assertIn("--memory must be a positive", err.getvalue())
+
+    def test_recovery_conflicts(self):
+        err = StringIO()
+        with self.assertRaises(SystemExit) as e:
+            main([".", "--resume", "--undo"], err=err)
+        self.assertEqual(e.exception.code, 2)
+        self.assertIn("not allowed with argument", err.getvalue())
+
+    def test_watch_conflicts(self):
+        for flags in (["--memory", "64"], ["--cache"]):
+            with self.assertRaises(SystemExit) as e:
+                main([".", "--watch"] + flags)
+            self.assertIn("--watch cannot be combined", str(e.exception.code))
+
 
 if __name__ == '__main__':
     unittest.main()
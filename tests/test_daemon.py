@@ -0,0 +1,84 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+
+from core.client import request
+from core.daemon import PathLocks, RenamerServer
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "photos")
+        os.mkdir(self.path)
+        for name in ("IMG_4.jpg", "IMG_9.jpg"):
+            open(os.path.join(self.path, name), "w").close()
+        self.socket = os.path.join(self.tmp.name, "renamer.sock")
+        self.server = RenamerServer(self.socket)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self, *argv: str) -> tuple:
+        out, err = BytesIO(), BytesIO()
+        status = request(list(argv), out, err, self.socket, self.tmp.name)
+        return status, out.getvalue().decode(), err.getvalue().decode()
+
+    def test_request(self):
+        status, out, _ = self.request("photos", "-c", "-o", "tsv", "--sort")
+        self.assertEqual((status, out), (0, "IMG_4.jpg\t4.jpg\nIMG_9.jpg\t5.jpg\n"))
+        self.assertEqual(self.request("photos", "-c", "-y", "-m")[0], 0)
+        self.assertEqual(sorted(os.listdir(self.path)), ["4.jpg", "5.jpg"])
+
+    def test_errors(self):
+        status, _, err = self.request("--shift", "x", "photos")
+        self.assertEqual(status, 2)
+        self.assertIn("invalid int value", err)
+        status, _, err = self.request("missing")
+        self.assertEqual(status, 1)
+        self.assertEqual(self.request("photos", "--watch")[0], 2)
+
+    def test_locks(self):
+        locks, order = PathLocks(), []
+
+        def hold(path: str):
+            with locks.hold([path]):
+                order.append(path)
+
+        with locks.hold([self.path]):
+            thread = Thread(target=hold, args=(self.tmp.name,))  # Parent of the held directory
+            thread.start()
+            with locks.hold([os.path.join(self.tmp.name, "other")]):
+                pass  # Sibling of the held directory
+            sleep(0.1)
+            self.assertEqual(order, [])
+        thread.join()
+        self.assertEqual(order, [self.tmp.name])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from tempfile import TemporaryDirectory
+
+from core.directory import ConcreteDirectory
+from core.external import ExternalPlan, SpillSorter
+from core.jobs import build_chain
+from core.pipeline import compile_pipeline
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = self.tmp.name
+        for i in range(1, 301, 3):
+            open(os.path.join(self.path, "S01 E{}.mkv".format(i)), "w").close()
+        os.mkdir(os.path.join(self.path, "5.mkv"))  # Never overwritten
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected(self, options: dict) -> list:
+        directory = ConcreteDirectory(self.path)
+        compile_pipeline(build_chain(directory, **options)).run()
+        files = directory.get_files()
+        renamed = files.render_all()
+        return [(files.names[row], renamed[row]) for row in sorted(range(len(files)), key=files.nums.__getitem__)]
+
+    def test_sorter(self):
+        sorter = SpillSorter(self.path, memory=100)  # Spills every few records
+        for i in range(1000):
+            sorter.add((i * 7919) % 1000)
+        self.assertEqual(list(sorter), list(range(1000)))
+        self.assertGreater(len(os.listdir(self.path)), 100)
+
+    def test_plan(self):
+        for options in ({"shift": 2}, {"consecutive": True, "zeroes": 0}, {"fmt": ["$1 Ep $d", r"S(\d+) .*"]},
+                        {"consecutive": True, "start": 10, "ext": "mp4", "zeroes": 4}):
+            with ExternalPlan(self.path, options, memory=1 << 10) as plan:
+                self.assertEqual(list(plan.renames()), self.expected(options))
+
+    def test_save(self):
+        expected = self.expected({"shift": 3})
+        with ExternalPlan(self.path, {"shift": 3}, memory=1 << 10) as plan:
+            plan.save_files(threads=4)
+        self.assertEqual(sorted(os.listdir(self.path)), sorted([new for _, new in expected] + ["5.mkv"]))
+        expected = self.expected({"shift": -3})
+        with ExternalPlan(self.path, {"shift": -3}, memory=1 << 10) as plan:  # Each file into the next's name
+            plan.save_files()
+        self.assertEqual(sorted(os.listdir(self.path)), sorted([new for _, new in expected] + ["5.mkv"]))
+
+    def test_conflict(self):
+        with self.assertRaises(Exception):
+            ExternalPlan(self.path, {"consecutive": True, "start": 1})  # 5.mkv is a directory
+        self.assertRaises(ValueError, lambda: ExternalPlan(self.path, {"random": 3}))
+        self.assertRaises(ValueError, lambda: ExternalPlan(self.path, {}, memory=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+from util.directedgraph import DirectedGraph
+
+
+class MyTestCase(unittest.TestCase):
+    @staticmethod
+    def build(vertices, edges) -> DirectedGraph:
+        g = DirectedGraph()
+        for v in vertices:
+            g.add_vertex(v)
+        for v, e in edges:
+            g.add_edge(v, e)
+        return g
+
+    def test_add_edge(self):
+        g = MyTestCase.build("ab", [("a", "b")])
+        self.assertFalse(g.add_vertex("a"))
+        self.assertFalse(g.add_edge("a", "b"))
+        self.assertRaises(ValueError, lambda: g.add_edge("a", "a"))
+        self.assertRaises(ValueError, lambda: g.add_edge("a", "z"))
+        self.assertEqual(list(g.successors("a")), ["b"])
+
+    def test_topological_sort(self):
+        g = MyTestCase.build("dcba", [("a", "b"), ("b", "c"), ("a", "c"), ("d", "a")])
+        self.assertEqual(g.topological_sort(), ["d", "a", "b", "c"])
+
+    def test_topological_sort_cycle(self):
+        g = MyTestCase.build("abc", [("a", "b"), ("b", "c"), ("c", "a")])
+        self.assertRaises(ValueError, g.topological_sort)
+
+    def test_find_cycles(self):
+        g = MyTestCase.build("abcdef", [("a", "b"), ("b", "a"), ("c", "d"), ("d", "e"), ("e", "c"), ("e", "f")])
+        cycles = sorted(sorted(c) for c in g.find_cycles())
+        self.assertEqual(cycles, [["a", "b"], ["c", "d", "e"]])
+        for cycle in g.find_cycles():
+            for i, v in enumerate(cycle):
+                self.assertIn(cycle[(i + 1) % len(cycle)], list(g.successors(v)))
+
+    def test_deep_graph(self):
+        n = 200000  # Far beyond the interpreter's recursion limit
+        g = MyTestCase.build(range(n), [(i, i + 1) for i in range(n - 1)])
+        self.assertEqual(g.topological_sort(), list(range(n)))
+        g.add_edge(n - 1, 0)
+        self.assertEqual(len(g.strongly_connected_components()), 1)
+        self.assertEqual(len(g.find_cycles()[0]), n)
+
+
+if __name__ == '__main__':
+    unittest.main()
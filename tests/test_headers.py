@@ -0,0 +1,132 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import struct
+import time
+from calendar import timegm
+from tempfile import TemporaryDirectory
+
+from core.decorators import MetadataNumeratedDecorator
+from core.directory import ConcreteDirectory
+from util.headers import read_timestamp
+
+
+def jpeg(taken: bytes, sub_second: bytes = b"25\0", offset: bytes = None) -> bytes:
+    ifd0 = struct.pack("<HHHII I", 1, 0x8769, 4, 1, 26, 0)  # Pointer to the EXIF IFD
+    values = [(0x9003, taken + b"\0"), (0x9291, sub_second)] + ([(0x9011, offset + b"\0")] if offset else [])
+    entries, data, start = b"", b"", 26 + 2 + 12 * len(values) + 4
+    for tag, value in values:  # ASCII values, stored within the entry if they fit
+        inline = len(value) <= 4
+        entries += struct.pack("<HHI", tag, 2, len(value)) + \
+            (value.ljust(4, b"\0") if inline else struct.pack("<I", start + len(data)))
+        data += b"" if inline else value
+    exif = struct.pack("<H", len(values)) + entries + struct.pack("<I", 0) + data
+    tiff = b"II*\0" + struct.pack("<I", 8) + ifd0 + exif
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0".ljust(14, b"\0")
+    app1 = b"\xff\xe1" + struct.pack(">H", 8 + len(tiff)) + b"Exif\0\0" + tiff
+    return b"\xff\xd8" + app0 + app1 + b"\xff\xda" + bytes(64)
+
+
+def mp4(created: int) -> bytes:
+    mvhd = struct.pack(">I4sBxxxII", 20, b"mvhd", 0, created + 2082844800, 0)
+    return struct.pack(">I4s4s", 12, b"ftyp", b"isom") + struct.pack(">I4s", 1 << 12, b"mdat") + \
+        bytes((1 << 12) - 8) + struct.pack(">I4s", 8 + len(mvhd), b"moov") + mvhd
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = self.tmp.name
+        self.tz = os.environ.get("TZ")
+        os.environ["TZ"] = "EST5"  # UTC-5, such that EXIF times without an offset are not UTC
+        time.tzset()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        if self.tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = self.tz
+        time.tzset()
+
+    def write(self, name: str, data: bytes, mtime: int = 0) -> str:
+        file = os.path.join(self.path, name)
+        with open(file, "wb") as f:
+            f.write(data)
+        os.utime(file, (mtime, mtime))
+        return file
+
+    def test_jpeg(self):
+        file = self.write("a.jpg", jpeg(b"2021:07:14 18:03:59"))
+        self.assertEqual(read_timestamp(file), timegm((2021, 7, 14, 23, 3, 59)) + 0.25)  # Local time of UTC-5
+        file = self.write("tokyo.jpg", jpeg(b"2021:07:14 18:03:59", b"\0", b"+09:00"))
+        self.assertEqual(read_timestamp(file), timegm((2021, 7, 14, 9, 3, 59)))
+        self.assertIsNone(read_timestamp(self.write("b.jpg", jpeg(b"not a time"))))
+
+    def test_mp4(self):
+        self.assertEqual(read_timestamp(self.write("a.mp4", mp4(1600000000))), 1600000000)  # Header after the data
+        self.assertIsNone(read_timestamp(self.write("b.mp4", mp4(-2082844800))))  # Unset
+        self.assertIsNone(read_timestamp(self.write("c.txt", b"plain text")))
+        moov = mp4(1600000000)
+        self.assertIsNone(read_timestamp(self.write("d.mp4", moov[:moov.index(b"mvhd") + 4])))  # Interrupted copy
+        large = struct.pack(">I4s4s", 12, b"ftyp", b"isom") + struct.pack(">I4s", 1, b"mdat") + b"\0\0"
+        self.assertIsNone(read_timestamp(self.write("e.mov", large)))  # Truncated 64-bit box size
+        self.assertIsNone(read_timestamp(os.path.join(self.path, "missing.jpg")))
+
+    def test_mixed(self):
+        self.write("IMG_1.jpg", jpeg(b"2021:07:14 18:00:00"))  # 23:00 UTC
+        self.write("VID_2.mp4", mp4(timegm((2021, 7, 14, 19, 5, 0))))  # 14:05 local time
+        self.write("IMG_3.jpg", jpeg(b"2021:07:14 18:30:00", b"\0", b"+02:00"))  # 16:30 UTC
+        with ConcreteDirectory(self.path) as directory:
+            MetadataNumeratedDecorator(directory, directory.handle, "exif").operate()
+        files = directory.get_files()
+        self.assertEqual([files.names[row] for row in files.order()], ["IMG_3.jpg", "VID_2.mp4", "IMG_1.jpg"])
+
+    @unittest.skipUnless(os.open in os.supports_dir_fd, "Files cannot be opened relative to a directory")
+    def test_moved(self):
+        self.write("a.jpg", jpeg(b"2021:07:14 18:00:00"))
+        self.write("b.jpg", jpeg(b"2021:07:14 17:00:00"))
+        with ConcreteDirectory(self.path) as directory:
+            os.rename(self.path, self.path + "-moved")  # Files are read relative to the open directory
+            try:
+                MetadataNumeratedDecorator(directory, directory.handle, "exif").operate()
+            finally:
+                os.rename(self.path + "-moved", self.path)
+        files = directory.get_files()
+        self.assertEqual([files.names[row] for row in files.order()], ["b.jpg", "a.jpg"])
+
+    def test_number_by(self):
+        self.write("IMG_9.jpg", jpeg(b"2021:07:14 18:03:59"), 300)
+        self.write("IMG_10.jpg", jpeg(b"2021:07:14 18:03:59", b"05\0"), 200)  # Burst, earlier within the second
+        self.write("clip.mp4", mp4(1000), 100)
+        self.write("notes.txt", b"", 999)  # No header, so its modification time is used
+        self.write("cut.mov", mp4(2000)[:40], 50)  # Truncated header, likewise
+        for source, order in (("mtime", ["cut.mov", "clip.mp4", "IMG_10.jpg", "IMG_9.jpg", "notes.txt"]),
+                              ("exif", ["cut.mov", "notes.txt", "clip.mp4", "IMG_10.jpg", "IMG_9.jpg"])):
+            with ConcreteDirectory(self.path) as directory:
+                MetadataNumeratedDecorator(directory, directory.handle, source, 2).operate()
+            files = directory.get_files()
+            self.assertEqual([files.names[row] for row in files.order()], order)
+            self.assertEqual(sorted(files.nums), [1, 2, 3, 4, 5])
+        self.assertRaises(ValueError, lambda: MetadataNumeratedDecorator(directory, directory.handle, "name"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import json
+from tempfile import TemporaryDirectory
+
+from core.jobs import find_leaf_directories, load_manifest, run_jobs
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.root = self.tmp.name
+        for season, names in (("Season 1", ("ep01.mkv", "ep02.mkv")), ("Season 2", ("ep07.mkv", "ep09.mkv")),
+                              ("Extras", ("a.txt", "b.txt"))):
+            os.makedirs(os.path.join(self.root, "Show", season))
+            for name in names:
+                open(os.path.join(self.root, "Show", season, name), "w").close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_leaf_directories(self):
+        leaves = sorted(os.path.basename(p) for p in find_leaf_directories(self.root))
+        self.assertEqual(leaves, ["Extras", "Season 1", "Season 2"])
+
+    def test_run_jobs(self):
+        jobs = [(p, {"shift": 1}) for p in find_leaf_directories(self.root)]
+        results = {os.path.basename(r.path): r for r in run_jobs(jobs, confirm=True, workers=2)}
+        self.assertIsNotNone(results["Extras"].error)  # No numerical pattern, but the other jobs still run
+        self.assertEqual(results["Season 2"].renames, [("ep07.mkv", "8.mkv"), ("ep09.mkv", "10.mkv")])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, "Show", "Season 1"))), ["2.mkv", "3.mkv"])
+
+    def test_load_manifest(self):
+        manifest = os.path.join(self.root, "jobs.json")
+        with open(manifest, "w") as f:
+            json.dump([{"path": "Show/Season 2", "fmt": "E$d", "shift": 2}, {"path": "/abs", "zeroes": 3}], f)
+        jobs = load_manifest(manifest, {"shift": 1, "zeroes": None})
+        self.assertEqual(jobs[0], (os.path.join(self.root, "Show/Season 2"), {"shift": 2, "zeroes": None, "fmt": ["E$d"]}))
+        self.assertEqual(jobs[1], ("/abs", {"shift": 1, "zeroes": 3}))
+        with open(manifest, "w") as f:
+            json.dump([{"path": "a", "shfit": 1}], f)
+        self.assertRaises(ValueError, lambda: load_manifest(manifest))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from core import executor
+from core.directory import ConcreteDirectory
+from core.decorators import NumeratedDecorator, RandomizeDecorator, ShifterDecorator
+from core.cache import ScanCache
+from core.journal import JOURNAL_NAME, Journal
+from core.planfile import check_plan, read_plan, write_plan
+from core.profiler import Profiler
+from util.fsops import can_exchange, exchange
+from core.scheduler import RenameOp, schedule_renames
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = self.tmp.name
+        for i in range(1, 21):
+            with open(os.path.join(self.path, "{}.txt".format(i)), "w") as f:
+                f.write(str(i))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def contents(self) -> dict:
+        result = {}
+        for name in os.listdir(self.path):
+            if name != JOURNAL_NAME:
+                with open(os.path.join(self.path, name)) as f:
+                    result[name] = f.read()
+        return result
+
+    def crash(self, ops: dict, performed: int) -> None:
+        """
+        Journals the renames, then performs only some of them without committing any, as if the process was killed.
+        """
+        chains = schedule_renames(ops)
+        journal = Journal.create(self.path, chains)
+        for op in [op for chain in chains for op in chain][:performed]:
+            os.rename(os.path.join(self.path, op.src), os.path.join(self.path, op.dst))
+        journal.close()
+
+    def test_resume(self):
+        ops = {"{}.txt".format(i): "{}.txt".format(i + 3) for i in range(1, 21)}  # Chains
+        original = self.contents()
+        self.crash(ops, 7)
+        recovery = executor.recover(self.path)
+        self.assertEqual(sum(recovery.done), 7)
+        executor.resume(self.path, recovery)
+        self.assertEqual(self.contents(), {ops[k]: v for k, v in original.items()})
+        self.assertTrue(Journal.read(self.path).done)
+        executor.undo(self.path, executor.recover(self.path))
+        self.assertEqual(self.contents(), original)
+
+    def test_resume_cycle(self):
+        ops = {"{}.txt".format(i): "{}.txt".format(i % 20 + 1) for i in range(1, 21)}  # One cycle
+        original = self.contents()
+        self.crash(ops, 1)
+        self.assertEqual(executor.recover(self.path).done, [1])
+        executor.resume(self.path, executor.recover(self.path))
+        self.assertEqual(self.contents(), {ops[k]: v for k, v in original.items()})
+
+    def test_undo_partial(self):
+        original = self.contents()
+        d = ConcreteDirectory(self.path)
+        RandomizeDecorator(ShifterDecorator(NumeratedDecorator(d), 5), 1234).operate()
+        d.save_files(journal=True)
+        self.assertNotEqual(self.contents(), original)
+        with open(os.path.join(self.path, JOURNAL_NAME), "ab") as f:
+            f.write(b"C12")  # Partially written commit is ignored
+        executor.undo(self.path, executor.recover(self.path))
+        self.assertEqual(self.contents(), original)
+        self.assertNotIn(JOURNAL_NAME, ConcreteDirectory(self.path).get_files())
+
+    def test_threads(self):
+        original = self.contents()
+        d = ConcreteDirectory(self.path)
+        RandomizeDecorator(NumeratedDecorator(d), 839693).operate()
+        expected = {str(f): original[name] for name, f in d.get_files().items()}
+        d.save_files(journal=True, threads=4)
+        self.assertEqual(self.contents(), expected)
+        self.assertTrue(Journal.read(self.path).done)
+        self.assertEqual(executor.recover(self.path).done, [len(c) for c in Journal.read(self.path).chains])
+
+    @unittest.skipUnless(can_exchange(), "renameat2 requires Linux")
+    def test_swap(self):
+        original = self.contents()
+        chains = schedule_renames({"1.txt": "2.txt", "2.txt": "1.txt"})
+        profiler = Profiler()
+        executor.execute(self.path, chains, Journal.create(self.path, chains), profiler=profiler)
+        self.assertEqual(self.contents(), {**original, "1.txt": "2", "2.txt": "1"})
+        self.assertEqual(profiler.records[0].syscalls, 2)  # Stat and swap, rather than three renames
+        self.assertEqual(executor.recover(self.path).done, [3])
+
+        journal = Journal.create(self.path, chains)  # Swapped, but killed before any commit
+        journal.exchange(0, os.lstat(os.path.join(self.path, "1.txt")).st_ino)
+        exchange(os.path.join(self.path, "1.txt"), os.path.join(self.path, "2.txt"))
+        journal.close()
+        self.assertEqual(executor.recover(self.path).done, [3])
+        journal = Journal.create(self.path, chains)  # Killed before the swap
+        journal.exchange(0, os.lstat(os.path.join(self.path, "1.txt")).st_ino)
+        journal.close()
+        self.assertEqual(executor.recover(self.path).done, [0])
+        executor.resume(self.path, executor.recover(self.path))
+        self.assertEqual(self.contents(), {**original, "1.txt": "2", "2.txt": "1"})
+
+    def test_failure(self):
+        for i in range(4000):
+            if i != 1:
+                open(os.path.join(self.path, "s{}".format(i)), "w").close()
+        chains = [[RenameOp("s{}".format(i), "d{}".format(i))] for i in range(4000)]
+        with self.assertRaises(FileNotFoundError):  # Rather than an error of the threads which stopped early
+            executor.execute(self.path, chains, threads=2)
+
+    def test_partition(self):
+        chains, skip = [[("a", "b")] * n for n in (5, 1, 3, 3, 2, 1)], [0, 0, 0, 2, 0, 1]
+        partitions = executor._partition(chains, skip, 2)
+        self.assertEqual([sum(len(chains[c]) - skip[c] for c in p) for p in partitions], [6, 6])
+        self.assertNotIn(5, [c for p in partitions for c in p])  # Nothing remains to be performed
+
+    def test_plan_file(self):
+        original, plans = self.contents(), TemporaryDirectory()
+        file = os.path.join(plans.name, "shift.plan")
+        racy = ScanCache.signature(self.path)  # Modified within a timestamp tick
+        self.assertRaises(ValueError, lambda: write_plan(file, self.path, racy, []))
+        settled = time.time_ns() - 19 * 10 ** 8  # 1.9 s ago, such that the tick is waited out
+        os.utime(self.path, ns=(settled, settled))
+        signature = ScanCache.settled_signature(self.path)
+        self.assertFalse(signature.racy)
+        d = ConcreteDirectory(self.path)
+        RandomizeDecorator(NumeratedDecorator(d), 42).operate()  # Cycles, broken by temporary names
+        chains = d.plan_files()
+        write_plan(file, self.path, signature, chains)
+        plan = read_plan(file)
+        self.assertEqual(plan.chains, chains)
+        check_plan(plan)
+        executor.perform_plan(plan.path, plan.chains)
+        self.assertEqual(self.contents(), {str(f): original[name] for name, f in d.get_files().items()})
+        os.utime(self.path, ns=(0, 0))
+        self.assertRaises(Exception, lambda: check_plan(plan))  # Directory changed
+        self.assertRaises(ValueError, lambda: write_plan(os.path.join(self.path, "a.plan"), self.path, signature, []))
+        plans.cleanup()
+
+    def test_interrupted(self):
+        self.crash({"1.txt": "30.txt"}, 0)
+        d = ConcreteDirectory(self.path)
+        ShifterDecorator(NumeratedDecorator(d), 1).operate()
+        self.assertRaises(Exception, lambda: d.save_files(journal=True))
+
+    @unittest.skipUnless(os.rename in os.supports_dir_fd, "renames relative to a directory require *at calls")
+    def test_moved(self):
+        d = ConcreteDirectory(self.path)
+        ShifterDecorator(NumeratedDecorator(d), 1).operate()
+        moved = self.path + ".moved"
+        os.rename(self.path, moved)  # Renamed relative to the directory which was scanned, wherever it now is
+        try:
+            d.save_files(threads=2)
+            self.assertEqual(sorted(os.listdir(moved)), sorted("{}.txt".format(i) for i in range(2, 22)))
+        finally:
+            os.rename(moved, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
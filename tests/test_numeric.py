@@ -0,0 +1,78 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+from array import array
+from random import Random
+
+from core import numeric
+
+
+class MyTestCase(unittest.TestCase):
+    __SIZE = 5000  # Large enough for the NumPy backend to be used
+
+    def setUp(self):
+        self.vectorized = numeric.is_vectorized()
+
+    def tearDown(self):
+        numeric.set_vectorized(self.vectorized)
+
+    def sample(self) -> array:
+        gen = Random(7)
+        return array("q", gen.sample(range(-50000, 50000), MyTestCase.__SIZE))
+
+    def transform(self, vectorized: bool) -> list:
+        numeric.set_vectorized(vectorized)
+        nums = self.sample()
+        numeric.shift(nums, 13, 100, 4000)
+        numeric.shuffle(nums, 839693)
+        largest = numeric.largest(nums)
+        numeric.flatten(nums)
+        return [largest] + nums.tolist()
+
+    def test_shuffle_seed(self):
+        numeric.set_vectorized(False)
+        nums = self.sample()
+        expected = nums.tolist()
+        gen = Random(1234)  # Forward Fisher-Yates, which seeded shuffles have always used
+        for i in range(len(expected) - 1):
+            j = gen.randrange(i, len(expected))
+            expected[i], expected[j] = expected[j], expected[i]
+        numeric.shuffle(nums, 1234)
+        self.assertEqual(nums.tolist(), expected)
+
+    def test_flatten(self):
+        nums = array("q", [15, 101, 24, 24])
+        numeric.flatten(nums)
+        self.assertEqual(nums.tolist(), [15, 18, 16, 17])
+
+    @unittest.skipUnless(numeric.numpy is not None, "NumPy is not installed")
+    def test_backends_identical(self):
+        self.assertEqual(self.transform(False), self.transform(True))
+        numeric.set_vectorized(True)
+        nums = array("q", [(1 << 63) - 1]) * MyTestCase.__SIZE
+        self.assertRaises(OverflowError, lambda: numeric.shift(nums, 1))
+        for vectorized in (False, True):  # Both backends raise, rather than wrap around
+            numeric.set_vectorized(vectorized)
+            nums = array("q", range(MyTestCase.__SIZE))
+            self.assertRaises(OverflowError, lambda: numeric.flatten(nums, (1 << 63) - 2))
+            self.assertRaises(OverflowError, lambda: numeric.flatten(nums, -1 << 64))
+
+
+if __name__ == '__main__':
+    unittest.main()
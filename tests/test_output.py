@@ -0,0 +1,60 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import json
+from io import BytesIO, StringIO
+
+from core.output import RenameWriter
+
+
+class MyTestCase(unittest.TestCase):
+    __PAIRS = [("a\t1.jpg", "1.jpg"), ("\udcff2.jpg", "2.jpg")]
+
+    def render(self, fmt: str, path: str = None) -> bytes:
+        stream = BytesIO()
+        writer = RenameWriter(stream, fmt)
+        if path is not None:
+            writer.directory(path)
+        writer.write_all(MyTestCase.__PAIRS)
+        writer.flush()
+        return stream.getvalue()
+
+    def test_jsonl(self):
+        lines = [json.loads(line) for line in self.render("jsonl", "dir").splitlines()]
+        self.assertEqual(lines[0], {"path": "dir", "old": "a\t1.jpg", "new": "1.jpg"})
+        self.assertEqual(lines[1]["old"], "\udcff2.jpg")
+
+    def test_tsv(self):
+        self.assertEqual(self.render("tsv"), b"a\\t1.jpg\t1.jpg\n\xff2.jpg\t2.jpg\n")
+
+    def test_null(self):
+        self.assertEqual(self.render("null", "dir"), b"dir/a\t1.jpg\0dir/1.jpg\0dir/\xff2.jpg\0dir/2.jpg\0")
+
+    def test_text(self):
+        stream = StringIO()
+        writer = RenameWriter(stream)
+        writer.write("1.jpg", "2.jpg")
+        self.assertEqual(stream.getvalue(), "")  # Buffered until flushed
+        writer.flush()
+        self.assertEqual(stream.getvalue(), "Renaming [1.jpg]\n\t--> [2.jpg]\n")
+        self.assertRaises(ValueError, lambda: RenameWriter(stream, "csv"))
+
+
+if __name__ == '__main__':
+    unittest.main()
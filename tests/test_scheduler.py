@@ -0,0 +1,70 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from tempfile import TemporaryDirectory
+
+from core.directory import ConcreteDirectory
+from core.decorators import NumeratedDecorator, RandomizeDecorator, ShifterDecorator
+from core.scheduler import schedule_renames
+
+
+class MyTestCase(unittest.TestCase):
+    @staticmethod
+    def simulate(files: set, chains) -> set:
+        for chain in chains:
+            for src, dst in chain:
+                assert src in files and dst not in files, "{} -> {}".format(src, dst)
+                files.remove(src)
+                files.add(dst)
+        return files
+
+    def test_chain(self):
+        ops = {"1.jpg": "2.jpg", "2.jpg": "3.jpg", "3.jpg": "4.jpg"}
+        chains = schedule_renames(ops)
+        self.assertEqual(chains, [[("3.jpg", "4.jpg"), ("2.jpg", "3.jpg"), ("1.jpg", "2.jpg")]])
+
+    def test_cycles(self):
+        ops = {"a": "b", "b": "c", "c": "a", "x": "y", "y": "x", "same": "same", "m": "n"}
+        chains = schedule_renames(ops)
+        self.assertEqual(sum(len(c) for c in chains), 4 + 3 + 1)  # One extra rename per cycle
+        self.assertEqual(MyTestCase.simulate(set(ops), chains), set(ops.values()))
+
+    def test_conflicts(self):
+        self.assertRaises(Exception, lambda: schedule_renames({"a": "c", "b": "c"}))
+        self.assertRaises(Exception, lambda: schedule_renames({"a": "c"}, {"c"}))
+        self.assertRaises(Exception, lambda: schedule_renames({"a": "b", "b": "b"}))
+
+    def test_save_shuffle(self):
+        with TemporaryDirectory() as path:
+            for i in range(1, 51):
+                with open(os.path.join(path, "{}.txt".format(i)), "w") as f:
+                    f.write(str(i))
+            d = ConcreteDirectory(path)
+            RandomizeDecorator(ShifterDecorator(NumeratedDecorator(d), 10), 1234).operate()
+            expected = {str(v): k for k, v in d.get_files().items()}
+            d.save_files()
+            self.assertEqual(set(os.listdir(path)), set(expected))
+            for new, old in expected.items():
+                with open(os.path.join(path, new)) as f:
+                    self.assertEqual(f.read() + ".txt", old)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+    CLI tool written in Python 3 used to systemically rename files in a directory while adhering to a variety of criteria.
+    Copyright (C) 2022  Kevin Tyrrell
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from time import sleep
+
+from core.watch import InotifyWatcher, PollingWatcher, WatchSession, watch
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, *names: str) -> list:
+        for name in names:
+            open(os.path.join(self.path, name), "w").close()
+        return list(names)
+
+    def test_session(self):
+        session = WatchSession(self.path, {"consecutive": True, "zeroes": 3, "fmt": ["Cam $d"]}, confirm=True)
+        session.process(self.touch("2021 IMG_40.jpg", "2021 IMG_12.jpg"))
+        renames = session.process(self.touch("2022 IMG_7.jpg", "notes.txt"))
+        self.assertEqual(renames, [("2022 IMG_7.jpg", "Cam 014.jpg")])  # Continues after the first batch
+        self.assertEqual(sorted(os.listdir(self.path)), ["Cam 012.jpg", "Cam 013.jpg", "Cam 014.jpg", "notes.txt"])
+        self.assertRaises(ValueError, lambda: WatchSession(self.path, {"random": 5}))
+
+    def watch(self, watcher_type):
+        self.touch("a1.jpg", "a2.jpg")
+        watcher = watcher_type(self.path)
+        self.touch("a3.jpg")
+        added, removed, _ = watcher.wait(0.2)
+        self.assertEqual(added, {"a3.jpg"})
+        os.remove(os.path.join(self.path, "a1.jpg"))
+        self.assertEqual(watcher.wait(0.2)[1], {"a1.jpg"})
+        watcher.close()
+
+    def test_polling(self):
+        self.watch(PollingWatcher)
+
+    @unittest.skipUnless(hasattr(os, "pipe2"), "inotify requires Linux")
+    def test_inotify(self):
+        self.watch(InotifyWatcher)
+
+    def test_watch(self):
+        self.touch("b5.png", "b9.png")
+        stop = Event()
+        thread = Thread(target=watch, args=(WatchSession(self.path, {"shift": 1}, confirm=True), 0.05, stop))
+        thread.start()
+        sleep(0.3)
+        self.touch("b20.png")
+        sleep(0.3)
+        stop.set()
+        thread.join()
+        self.assertEqual(sorted(os.listdir(self.path)), ["10.png", "21.png", "6.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()